@@ -1,14 +1,22 @@
-from flask import Flask, g
+import secrets
+
+from flask import Flask, Response, abort, g, request
 from flask_cors import CORS
 import config
 from extensions import db, migrate
+from services import metrics
+from services.compression import init_compression
 from services.config_validator import validate_config
+from services.db_engine import engine_options
+from services.json_provider import provider_class
 
 
 def create_app():
     app = Flask(__name__)
+    app.json = provider_class()(app)
     app.config["SQLALCHEMY_DATABASE_URI"] = config.DATABASE_URL
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(config.DATABASE_URL)
     app.config["SECRET_KEY"] = config.SECRET_KEY
 
     origins = config.CORS_ORIGINS
@@ -16,6 +24,7 @@ def create_app():
         origins = [o.strip() for o in origins.split(",") if o.strip()]
 
     CORS(app, origins=origins)
+    init_compression(app)
 
 
     db.init_app(app)
@@ -42,9 +51,15 @@ def create_app():
     from routes.forms import forms_bp
     app.register_blueprint(forms_bp)
 
+    from services.audit_stream import audit_hub
+    audit_hub.init_app(app)
+
     # Import models so Alembic can detect
     import models
 
+    from commands import register_commands
+    register_commands(app)
+
     @app.after_request
     def add_security_headers(response):
         response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains" # use only over HTTPS in production
@@ -53,8 +68,9 @@ def create_app():
         response.headers["X-XSS-Protection"] = "1; mode=block" # enable basic XSS protection in older browsers (modern browsers use CSP instead)
         response.headers["Content-Security-Policy"] = "default-src 'self'; frame-ancestors 'none'" # restrict all content to same origin, prevent framing
         response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin" # Strips the header down if navigating to a different origin, but sends full URL when navigating within the same origin. This is a good balance between privacy and functionality for an EMR.
-        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate" # prevent caching of sensitive data
-        response.headers["Pragma"] = "no-cache" # HTTP 1.0 backward compatibility for no-cache
+        if "Cache-Control" not in response.headers: # routes serving immutable, non-PHI content (template versions) opt in to caching
+            response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate" # prevent caching of sensitive data
+            response.headers["Pragma"] = "no-cache" # HTTP 1.0 backward compatibility for no-cache
         return response
 
     validate_config(app)
@@ -62,6 +78,14 @@ def create_app():
     @app.get("/health")
     def health():
         return {"ok": True}
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        # Prometheus scrape endpoint; disabled unless METRICS_TOKEN is set
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not config.METRICS_TOKEN or not secrets.compare_digest(token, config.METRICS_TOKEN):
+            abort(404)
+        return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
     
     
     @app.get("/api/protected/ping")
@@ -71,7 +95,8 @@ def create_app():
 
     return app
 
-app = create_app()
 
+# Production runs under gunicorn (wsgi.py, gunicorn.conf.py); `python app.py` is the local dev server
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
+
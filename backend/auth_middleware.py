@@ -7,6 +7,7 @@ from extensions import db
 from models import UserSession, User
 from services.audit_logger import log_access
 from services.helpers import client_ip
+from services.user_activity import touch_last_seen
 
 
 def _get_session_id():
@@ -53,11 +54,13 @@ def require_auth(roles=None):
 
             g.user = user
             g.tenant_id = user.tenant_id
+            touch_last_seen(user)
 
             if roles and user.role not in roles:
                 log_access(
                     user.id, "ACCESS_403", request.path, "FAILED", ip, 
-                    description=f"'{user.username}' ({user.role}) denied access to {request.method} {request.path}",
+                    message="access_denied_role",
+                    params={"username": user.username, "role": user.role, "method": request.method, "path": request.path},
                     tenant_id=user.tenant_id
                 )
                 return {"error": "forbidden"}, 403
@@ -0,0 +1,32 @@
+"""
+Flask CLI commands for scheduled maintenance. They run inside the app image,
+so a cron entry, Kubernetes CronJob or `docker compose run` can invoke them:
+
+    flask audit-purge [--tenant SLUG]
+    flask audit-checkpoint
+"""
+
+import click
+
+from services.audit_chain import checkpoint_heads
+from services.audit_retention import purge_all
+
+
+@click.command("audit-purge")
+@click.option("--tenant", "tenant_slug", default=None, help="limit to one tenant slug")
+def audit_purge_command(tenant_slug):
+    """Delete audit entries past each tenant's retention policy."""
+    for s in purge_all(tenant_slug):
+        click.echo(f"{s['tenant']}: deleted {s['deleted']:,} entries in {s['batches']} batches, "
+                   f"archived months removed: {len(s['archived'])}")
+
+
+@click.command("audit-checkpoint")
+def audit_checkpoint_command():
+    """Record every tenant's audit hash-chain head as a checkpoint."""
+    click.echo(f"{checkpoint_heads()} checkpoints written")
+
+
+def register_commands(app):
+    app.cli.add_command(audit_purge_command)
+    app.cli.add_command(audit_checkpoint_command)
@@ -2,8 +2,73 @@ import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///dev.db")
 SECRET_KEY = os.getenv("SECRET_KEY", "dev_secret")
+
+# SQLAlchemy connection pool, per worker process (gunicorn.conf.py runs several).
+# Size it so workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below Postgres max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))  # -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Postgres statement_timeout by endpoint class (services/db_engine.py); 0 = no limit.
+# "background" covers work outside a request: CLI commands and scripts.
+DB_STATEMENT_TIMEOUT_MS = {
+    "interactive": int(os.getenv("DB_STATEMENT_TIMEOUT_INTERACTIVE_MS", "5000")),
+    "report": int(os.getenv("DB_STATEMENT_TIMEOUT_REPORT_MS", "30000")),
+    "export": int(os.getenv("DB_STATEMENT_TIMEOUT_EXPORT_MS", "600000")),
+    "background": int(os.getenv("DB_STATEMENT_TIMEOUT_BACKGROUND_MS", "0")),
+}
+# JSON encoder for API responses: auto (orjson when installed), orjson, or stdlib
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+# Response compression (services/compression.py): bodies smaller than this are sent as they are
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+# Bearer token for GET /metrics; the endpoint is disabled while unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 
 SESSION_TIMEOUT_MINUTES = int(os.getenv("SESSION_TIMEOUT_MINUTES", "15"))
 MAX_FAILED_LOGINS = int(os.getenv("MAX_FAILED_LOGINS", "5"))
-ACCOUNT_LOCKOUT_MINUTES = int(os.getenv("ACCOUNT_LOCKOUT_MINUTES", "30"))
\ No newline at end of file
+ACCOUNT_LOCKOUT_MINUTES = int(os.getenv("ACCOUNT_LOCKOUT_MINUTES", "30"))
+# user.last_seen is refreshed by authenticated requests at most this often per user
+USER_LAST_SEEN_INTERVAL_SECONDS = int(os.getenv("USER_LAST_SEEN_INTERVAL_SECONDS", "300"))
+# Bulk user provisioning: rows per CSV, and processes hashing passwords (0 = CPU count)
+USER_PROVISION_MAX_ROWS = int(os.getenv("USER_PROVISION_MAX_ROWS", "1000"))
+USER_PROVISION_WORKERS = int(os.getenv("USER_PROVISION_WORKERS", "0"))
+
+AUDIT_COUNT_CAP = int(os.getenv("AUDIT_COUNT_CAP", "10000"))
+AUDIT_COUNT_CACHE_SECONDS = int(os.getenv("AUDIT_COUNT_CACHE_SECONDS", "30"))
+TREATMENT_PLAN_OVERDUE_CACHE_SECONDS = int(os.getenv("TREATMENT_PLAN_OVERDUE_CACHE_SECONDS", "60"))
+# Form template version snapshots kept in memory per process (least recently used are dropped)
+TEMPLATE_VERSION_CACHE_SIZE = int(os.getenv("TEMPLATE_VERSION_CACHE_SIZE", "1024"))
+# Treatment plan history keeps a full snapshot every this many revisions, deltas in between
+TREATMENT_PLAN_SNAPSHOT_EVERY = int(os.getenv("TREATMENT_PLAN_SNAPSHOT_EVERY", "10"))
+
+# Audit months older than this are moved to compressed NDJSON segments on local disk
+AUDIT_ARCHIVE_AFTER_MONTHS = int(os.getenv("AUDIT_ARCHIVE_AFTER_MONTHS", "12"))
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive", "audit"))
+
+# Live audit tail (/api/audit/stream). Streams end after AUDIT_STREAM_MAX_SECONDS and the
+# client reconnects with Last-Event-ID, which re-checks its session.
+AUDIT_STREAM_HEARTBEAT_SECONDS = int(os.getenv("AUDIT_STREAM_HEARTBEAT_SECONDS", "15"))
+AUDIT_STREAM_MAX_SECONDS = int(os.getenv("AUDIT_STREAM_MAX_SECONDS", "300"))
+AUDIT_STREAM_QUEUE_SIZE = int(os.getenv("AUDIT_STREAM_QUEUE_SIZE", "1000"))
+AUDIT_STREAM_CATCHUP_LIMIT = int(os.getenv("AUDIT_STREAM_CATCHUP_LIMIT", "1000"))
+# One tail thread per worker reads new entries every POLL_SECONDS, re-checking the last
+# POLL_LOOKBACK ids for transactions that committed out of id order
+AUDIT_STREAM_POLL_SECONDS = float(os.getenv("AUDIT_STREAM_POLL_SECONDS", "1"))
+AUDIT_STREAM_POLL_LOOKBACK = int(os.getenv("AUDIT_STREAM_POLL_LOOKBACK", "50"))
+# Each open stream holds a gunicorn thread for up to AUDIT_STREAM_MAX_SECONDS; with the
+# default 4 threads, one stream per worker keeps three for ordinary requests. Raise it
+# together with GUNICORN_THREADS.
+AUDIT_STREAM_MAX_PER_WORKER = int(os.getenv("AUDIT_STREAM_MAX_PER_WORKER", "1"))
+
+# Audit retention: entries older than this are purged (per-tenant override: tenant.audit_retention_days).
+# HIPAA expects audit documentation to be kept for six years.
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "2190"))
+AUDIT_PURGE_BATCH_ROWS = int(os.getenv("AUDIT_PURGE_BATCH_ROWS", "5000"))
+AUDIT_PURGE_PAUSE_SECONDS = float(os.getenv("AUDIT_PURGE_PAUSE_SECONDS", "0.5"))
+
+# Audit hash chain: checkpoint each tenant's chain head every N entries
+AUDIT_CHAIN_CHECKPOINT_EVERY = int(os.getenv("AUDIT_CHAIN_CHECKPOINT_EVERY", "10000"))
@@ -0,0 +1,67 @@
+"""
+Custom column types shared by the models.
+"""
+
+import ipaddress
+
+from sqlalchemy import types
+from sqlalchemy.dialects import postgresql
+
+
+class CodeEnum(types.TypeDecorator):
+    """
+    Stores a string from a fixed catalog as a small integer.
+    Python code keeps reading and comparing plain strings; the mapping lives in
+    the catalog dict ({name: code}), which must only ever be appended to.
+    Unknown names bind as NULL, so filters on them simply match nothing; writers
+    must map them to a catalogued name first (log_access stores UNKNOWN).
+    """
+    impl = types.SmallInteger
+    cache_ok = True
+
+    def __init__(self, catalog: dict, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Kept as a tuple so the type stays hashable for the statement cache key
+        self.catalog = tuple(sorted(catalog.items()))
+        self.codes = dict(catalog)
+        self.names = {code: name for name, code in catalog.items()}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self.codes.get(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.names.get(value, str(value))
+
+
+class IPAddress(types.TypeDecorator):
+    """
+    IPv4/IPv6 address: native INET on Postgres, packed 4/16 bytes elsewhere.
+    Values that don't parse as an address are stored as NULL.
+    """
+    impl = types.LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.INET())
+        return dialect.type_descriptor(types.LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if not value:
+            return None
+        try:
+            addr = ipaddress.ip_address(str(value).strip())
+        except ValueError:
+            return None
+        return str(addr) if dialect.name == "postgresql" else addr.packed
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return str(ipaddress.ip_address(bytes(value)))
+        return str(value)
@@ -0,0 +1,75 @@
+"""
+Gunicorn settings for production: gunicorn -c gunicorn.conf.py wsgi:app
+
+Every value can be overridden from the environment (GUNICORN_*).
+
+Worker model: gthread, i.e. a few processes each serving requests on a
+thread pool. Requests mostly wait on Postgres, so threads overlap that I/O
+cheaply, while separate processes keep CPU-heavy work (password hashing,
+large exports) from serializing on one GIL. Long-lived responses
+(the /api/audit/stream tail, streamed exports) hold a thread rather than a
+whole worker. scripts/load_benchmark.py compares this against plain
+process-per-request sync workers; see the README.
+
+The app is preloaded in the master and forked, so post_fork drops the
+database connections the children inherited. Per-process state (the login
+rate limiter, TTL caches, the live audit hub) is not shared between
+workers. Metrics are: workers write them under PROMETHEUS_MULTIPROC_DIR
+and /metrics merges every worker's values (services/metrics.py).
+"""
+
+import os
+import tempfile
+
+_cpus = os.cpu_count() or 1
+
+# Must be set, and exist, before the preloaded app imports prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "prometheus-multiproc"))
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "0")) or _cpus * 2 + 1
+threads = int(os.getenv("GUNICORN_THREADS", "0")) or 4
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread" if threads > 1 else "sync")
+
+preload_app = True
+
+# Under gthread, timeout is how long a worker may go without heartbeating, not a
+# per-request limit, so streamed responses are unaffected
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers now and then, staggered so they don't all restart at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None  # empty disables
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+# Client IPs come from X-Forwarded-For (services/helpers.client_ip); only trust it from the proxy
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def post_fork(server, worker):
+    # Connections the master's pool opened before forking are shared sockets; the child
+    # starts a fresh pool and leaves the inherited ones for the master to close
+    from extensions import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def on_starting(server):
+    # Files left by a previous run would be summed into this one's counters. Runs once,
+    # after preload; the master never records metrics itself, workers write their own files.
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    for name in os.listdir(path):
+        os.remove(os.path.join(path, name))
+
+
+def child_exit(server, worker):
+    from services import metrics
+
+    metrics.mark_process_dead(worker.pid)
@@ -0,0 +1,38 @@
+"""add template scoring rules and materialized form scores
+
+Revision ID: 3f9a2c7d41b6
+Revises: 1d811683784b
+Create Date: 2026-10-19 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a2c7d41b6'
+down_revision = '1d811683784b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('form_template', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scoring', sa.JSON(), nullable=True))
+
+    with op.batch_alter_table('patient_form', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('score', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('severity', sa.String(length=40), nullable=True))
+        batch_op.create_index('ix_patient_form_tenant_template_score', ['tenant_id', 'template_id', 'score'], unique=False)
+        batch_op.create_index('ix_patient_form_tenant_severity', ['tenant_id', 'severity'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('patient_form', schema=None) as batch_op:
+        batch_op.drop_index('ix_patient_form_tenant_severity')
+        batch_op.drop_index('ix_patient_form_tenant_template_score')
+        batch_op.drop_column('severity')
+        batch_op.drop_column('score')
+
+    with op.batch_alter_table('form_template', schema=None) as batch_op:
+        batch_op.drop_column('scoring')
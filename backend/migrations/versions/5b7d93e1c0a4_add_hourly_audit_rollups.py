@@ -0,0 +1,47 @@
+"""add hourly audit rollup counters
+
+Revision ID: 5b7d93e1c0a4
+Revises: 8c41e07b5a2f
+Create Date: 2026-10-19 11:40:27.730519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d93e1c0a4'
+down_revision = '8c41e07b5a2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audit_rollup_hourly',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('action', sa.String(length=80), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'hour', 'action', 'status', name='uq_audit_rollup_bucket')
+    )
+
+    # Seed counters from existing history in one GROUP BY pass
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Truncate in UTC like hour_bucket(); the session TimeZone may sit on a half-hour offset
+        hour_expr = """date_trunc('hour', "timestamp" AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'"""
+    else:
+        hour_expr = "strftime('%Y-%m-%d %H:00:00.000000', timestamp)"
+    op.execute(
+        "INSERT INTO audit_rollup_hourly (tenant_id, hour, action, status, count) "
+        f"SELECT tenant_id, {hour_expr}, action, status, COUNT(*) FROM audit_log "
+        f"GROUP BY tenant_id, {hour_expr}, action, status"
+    )
+
+
+def downgrade():
+    op.drop_table('audit_rollup_hourly')
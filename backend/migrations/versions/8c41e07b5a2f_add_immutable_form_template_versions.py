@@ -0,0 +1,90 @@
+"""add immutable content-addressed form template versions
+
+Revision ID: 8c41e07b5a2f
+Revises: 3f9a2c7d41b6
+Create Date: 2026-10-19 10:02:11.504977
+
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e07b5a2f'
+down_revision = '3f9a2c7d41b6'
+branch_labels = None
+depends_on = None
+
+
+def _content_hash(fields, scoring):
+    # Frozen copy of services.template_versions.content_hash
+    canonical = json.dumps(
+        {"fields": fields or [], "scoring": scoring},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def upgrade():
+    op.create_table('form_template_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('fields', sa.JSON(), nullable=False),
+    sa.Column('scoring', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('form_template_version', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_form_template_version_content_hash'), ['content_hash'], unique=True)
+
+    with op.batch_alter_table('form_template', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('current_version_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_form_template_current_version_id', 'form_template_version', ['current_version_id'], ['id'])
+
+    with op.batch_alter_table('patient_form', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('template_version_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_patient_form_template_version_id'), ['template_version_id'], unique=False)
+        batch_op.create_foreign_key('fk_patient_form_template_version_id', 'form_template_version', ['template_version_id'], ['id'])
+
+    # Snapshot every existing template; existing forms are pinned to today's definition
+    bind = op.get_bind()
+    version_t = sa.table('form_template_version',
+        sa.column('id', sa.Integer), sa.column('content_hash', sa.String),
+        sa.column('fields', sa.JSON), sa.column('scoring', sa.JSON(none_as_null=True)), sa.column('created_at', sa.DateTime(timezone=True)))
+    template_t = sa.table('form_template',
+        sa.column('id', sa.Integer), sa.column('fields', sa.JSON), sa.column('scoring', sa.JSON), sa.column('current_version_id', sa.Integer))
+    form_t = sa.table('patient_form', sa.column('template_id', sa.Integer), sa.column('template_version_id', sa.Integer))
+
+    version_ids = {}
+    for tpl_id, fields, scoring in bind.execute(sa.select(template_t.c.id, template_t.c.fields, template_t.c.scoring)).all():
+        digest = _content_hash(fields, scoring)
+        if digest not in version_ids:
+            version_ids[digest] = bind.execute(
+                version_t.insert().values(content_hash=digest, fields=fields or [], scoring=scoring, created_at=datetime.now(timezone.utc))
+                .returning(version_t.c.id)
+            ).scalar_one()
+        vid = version_ids[digest]
+        bind.execute(template_t.update().where(template_t.c.id == tpl_id).values(current_version_id=vid))
+        bind.execute(form_t.update().where(form_t.c.template_id == tpl_id).values(template_version_id=vid))
+
+
+def downgrade():
+    with op.batch_alter_table('patient_form', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_patient_form_template_version_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_patient_form_template_version_id'))
+        batch_op.drop_column('template_version_id')
+
+    with op.batch_alter_table('form_template', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_form_template_current_version_id', type_='foreignkey')
+        batch_op.drop_column('current_version_id')
+
+    with op.batch_alter_table('form_template_version', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_form_template_version_content_hash'))
+
+    op.drop_table('form_template_version')
@@ -0,0 +1,44 @@
+"""add treatment plan revision history
+
+Revision ID: a4d7f2c8e561
+Revises: f1c6d9a2b348
+Create Date: 2026-10-19 20:34:50.661203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7f2c8e561'
+down_revision = 'f1c6d9a2b348'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing plans get their current state recorded as version 1 on their next save
+    with op.batch_alter_table('treatment_plan', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revision', sa.Integer(), server_default='0', nullable=False))
+
+    op.create_table('treatment_plan_revision',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('plan_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['plan_id'], ['treatment_plan.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('plan_id', 'version', name='uq_treatment_plan_revision_plan_version')
+    )
+
+
+def downgrade():
+    op.drop_table('treatment_plan_revision')
+    with op.batch_alter_table('treatment_plan', schema=None) as batch_op:
+        batch_op.drop_column('revision')
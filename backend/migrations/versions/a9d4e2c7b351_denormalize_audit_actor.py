@@ -0,0 +1,56 @@
+"""snapshot actor username and role on audit_log rows
+
+Revision ID: a9d4e2c7b351
+Revises: f7c3d2a18e65
+Create Date: 2026-10-19 17:12:30.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2c7b351'
+down_revision = 'f7c3d2a18e65'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_BATCH_IDS = 10000
+
+
+def upgrade():
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('actor_username', sa.String(length=80), nullable=True))
+        batch_op.add_column(sa.Column('actor_role', sa.String(length=30), nullable=True))
+
+    # Existing rows get the actor's current name; new rows are stamped by log_access.
+    # Walk id ranges so each UPDATE stays short, committing per batch on Postgres
+    # so a large audit_log isn't rewritten in one long transaction.
+    bind = op.get_bind()
+    lo, hi = bind.execute(sa.text("SELECT min(id), max(id) FROM audit_log")).one()
+    if lo is None:
+        return
+
+    stmt = sa.text("""
+        UPDATE audit_log SET
+            actor_username = (SELECT u.username FROM "user" u WHERE u.id = audit_log.user_id),
+            actor_role = (SELECT u.role FROM "user" u WHERE u.id = audit_log.user_id)
+        WHERE id >= :lo AND id < :hi AND user_id IS NOT NULL
+    """)
+
+    def backfill():
+        for start in range(lo, hi + 1, BACKFILL_BATCH_IDS):
+            bind.execute(stmt, {"lo": start, "hi": start + BACKFILL_BATCH_IDS})
+
+    if bind.dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            backfill()
+    else:
+        backfill()
+
+
+def downgrade():
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.drop_column('actor_role')
+        batch_op.drop_column('actor_username')
@@ -0,0 +1,26 @@
+"""add per-tenant audit retention override
+
+Revision ID: b6e1f9a3c2d7
+Revises: a9d4e2c7b351
+Create Date: 2026-10-19 18:05:51.733902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1f9a3c2d7'
+down_revision = 'a9d4e2c7b351'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('audit_retention_days', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('tenant', schema=None) as batch_op:
+        batch_op.drop_column('audit_retention_days')
@@ -0,0 +1,147 @@
+"""move treatment plan goals into treatment_goal rows
+
+Revision ID: b9e3a6d1f742
+Revises: a4d7f2c8e561
+Create Date: 2026-10-19 21:10:18.374925
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e3a6d1f742'
+down_revision = 'a4d7f2c8e561'
+branch_labels = None
+depends_on = None
+
+
+BATCH_PLANS = 500
+
+# Frozen copies of the tables as this migration sees them
+treatment_plan = sa.table(
+    'treatment_plan',
+    sa.column('id', sa.Integer),
+    sa.column('tenant_id', sa.Integer),
+    sa.column('goals', sa.JSON),
+)
+treatment_goal = sa.table(
+    'treatment_goal',
+    sa.column('tenant_id', sa.Integer),
+    sa.column('plan_id', sa.Integer),
+    sa.column('ordinal', sa.Integer),
+    sa.column('goal_key', sa.String),
+    sa.column('text', sa.Text),
+    sa.column('target_date', sa.Date),
+    sa.column('status', sa.String),
+    sa.column('progress', sa.SmallInteger),
+    sa.column('extra', sa.JSON(none_as_null=True)),
+)
+
+KNOWN_KEYS = {"id", "description", "status", "targetDate", "progress"}
+
+
+def _goal_row(tenant_id, plan_id, ordinal, goal):
+    # Same mapping as TreatmentGoal.load at the time of this migration
+    if not isinstance(goal, dict):
+        goal = {"description": str(goal)}
+    extra = {k: v for k, v in goal.items() if k not in KNOWN_KEYS}
+    target = goal.get("targetDate")
+    try:
+        target_date = date.fromisoformat(target) if target else None
+    except (TypeError, ValueError):
+        target_date = None
+        extra["targetDate"] = target
+    progress = goal.get("progress")
+    if isinstance(progress, (int, float)) and not isinstance(progress, bool) and 0 <= progress <= 100:
+        progress = int(progress)
+    else:
+        if progress is not None:
+            extra["progress"] = progress
+        progress = None
+    return {
+        "tenant_id": tenant_id,
+        "plan_id": plan_id,
+        "ordinal": ordinal,
+        "goal_key": str(goal["id"]) if goal.get("id") is not None else None,
+        "text": str(goal.get("description") or extra.pop("goal", None) or ""),
+        "target_date": target_date,
+        "status": str(goal.get("status") or "in-progress")[:20],
+        "progress": progress,
+        "extra": extra or None,
+    }
+
+
+def upgrade():
+    op.create_table('treatment_goal',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('plan_id', sa.Integer(), nullable=False),
+    sa.Column('ordinal', sa.Integer(), nullable=False),
+    sa.Column('goal_key', sa.String(length=64), nullable=True),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('target_date', sa.Date(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('progress', sa.SmallInteger(), nullable=True),
+    sa.Column('extra', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['plan_id'], ['treatment_plan.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('plan_id', 'ordinal', name='uq_treatment_goal_plan_ordinal')
+    )
+    with op.batch_alter_table('treatment_goal', schema=None) as batch_op:
+        batch_op.create_index('ix_treatment_goal_tenant_status_target', ['tenant_id', 'status', 'target_date'], unique=False)
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        plans = bind.execute(
+            sa.select(treatment_plan.c.id, treatment_plan.c.tenant_id, treatment_plan.c.goals)
+            .where(treatment_plan.c.id > last_id)
+            .order_by(treatment_plan.c.id)
+            .limit(BATCH_PLANS)
+        ).all()
+        if not plans:
+            break
+        rows = []
+        for plan_id, tenant_id, goals in plans:
+            if isinstance(goals, dict):
+                goals = list(goals.values())
+            rows.extend(_goal_row(tenant_id, plan_id, i, goal) for i, goal in enumerate(goals or []))
+        if rows:
+            bind.execute(treatment_goal.insert(), rows)
+        last_id = plans[-1].id
+
+    with op.batch_alter_table('treatment_plan', schema=None) as batch_op:
+        batch_op.drop_column('goals')
+
+
+def downgrade():
+    with op.batch_alter_table('treatment_plan', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('goals', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    goals = {}
+    for row in bind.execute(sa.select(treatment_goal).order_by(treatment_goal.c.plan_id, treatment_goal.c.ordinal)):
+        d = {
+            "id": row.goal_key,
+            "description": row.text,
+            "status": row.status,
+            "targetDate": row.target_date.isoformat() if row.target_date else "",
+        }
+        if row.progress is not None:
+            d["progress"] = row.progress
+        d.update(row.extra or {})
+        goals.setdefault(row.plan_id, []).append(d)
+
+    for plan_id in bind.execute(sa.select(treatment_plan.c.id)).scalars().all():
+        bind.execute(
+            treatment_plan.update().where(treatment_plan.c.id == plan_id).values(goals=goals.get(plan_id, []))
+        )
+
+    with op.batch_alter_table('treatment_plan', schema=None) as batch_op:
+        batch_op.alter_column('goals', existing_type=sa.JSON(), nullable=False)
+
+    op.drop_table('treatment_goal')
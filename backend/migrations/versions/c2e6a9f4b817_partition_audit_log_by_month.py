@@ -0,0 +1,100 @@
+"""partition audit_log by month (postgres)
+
+Revision ID: c2e6a9f4b817
+Revises: 5b7d93e1c0a4
+Create Date: 2026-10-19 13:05:52.281446
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e6a9f4b817'
+down_revision = '5b7d93e1c0a4'
+branch_labels = None
+depends_on = None
+
+
+def _add_months(dt, n):
+    y, m = divmod(dt.month - 1 + n, 12)
+    return datetime(dt.year + y, m + 1, 1, tzinfo=timezone.utc)
+
+
+def upgrade():
+    # SQLite keeps audit_log as a plain table; archival falls back to batched deletes
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+    op.execute("ALTER INDEX ix_audit_log_tenant_id RENAME TO ix_audit_log_legacy_tenant_id")
+    op.execute("ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey")
+
+    # Partition key must be part of the primary key; id keeps using the existing sequence
+    op.execute("""
+        CREATE TABLE audit_log (
+            id integer NOT NULL DEFAULT nextval('audit_log_id_seq'),
+            tenant_id integer NOT NULL REFERENCES tenant (id),
+            "timestamp" timestamp with time zone NOT NULL,
+            user_id integer,
+            action varchar(80) NOT NULL,
+            resource varchar(120) NOT NULL,
+            ip_address varchar(45),
+            description varchar(255),
+            status varchar(20) NOT NULL,
+            CONSTRAINT audit_log_pkey PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    op.execute("CREATE INDEX ix_audit_log_tenant_id ON audit_log (tenant_id)")
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT")
+
+    # One partition per month from the oldest row through two months ahead
+    oldest = bind.execute(sa.text('SELECT min("timestamp") FROM audit_log_legacy')).scalar()
+    now = datetime.now(timezone.utc)
+    start = datetime((oldest or now).year, (oldest or now).month, 1, tzinfo=timezone.utc)
+    last = _add_months(datetime(now.year, now.month, 1, tzinfo=timezone.utc), 2)
+    while start <= last:
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE audit_log_{start:%Y_%m} PARTITION OF audit_log "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    op.execute(
+        'INSERT INTO audit_log (id, tenant_id, "timestamp", user_id, action, resource, ip_address, description, status) '
+        'SELECT id, tenant_id, "timestamp", user_id, action, resource, ip_address, description, status FROM audit_log_legacy'
+    )
+    op.execute("DROP TABLE audit_log_legacy")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_partitioned")
+    op.execute("ALTER INDEX ix_audit_log_tenant_id RENAME TO ix_audit_log_partitioned_tenant_id")
+    op.execute("ALTER TABLE audit_log_partitioned RENAME CONSTRAINT audit_log_pkey TO audit_log_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE audit_log (
+            id integer NOT NULL DEFAULT nextval('audit_log_id_seq'),
+            tenant_id integer NOT NULL REFERENCES tenant (id),
+            "timestamp" timestamp with time zone NOT NULL,
+            user_id integer,
+            action varchar(80) NOT NULL,
+            resource varchar(120) NOT NULL,
+            ip_address varchar(45),
+            description varchar(255),
+            status varchar(20) NOT NULL,
+            CONSTRAINT audit_log_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    op.execute("CREATE INDEX ix_audit_log_tenant_id ON audit_log (tenant_id)")
+    op.execute("INSERT INTO audit_log SELECT id, tenant_id, \"timestamp\", user_id, action, resource, ip_address, description, status FROM audit_log_partitioned")
+    op.execute("DROP TABLE audit_log_partitioned")
@@ -0,0 +1,53 @@
+"""add audit_log hash chain
+
+Revision ID: c3f8a1d6e924
+Revises: b6e1f9a3c2d7
+Create Date: 2026-10-19 18:41:07.215384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1d6e924'
+down_revision = 'b6e1f9a3c2d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows are left unhashed; each tenant's chain starts with its next entry
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('entry_hash', sa.LargeBinary(length=32), nullable=True))
+
+    op.create_table('audit_chain_head',
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=True),
+    sa.Column('last_hash', sa.LargeBinary(length=32), nullable=False),
+    sa.Column('entries', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ),
+    sa.PrimaryKeyConstraint('tenant_id')
+    )
+    op.create_table('audit_chain_checkpoint',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.Column('entry_hash', sa.LargeBinary(length=32), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenant.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('audit_chain_checkpoint', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_chain_checkpoint_tenant_last_id', ['tenant_id', 'last_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_chain_checkpoint', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_chain_checkpoint_tenant_last_id')
+
+    op.drop_table('audit_chain_checkpoint')
+    op.drop_table('audit_chain_head')
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.drop_column('entry_hash')
@@ -0,0 +1,30 @@
+"""add user last_login / last_seen and role index
+
+Revision ID: c5a8e1f3b927
+Revises: b9e3a6d1f742
+Create Date: 2026-10-19 21:48:03.290417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a8e1f3b927'
+down_revision = 'b9e3a6d1f742'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_login', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('last_seen', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index('ix_user_tenant_role', ['tenant_id', 'role'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_tenant_role')
+        batch_op.drop_column('last_seen')
+        batch_op.drop_column('last_login')
@@ -0,0 +1,34 @@
+"""index lower(resource_key) for case-insensitive resource prefix search
+
+Revision ID: d3f7b1a9c642
+Revises: c5a8e1f3b927
+Create Date: 2026-10-20 10:12:37.504118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f7b1a9c642'
+down_revision = 'c5a8e1f3b927'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # resource_contains=patient/pt-0 matches resource_type = patient AND lower(resource_key) LIKE 'pt-0%'.
+    # ix_audit_log_tenant_resource stays case-sensitive for the exact patient access history lookup.
+    # SQLite's LIKE ignores case already and can't use either index for it.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        "CREATE INDEX ix_audit_log_tenant_resource_lower ON audit_log "
+        "(tenant_id, resource_type, lower(resource_key) varchar_pattern_ops)"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index('ix_audit_log_tenant_resource_lower', table_name='audit_log')
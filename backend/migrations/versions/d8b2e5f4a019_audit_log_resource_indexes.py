@@ -0,0 +1,32 @@
+"""index audit_log resource lookups
+
+Revision ID: d8b2e5f4a019
+Revises: c3f8a1d6e924
+Create Date: 2026-10-19 19:03:44.518206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b2e5f4a019'
+down_revision = 'c3f8a1d6e924'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # resource_type/resource_key are split at write time (f7c3d2a18e65); this makes them searchable
+    op.create_index('ix_audit_log_tenant_resource', 'audit_log', ['tenant_id', 'resource_type', 'resource_key'], unique=False)
+
+    # Free-text resource_contains: trigram index, serves ILIKE '%term%' and 'term%'
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_audit_log_resource_key_trgm ON audit_log USING gin (resource_key gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_audit_log_resource_key_trgm")
+    op.drop_index('ix_audit_log_tenant_resource', table_name='audit_log')
@@ -0,0 +1,34 @@
+"""let the audit_log resource index serve key prefix lookups
+
+Revision ID: e2a7c4b9d136
+Revises: d8b2e5f4a019
+Create Date: 2026-10-19 19:37:12.904551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c4b9d136'
+down_revision = 'd8b2e5f4a019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Patient access history matches resource_key = 'PT-001' OR LIKE 'PT-001/%'; with the
+    # default collation Postgres can only use a btree for the prefix under varchar_pattern_ops.
+    # SQLite keeps the plain index.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index('ix_audit_log_tenant_resource', table_name='audit_log')
+    op.create_index('ix_audit_log_tenant_resource', 'audit_log', ['tenant_id', 'resource_type', 'resource_key'], unique=False,
+                    postgresql_ops={'resource_key': 'varchar_pattern_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index('ix_audit_log_tenant_resource', table_name='audit_log')
+    op.create_index('ix_audit_log_tenant_resource', 'audit_log', ['tenant_id', 'resource_type', 'resource_key'], unique=False)
@@ -0,0 +1,33 @@
+"""add composite audit_log indexes for the audit endpoints
+
+Revision ID: e4a1b6c93d58
+Revises: c2e6a9f4b817
+Create Date: 2026-10-19 14:21:09.662310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a1b6c93d58'
+down_revision = 'c2e6a9f4b817'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Created on the parent so every monthly partition gets a matching index
+    op.create_index('ix_audit_log_tenant_id_desc', 'audit_log', ['tenant_id', sa.text('id DESC')], unique=False)
+    op.create_index('ix_audit_log_tenant_timestamp', 'audit_log', ['tenant_id', 'timestamp'], unique=False)
+    op.create_index('ix_audit_log_tenant_action_status_ts', 'audit_log', ['tenant_id', 'action', 'status', 'timestamp'], unique=False)
+
+    # Every query above leads with tenant_id, so the single-column index is redundant
+    op.drop_index('ix_audit_log_tenant_id', table_name='audit_log')
+
+
+def downgrade():
+    op.create_index('ix_audit_log_tenant_id', 'audit_log', ['tenant_id'], unique=False)
+    op.drop_index('ix_audit_log_tenant_action_status_ts', table_name='audit_log')
+    op.drop_index('ix_audit_log_tenant_timestamp', table_name='audit_log')
+    op.drop_index('ix_audit_log_tenant_id_desc', table_name='audit_log')
@@ -0,0 +1,29 @@
+"""store unscored form template versions with SQL NULL scoring
+
+Revision ID: e8b4c2d7a153
+Revises: d3f7b1a9c642
+Create Date: 2026-10-20 11:04:52.731940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b4c2d7a153'
+down_revision = 'd3f7b1a9c642'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 8c41e07b5a2f's backfill wrote JSON 'null' for unscored templates; the model and
+    # scoring.backfill_form_scores' scoring IS NOT NULL filter expect SQL NULL
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("UPDATE form_template_version SET scoring = NULL WHERE scoring::text = 'null'")
+    else:
+        op.execute("UPDATE form_template_version SET scoring = NULL WHERE scoring = 'null'")
+
+
+def downgrade():
+    pass
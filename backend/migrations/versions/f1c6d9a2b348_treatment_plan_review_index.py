@@ -0,0 +1,29 @@
+"""add treatment_plan review worklist index
+
+Revision ID: f1c6d9a2b348
+Revises: e2a7c4b9d136
+Create Date: 2026-10-19 20:02:26.117830
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6d9a2b348'
+down_revision = 'e2a7c4b9d136'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('treatment_plan', schema=None) as batch_op:
+        batch_op.create_index('ix_treatment_plan_tenant_status_review', ['tenant_id', 'status', 'review_date'], unique=False)
+        # Leads with tenant_id, so the single-column index is redundant
+        batch_op.drop_index('ix_treatment_plan_tenant_id')
+
+
+def downgrade():
+    with op.batch_alter_table('treatment_plan', schema=None) as batch_op:
+        batch_op.create_index('ix_treatment_plan_tenant_id', ['tenant_id'], unique=False)
+        batch_op.drop_index('ix_treatment_plan_tenant_status_review')
@@ -0,0 +1,299 @@
+"""compact audit_log storage: coded action/status/resource, inet ip, message params
+
+Revision ID: f7c3d2a18e65
+Revises: e4a1b6c93d58
+Create Date: 2026-10-19 16:02:44.118230
+
+"""
+import ipaddress
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c3d2a18e65'
+down_revision = 'e4a1b6c93d58'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copies of the catalogs in services/audit_codes.py at this revision
+ACTIONS = {
+    "UNKNOWN": 0, "SEED": 1, "LOGIN": 2, "LOGOUT": 3, "ACCESS_403": 4,
+    "USER_CREATE": 5, "USER_UPDATE": 6, "USER_LOCK": 7, "USER_UNLOCK": 8, "USER_RESET_PASSWORD": 9,
+    "PATIENT_GET": 10, "PATIENT_CREATE": 11, "PATIENT_UPDATE": 12,
+    "TREATMENTPLAN_GET": 13, "TREATMENTPLAN_UPSERT": 14,
+    "TEMPLATE_GET": 15, "TEMPLATE_CREATE": 16, "TEMPLATE_UPDATE": 17,
+    "FORM_BULK_ASSIGN": 18, "FORM_LIST": 19, "FORM_GET": 20, "FORM_CREATE": 21,
+    "FORM_UPDATE": 22, "FORM_SIGN": 23, "FORM_DELETE": 24, "AUDIT_EXPORT": 25,
+}
+STATUSES = {"SUCCESS": 0, "FAILED": 1}
+RESOURCE_TYPES = {
+    "other": 0, "database": 1, "auth": 2, "user": 3, "users": 4,
+    "patient": 5, "template": 6, "templates": 7, "audit": 8,
+}
+
+INDEX = 'ix_audit_log_tenant_action_status_ts'
+
+
+def _case(expr, mapping, default):
+    whens = " ".join(f"WHEN '{k}' THEN {v}" for k, v in mapping.items())
+    return f"CASE {expr} {whens} ELSE {default} END"
+
+
+def _case_reverse(expr, mapping):
+    whens = " ".join(f"WHEN {v} THEN '{k}'" for k, v in mapping.items())
+    return f"CASE {expr} {whens} END"
+
+
+def _split_resource(resource):
+    head, _, rest = (resource or "").partition("/")
+    if head in RESOURCE_TYPES and head != "other":
+        return RESOURCE_TYPES[head], rest or None
+    return 0, resource
+
+
+def _pack_ip(value):
+    try:
+        return ipaddress.ip_address((value or "").strip()).packed
+    except ValueError:
+        return None
+
+
+def _legacy_params(action, description):
+    params = {}
+    if description:
+        params["text"] = description
+    if action not in ACTIONS:
+        params["legacy_action"] = action
+    return params or None
+
+
+BATCH_SIZE = 5000
+
+LEGACY_COLUMNS = """
+    action varchar(80) NOT NULL,
+    resource varchar(120) NOT NULL,
+    ip_address varchar(45),
+    description varchar(255),
+    status varchar(20) NOT NULL
+"""
+COMPACT_COLUMNS = """
+    action smallint NOT NULL,
+    resource_type smallint NOT NULL,
+    resource_key varchar(120),
+    ip_address inet,
+    message smallint,
+    params json,
+    status smallint NOT NULL
+"""
+
+
+def upgrade():
+    bind = op.get_bind()
+    op.drop_index(INDEX, table_name='audit_log')
+
+    if bind.dialect.name == "postgresql":
+        _upgrade_postgres(bind)
+    else:
+        _upgrade_generic(bind)
+
+    op.create_index(INDEX, 'audit_log', ['tenant_id', 'action', 'status', 'timestamp'], unique=False)
+
+
+def _rebuild_postgres(bind, columns, select):
+    """
+    Copies audit_log into a freshly created partitioned table with the given
+    columns and swaps it in, the same way c2e6a9f4b817 partitioned it.
+    Rewriting the live table in place would leave a dead tuple behind for
+    every row; the copy writes each row once and the old table is dropped
+    whole. audit_log is locked for the duration of the copy, so run this
+    in a maintenance window on large tenants.
+    """
+    partitions = bind.execute(sa.text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'audit_log' ORDER BY c.relname"
+    )).all()
+
+    # Secondary indexes are rebuilt after the copy; dropping the parent index drops the partitions' copies
+    op.drop_index('ix_audit_log_tenant_id_desc', table_name='audit_log')
+    op.drop_index('ix_audit_log_tenant_timestamp', table_name='audit_log')
+    op.execute("ALTER TABLE audit_log RENAME TO audit_log_legacy")
+    op.execute("ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey")
+    for name, _ in partitions:
+        op.execute(f'ALTER TABLE "{name}" RENAME TO "{name}_legacy"')
+        op.execute(f'ALTER INDEX IF EXISTS "{name}_pkey" RENAME TO "{name}_legacy_pkey"')
+
+    op.execute(f"""
+        CREATE TABLE audit_log (
+            id integer NOT NULL DEFAULT nextval('audit_log_id_seq'),
+            tenant_id integer NOT NULL REFERENCES tenant (id),
+            "timestamp" timestamp with time zone NOT NULL,
+            user_id integer,
+            {columns.strip()},
+            CONSTRAINT audit_log_pkey PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    for name, bound in partitions:
+        op.execute(f'CREATE TABLE "{name}" PARTITION OF audit_log {bound}')
+
+    op.execute(f'INSERT INTO audit_log SELECT id, tenant_id, "timestamp", user_id, {select} FROM audit_log_legacy')
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id")
+    op.execute("DROP TABLE audit_log_legacy")
+
+    op.create_index('ix_audit_log_tenant_id_desc', 'audit_log', ['tenant_id', sa.text('id DESC')], unique=False)
+    op.create_index('ix_audit_log_tenant_timestamp', 'audit_log', ['tenant_id', 'timestamp'], unique=False)
+
+
+def _batched(bind, table, columns, convert):
+    """Rewrites table in id order, BATCH_SIZE rows per SELECT and executemany UPDATE."""
+    update = table.update().where(table.c.id == sa.bindparam('_id'))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, *columns).where(table.c.id > last_id).order_by(table.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        bind.execute(update, [{"_id": row.id, **convert(row)} for row in rows])
+        last_id = rows[-1].id
+
+
+def _upgrade_postgres(bind):
+    op.execute("""
+        CREATE FUNCTION pg_temp.try_inet(v text) RETURNS inet AS $$
+        BEGIN
+            RETURN NULLIF(btrim(v), '')::inet;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+    """)
+
+    head = "split_part(resource, '/', 1)"
+    known_heads = ", ".join(f"'{k}'" for k in RESOURCE_TYPES if k != "other")
+    known_actions = ", ".join(f"'{k}'" for k in ACTIONS)
+    _rebuild_postgres(bind, COMPACT_COLUMNS, f"""
+        {_case('action', ACTIONS, 0)},
+        CASE WHEN {head} IN ({known_heads}) THEN {_case(head, RESOURCE_TYPES, 0)} ELSE 0 END,
+        CASE WHEN {head} IN ({known_heads}) THEN NULLIF(substr(resource, length({head}) + 2), '') ELSE resource END,
+        pg_temp.try_inet(ip_address),
+        NULL,
+        CASE WHEN description IS NULL AND action IN ({known_actions}) THEN NULL
+             ELSE json_strip_nulls(json_build_object(
+                 'text', description,
+                 'legacy_action', CASE WHEN action NOT IN ({known_actions}) THEN action END))
+        END,
+        {_case('status', STATUSES, STATUSES['FAILED'])}
+    """)
+
+
+def _upgrade_generic(bind):
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('action_code', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('status_code', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('resource_type', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('resource_key', sa.String(length=120), nullable=True))
+        batch_op.add_column(sa.Column('ip', sa.LargeBinary(length=16), nullable=True))
+        batch_op.add_column(sa.Column('message', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('params', sa.JSON(), nullable=True))
+
+    audit = sa.table(
+        'audit_log',
+        sa.column('id', sa.Integer), sa.column('action', sa.String), sa.column('status', sa.String),
+        sa.column('resource', sa.String), sa.column('description', sa.String), sa.column('ip_address', sa.String),
+        sa.column('action_code', sa.SmallInteger), sa.column('status_code', sa.SmallInteger),
+        sa.column('resource_type', sa.SmallInteger), sa.column('resource_key', sa.String),
+        sa.column('ip', sa.LargeBinary), sa.column('params', sa.JSON(none_as_null=True)),
+    )
+
+    def convert(row):
+        resource_type, resource_key = _split_resource(row.resource)
+        return {
+            "action_code": ACTIONS.get(row.action, 0),
+            "status_code": STATUSES.get(row.status, STATUSES["FAILED"]),
+            "resource_type": resource_type,
+            "resource_key": resource_key,
+            "ip": _pack_ip(row.ip_address),
+            "params": _legacy_params(row.action, row.description),
+        }
+
+    _batched(bind, audit, [audit.c.action, audit.c.status, audit.c.resource, audit.c.description, audit.c.ip_address], convert)
+
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        for name in ('action', 'status', 'resource', 'description', 'ip_address'):
+            batch_op.drop_column(name)
+        batch_op.alter_column('action_code', new_column_name='action', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.alter_column('status_code', new_column_name='status', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.alter_column('resource_type', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.alter_column('ip', new_column_name='ip_address', existing_type=sa.LargeBinary(length=16))
+
+
+def downgrade():
+    # Catalog messages can't be re-rendered in SQL; only free-text descriptions survive a downgrade
+    bind = op.get_bind()
+    op.drop_index(INDEX, table_name='audit_log')
+
+    if bind.dialect.name == "postgresql":
+        type_name = _case_reverse('resource_type', {k: v for k, v in RESOURCE_TYPES.items() if k != "other"})
+        _rebuild_postgres(bind, LEGACY_COLUMNS, f"""
+            COALESCE(params->>'legacy_action', {_case_reverse('action', ACTIONS)}, 'UNKNOWN'),
+            CASE WHEN resource_type = 0 THEN COALESCE(resource_key, '')
+                 WHEN resource_key IS NULL THEN {type_name}
+                 ELSE {type_name} || '/' || resource_key END,
+            host(ip_address),
+            left(params->>'text', 255),
+            COALESCE({_case_reverse('status', STATUSES)}, 'FAILED')
+        """)
+    else:
+        with op.batch_alter_table('audit_log', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('action_s', sa.String(length=80), nullable=True))
+            batch_op.add_column(sa.Column('status_s', sa.String(length=20), nullable=True))
+            batch_op.add_column(sa.Column('resource', sa.String(length=120), nullable=True))
+            batch_op.add_column(sa.Column('description', sa.String(length=255), nullable=True))
+            batch_op.add_column(sa.Column('ip_s', sa.String(length=45), nullable=True))
+
+        audit = sa.table(
+            'audit_log',
+            sa.column('id', sa.Integer), sa.column('action', sa.SmallInteger), sa.column('status', sa.SmallInteger),
+            sa.column('resource_type', sa.SmallInteger), sa.column('resource_key', sa.String),
+            sa.column('ip_address', sa.LargeBinary), sa.column('params', sa.JSON),
+            sa.column('action_s', sa.String), sa.column('status_s', sa.String), sa.column('resource', sa.String),
+            sa.column('description', sa.String), sa.column('ip_s', sa.String),
+        )
+        actions = {v: k for k, v in ACTIONS.items()}
+        statuses = {v: k for k, v in STATUSES.items()}
+        types = {v: k for k, v in RESOURCE_TYPES.items()}
+
+        def convert(row):
+            params = row.params or {}
+            type_name = types.get(row.resource_type, "other")
+            if type_name == "other":
+                resource = row.resource_key or ""
+            else:
+                resource = f"{type_name}/{row.resource_key}" if row.resource_key else type_name
+            return {
+                "action_s": params.get("legacy_action") or actions.get(row.action, "UNKNOWN"),
+                "status_s": statuses.get(row.status, "FAILED"),
+                "resource": resource,
+                "description": (params.get("text") or None) and params["text"][:255],
+                "ip_s": str(ipaddress.ip_address(bytes(row.ip_address))) if row.ip_address else None,
+            }
+
+        _batched(bind, audit, [
+            audit.c.action, audit.c.status, audit.c.resource_type, audit.c.resource_key,
+            audit.c.ip_address, audit.c.params,
+        ], convert)
+
+        with op.batch_alter_table('audit_log', schema=None) as batch_op:
+            for name in ('action', 'status', 'resource_type', 'resource_key', 'ip_address', 'message', 'params'):
+                batch_op.drop_column(name)
+            batch_op.alter_column('action_s', new_column_name='action', existing_type=sa.String(length=80), nullable=False)
+            batch_op.alter_column('status_s', new_column_name='status', existing_type=sa.String(length=20), nullable=False)
+            batch_op.alter_column('resource', existing_type=sa.String(length=120), nullable=False)
+            batch_op.alter_column('ip_s', new_column_name='ip_address', existing_type=sa.String(length=45))
+
+    op.create_index(INDEX, 'audit_log', ['tenant_id', 'action', 'status', 'timestamp'], unique=False)
@@ -1,5 +1,12 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from sqlalchemy import case
+from sqlalchemy.ext.hybrid import hybrid_property
 from extensions import db
+from db_types import CodeEnum, IPAddress
+from services.audit_codes import (
+    ACTIONS, MESSAGE_CODES, RESOURCE_TYPES, STATUSES,
+    format_resource, parse_resource, render_description,
+)
 
 class User(db.Model):
     __tablename__ = "user"
@@ -16,7 +23,15 @@ class User(db.Model):
     failed_login_attempts = db.Column(db.Integer, default=0, nullable=False)
     locked_until = db.Column(db.DateTime(timezone=True), nullable=True)
     permanently_locked = db.Column(db.Boolean, default=False, nullable=False)
-    __table_args__ = (db.UniqueConstraint("tenant_id", "username", name="uq_tenant_username"),)
+
+    last_login = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Last authenticated request, written at most every USER_LAST_SEEN_INTERVAL_SECONDS
+    last_seen = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("tenant_id", "username", name="uq_tenant_username"),
+        db.Index("ix_user_tenant_role", "tenant_id", "role"),
+    )
 
 class Tenant(db.Model):
     __tablename__ = "tenant"
@@ -25,6 +40,7 @@ class Tenant(db.Model):
     name = db.Column(db.String(200), nullable=False)
     slug = db.Column(db.String(80), unique=True, nullable=False)  # url-friendly identifier e.g. "sunrise-detox"
     status = db.Column(db.String(20), nullable=False, default="active")  # active/suspended
+    audit_retention_days = db.Column(db.Integer, nullable=True)  # None -> config.AUDIT_RETENTION_DAYS
     created_at = db.Column(
         db.DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -99,7 +115,7 @@ class AuditLog(db.Model):
     __tablename__ = "audit_log"
 
     id = db.Column(db.Integer, primary_key=True)
-    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False, index=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False)
     timestamp = db.Column(db.DateTime(timezone=True),
     default=lambda: datetime.now(timezone.utc),
     nullable=False
@@ -107,32 +123,132 @@ class AuditLog(db.Model):
 
 
     user_id = db.Column(db.Integer, nullable=True)
-    action = db.Column(db.String(80), nullable=False)
-    resource = db.Column(db.String(120), nullable=False)
-    ip_address = db.Column(db.String(45), nullable=True)
-    description = db.Column(db.String(255), nullable=True)
+    # Actor as of the event, so reads don't join user and renames don't rewrite history
+    actor_username = db.Column(db.String(80), nullable=True)
+    actor_role = db.Column(db.String(30), nullable=True)
+    action = db.Column(CodeEnum(ACTIONS), nullable=False)
+    resource_type = db.Column(CodeEnum(RESOURCE_TYPES), nullable=False)
+    resource_key = db.Column(db.String(120), nullable=True)
+    ip_address = db.Column(IPAddress(), nullable=True)
+
+    # Description is rendered from a catalog message and its params on read (services/audit_codes.py)
+    message = db.Column(CodeEnum(MESSAGE_CODES), nullable=True)
+    params = db.Column(db.JSON(none_as_null=True), nullable=True)
 
     #success or fail
-    status = db.Column(db.String(20), nullable=False)  
+    status = db.Column(CodeEnum(STATUSES), nullable=False)
+
+    # sha256(previous entry's hash + this entry), chained per tenant (services/audit_chain.py)
+    entry_hash = db.Column(db.LargeBinary(32), nullable=True)
+
+    @hybrid_property
+    def resource(self):
+        return format_resource(self.resource_type, self.resource_key)
+
+    @resource.inplace.setter
+    def _resource_setter(self, value):
+        self.resource_type, self.resource_key = parse_resource(value)
+
+    @resource.inplace.expression
+    @classmethod
+    def _resource_expression(cls):
+        type_name = case(
+            *[(cls.resource_type == name, name) for name in RESOURCE_TYPES if name != "other"],
+            else_=None,
+        )
+        return case(
+            (type_name.is_(None), cls.resource_key),
+            (cls.resource_key.is_(None), type_name),
+            else_=type_name + "/" + cls.resource_key,
+        )
+
+    @property
+    def description(self):
+        return render_description(self.message, self.params)
+
+    # Shaped by the /api/audit queries: newest-first paging, date ranges, action/status filters,
+    # resource lookups (type + key prefix) and free-text resource_contains (trigram, Postgres only)
+    __table_args__ = (
+        db.Index("ix_audit_log_tenant_id_desc", "tenant_id", id.desc()),
+        db.Index("ix_audit_log_tenant_timestamp", "tenant_id", "timestamp"),
+        db.Index("ix_audit_log_tenant_action_status_ts", "tenant_id", "action", "status", "timestamp"),
+        db.Index(
+            "ix_audit_log_tenant_resource", "tenant_id", "resource_type", "resource_key",
+            postgresql_ops={"resource_key": "varchar_pattern_ops"},  # also serves key LIKE 'PT-001/%'
+        ),
+        db.Index(
+            "ix_audit_log_resource_key_trgm",
+            "resource_key",
+            postgresql_using="gin",
+            postgresql_ops={"resource_key": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class AuditChainHead(db.Model):
+    __tablename__ = "audit_chain_head"
+
+    # Latest link of each tenant's audit hash chain; locked by log_access while appending
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=True)
+    last_hash = db.Column(db.LargeBinary(32), nullable=False)
+    entries = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class AuditChainCheckpoint(db.Model):
+    __tablename__ = "audit_chain_checkpoint"
+
+    # Known-good chain positions; the verifier checks the stretches between them in parallel
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False)
+    last_id = db.Column(db.Integer, nullable=False)
+    entry_hash = db.Column(db.LargeBinary(32), nullable=False)
+    kind = db.Column(db.String(20), nullable=False, default="periodic")  # periodic / anchor (before a purge or archive)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    __table_args__ = (db.Index("ix_audit_chain_checkpoint_tenant_last_id", "tenant_id", "last_id"),)
+
+
+class AuditRollupHourly(db.Model):
+    __tablename__ = "audit_rollup_hourly"
+
+    # Per-tenant hourly counters by (action, status), maintained by log_access
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False)
+    hour = db.Column(db.DateTime(timezone=True), nullable=False)  # UTC, truncated to the hour
+    action = db.Column(db.String(80), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint("tenant_id", "hour", "action", "status", name="uq_audit_rollup_bucket"),)
 
 
 class TreatmentPlan(db.Model):
     __tablename__ = "treatment_plan"
 
     id = db.Column(db.Integer, primary_key=True)
-    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False, index=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False)
 
     patient_id = db.Column(db.Integer, db.ForeignKey("patient.id"), nullable=False, index=True, unique=True)
 
     start_date = db.Column(db.Date, nullable=True)
     review_date = db.Column(db.Date, nullable=True)
 
-    #JSON goals list/object
-    goals = db.Column(db.JSON, nullable=False, default=list)
+    # Goals live in treatment_goal rows; .goals reads/writes them in the JSON API shape
+    goal_items = db.relationship(
+        "TreatmentGoal", order_by="TreatmentGoal.ordinal", cascade="all, delete-orphan", back_populates="plan",
+    )
 
     #active/archived
     status = db.Column(db.String(20), nullable=False, default="active")
 
+    # Latest TreatmentPlanRevision.version (0 until the plan is first saved with history)
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     updated_at = db.Column(
         db.DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -140,6 +256,117 @@ class TreatmentPlan(db.Model):
         nullable=False
     )
 
+    # Review worklist: status filter + review_date range/order within a tenant
+    __table_args__ = (
+        db.Index("ix_treatment_plan_tenant_status_review", "tenant_id", "status", "review_date"),
+    )
+
+    @property
+    def goals(self) -> list[dict]:
+        return [item.to_dict() for item in self.goal_items]
+
+    @goals.setter
+    def goals(self, value):
+        # Update rows in place by position, so an edit to one goal touches one row.
+        # Set tenant_id before goals when constructing a plan.
+        items = list(self.goal_items)
+        for ordinal, goal in enumerate(value or []):
+            if ordinal < len(items):
+                items[ordinal].load(goal)
+            else:
+                item = TreatmentGoal(tenant_id=self.tenant_id, ordinal=ordinal)
+                item.load(goal)
+                items.append(item)
+        self.goal_items = items[:len(value or [])]
+
+
+class TreatmentGoal(db.Model):
+    __tablename__ = "treatment_goal"
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False)
+    plan_id = db.Column(db.Integer, db.ForeignKey("treatment_plan.id"), nullable=False)
+    ordinal = db.Column(db.Integer, nullable=False)  # position in the plan's goal list
+
+    goal_key = db.Column(db.String(64), nullable=True)  # client-side goal id ("goal-1")
+    text = db.Column(db.Text, nullable=False, default="")
+    target_date = db.Column(db.Date, nullable=True)
+    #in-progress/partially-met/met/not-met
+    status = db.Column(db.String(20), nullable=False, default="in-progress")
+    progress = db.Column(db.SmallInteger, nullable=True)  # percent, when tracked
+    # Any other keys the client sent (and non-date targetDate values), returned as-is
+    extra = db.Column(db.JSON(none_as_null=True), nullable=True)
+
+    plan = db.relationship("TreatmentPlan", back_populates="goal_items")
+
+    # Tenant-wide goal reporting (status counts, overdue targets) and per-plan ordering
+    __table_args__ = (
+        db.UniqueConstraint("plan_id", "ordinal", name="uq_treatment_goal_plan_ordinal"),
+        db.Index("ix_treatment_goal_tenant_status_target", "tenant_id", "status", "target_date"),
+    )
+
+    KNOWN_KEYS = {"id", "description", "status", "targetDate", "progress"}
+
+    def load(self, goal: dict) -> None:
+        """Sets the columns from one goal in the API shape."""
+        extra = {k: v for k, v in goal.items() if k not in self.KNOWN_KEYS}
+        self.goal_key = str(goal["id"]) if goal.get("id") is not None else None
+        # "goal" is the pre-normalization name for the description
+        self.text = str(goal.get("description") or extra.pop("goal", None) or "")
+        self.status = str(goal.get("status") or "in-progress")[:20]
+
+        target = goal.get("targetDate")
+        try:
+            self.target_date = date.fromisoformat(target) if target else None
+        except (TypeError, ValueError):
+            self.target_date = None
+            extra["targetDate"] = target
+
+        progress = goal.get("progress")
+        if isinstance(progress, (int, float)) and not isinstance(progress, bool) and 0 <= progress <= 100:
+            self.progress = int(progress)
+        else:
+            self.progress = None
+            if progress is not None:
+                extra["progress"] = progress
+
+        self.extra = extra or None
+
+    def to_dict(self) -> dict:
+        d = {
+            "id": self.goal_key,
+            "description": self.text,
+            "status": self.status,
+            "targetDate": self.target_date.isoformat() if self.target_date else "",
+        }
+        if self.progress is not None:
+            d["progress"] = self.progress
+        d.update(self.extra or {})
+        return d
+
+
+class TreatmentPlanRevision(db.Model):
+    __tablename__ = "treatment_plan_revision"
+
+    # Never updated. kind "snapshot" stores the whole plan document, "delta" the changes
+    # from the previous version (services/plan_revisions.py)
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False)
+    plan_id = db.Column(db.Integer, db.ForeignKey("treatment_plan.id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(10), nullable=False)
+    data = db.Column(db.JSON, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint("plan_id", "version", name="uq_treatment_plan_revision_plan_version"),
+    )
+
 
 class FormTemplate(db.Model):
     __tablename__ = "form_template"
@@ -154,11 +381,18 @@ class FormTemplate(db.Model):
     # types: text, textarea, number, date, checkbox, checkbox_group, select, scale, signature
     fields = db.Column(db.JSON, nullable=False, default=list)
 
+    # JSON object: {method: sum|mean, fields?: [labels], bands?: [{min, max, label}]}
+    # fields defaults to every scale field; null means the template is not scored
+    scoring = db.Column(db.JSON(none_as_null=True), nullable=True)
+
     # JSON array of role strings that can view forms created from this template
     allowed_roles = db.Column(db.JSON, nullable=False, default=lambda: ["admin", "psychiatrist", "technician"])
 
     status = db.Column(db.String(20), nullable=False, default="active")  # active/archived
 
+    # Immutable snapshot of fields + scoring that new forms are filled against
+    current_version_id = db.Column(db.Integer, db.ForeignKey("form_template_version.id"), nullable=True)
+
     created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     created_at = db.Column(
         db.DateTime(timezone=True),
@@ -173,19 +407,44 @@ class FormTemplate(db.Model):
     )
 
 
+class FormTemplateVersion(db.Model):
+    __tablename__ = "form_template_version"
+
+    # Content-addressed and never updated: identical fields/scoring share one row across tenants
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)  # sha256 of canonical JSON
+    fields = db.Column(db.JSON, nullable=False, default=list)
+    scoring = db.Column(db.JSON(none_as_null=True), nullable=True)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
 class PatientForm(db.Model):
     __tablename__ = "patient_form"
+    __table_args__ = (
+        db.Index("ix_patient_form_tenant_template_score", "tenant_id", "template_id", "score"),
+        db.Index("ix_patient_form_tenant_severity", "tenant_id", "severity"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey("tenant.id"), nullable=False, index=True)
     patient_id = db.Column(db.Integer, db.ForeignKey("patient.id"), nullable=False, index=True)
     template_id = db.Column(db.Integer, db.ForeignKey("form_template.id"), nullable=False, index=True)
+    # Template version the form was filled against
+    template_version_id = db.Column(db.Integer, db.ForeignKey("form_template_version.id"), nullable=True, index=True)
 
     # JSON object: {field_label: value}
     form_data = db.Column(db.JSON, nullable=False, default=dict)
 
     status = db.Column(db.String(20), nullable=False, default="draft")  # draft/completed
 
+    # Materialized from the template's scoring rules whenever the form is saved
+    score = db.Column(db.Float, nullable=True)
+    severity = db.Column(db.String(40), nullable=True)
+
     filled_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     created_at = db.Column(
         db.DateTime(timezone=True),
@@ -1,15 +1,44 @@
 # Used for audit logs
+import csv
+import io
+import json
+import time
+import zlib
+from collections import deque
 from datetime import datetime, timezone, date, timedelta
-from flask import Blueprint, request, g
+from itertools import islice
+from types import SimpleNamespace
+from flask import Blueprint, Response, current_app, request, g, stream_with_context
+from sqlalchemy import and_, func, or_, select
 
+import config
 from auth_middleware import require_auth
 from models import AuditLog, UserSession, User
 from services.audit_logger import log_access
 from extensions import db
-from services.helpers import client_ip, tenant_query
+from services.helpers import client_ip, get_patient_by_id_or_code, tenant_query
+from services.ttl_cache import TTLCache
+from services.audit_rollup import rollup_counts, rollup_series
+from services.audit_archive import iter_archived
+from services.audit_codes import RESOURCE_TYPES, format_resource, render_description
+from services.audit_stream import audit_hub, snapshot
+from services.db_engine import statement_timeout
 
 audit_bp = Blueprint("audit", __name__, url_prefix="/api/audit")
 
+STATS_ACTIONS = ("LOGIN", "ACCESS_401", "ACCESS_403", "ACCESS_500")
+
+COUNT_MODES = {"exact", "estimated", "capped", "none"}
+
+# exact totals per (tenant, filter set); short TTL so new entries show up quickly
+_count_cache = TTLCache(ttl_seconds=config.AUDIT_COUNT_CACHE_SECONDS)
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_BATCH_ROWS = 1000
+EXPORT_FILTER_ARGS = ("action", "status", "user_id", "resource_contains", "date_from", "date_to")
+STREAM_FILTER_ARGS = ("action", "status", "user_id", "resource_contains")
+EXPORT_CSV_HEADER = ["ID", "Timestamp", "User ID", "Username", "Role", "Action", "Resource", "IP Address", "Status", "Description"]
+
 
 
 def _parse_date(value):
@@ -26,32 +55,23 @@ def _parse_date(value):
 
 
 
-@audit_bp.get("/logs")
-@require_auth(roles=["admin"])
-def get_audit_logs():
-
-    user_id = request.args.get("user_id")
-    action = (request.args.get("action") or "").strip()
-    status = (request.args.get("status") or "").strip()
-    date_from = request.args.get("date_from")
-    date_to = request.args.get("date_to")
-    limit = request.args.get("limit", "200")
-    before_id = request.args.get("before_id")
-    resource_contains = (request.args.get("resource_contains") or "").strip()
-
-    try:
-        limit = min(int(limit), 500)
-    except ValueError:
-        limit = 200
+def _apply_log_filters(q, args):
+    """
+    Applies the shared /logs and /export filter set from query args.
+    Returns (query, error_message); error_message is None when all filters parsed.
+    """
+    user_id = args.get("user_id")
+    action = (args.get("action") or "").strip()
+    status = (args.get("status") or "").strip()
+    resource_contains = (args.get("resource_contains") or "").strip()
 
-    q = db.session.query(AuditLog, User.username).outerjoin(User, User.id == AuditLog.user_id).filter(AuditLog.tenant_id == g.tenant_id)
+    q = q.filter(AuditLog.tenant_id == g.tenant_id)
 
     if user_id:
         try:
             q = q.filter(AuditLog.user_id == int(user_id))
         except ValueError:
-            return {"error": "user_id must be an integer"}, 400
-        
+            return q, "user_id must be an integer"
 
     if action:
         q = q.filter(AuditLog.action == action)
@@ -60,13 +80,13 @@ def get_audit_logs():
         q = q.filter(AuditLog.status == status)
 
     if resource_contains:
-        q = q.filter(AuditLog.resource.ilike(f"%{resource_contains}%"))
+        q = q.filter(_resource_condition(resource_contains))
 
-    dt_from = _parse_date(date_from)
-    dt_to = _parse_date(date_to)
+    dt_from = _parse_date(args.get("date_from"))
+    dt_to = _parse_date(args.get("date_to"))
 
     if dt_from == "INVALID" or dt_to == "INVALID":
-        return {"error": "date_from/date_to must be YYYY-MM-DD"}, 400
+        return q, "date_from/date_to must be YYYY-MM-DD"
 
     if dt_from:
         q = q.filter(AuditLog.timestamp >= dt_from)
@@ -74,7 +94,173 @@ def get_audit_logs():
     if dt_to:
         q = q.filter(AuditLog.timestamp < (dt_to + timedelta(days=1)))
 
-    total = q.count()
+    return q, None
+
+
+def _resource_condition(term):
+    """
+    SQL condition for resource_contains: a case-insensitive substring of the formatted
+    resource ("patient/PT-001"), written so the resource indexes can serve it.
+    The term can fall inside resource_key (trigram index), inside a type name, or
+    straddle the "/" between them, where "tient/pt-0" means resource_type = patient
+    and lower(resource_key) LIKE 'pt-0%' (ix_audit_log_tenant_resource_lower).
+    """
+    term = term.lower()
+    types = [name for name in RESOURCE_TYPES if name != "other"]
+    conds = [AuditLog.resource_key.icontains(term, autoescape=True)]
+
+    inside_type = [name for name in types if term in name]
+    if inside_type:
+        conds.append(AuditLog.resource_type.in_(inside_type))
+
+    for i, ch in enumerate(term):
+        if ch != "/":
+            continue
+        type_tail, key_head = term[:i], term[i + 1:]
+        matching = [name for name in types if name.endswith(type_tail)]
+        if not matching:
+            continue
+        key_cond = (func.lower(AuditLog.resource_key).startswith(key_head, autoescape=True)
+                    if key_head else AuditLog.resource_key.isnot(None))
+        type_cond = AuditLog.resource_type == matching[0] if len(matching) == 1 else AuditLog.resource_type.in_(matching)
+        conds.append(and_(type_cond, key_cond))
+
+    return or_(*conds) if len(conds) > 1 else conds[0]
+
+
+def _record_filter(args):
+    """
+    Returns a predicate over audit record dicts (archived segments, live tail) for the
+    action/status/user_id/resource_contains part of the /logs filter set.
+    Expects user_id to have been validated already.
+    """
+    user_id = int(args["user_id"]) if args.get("user_id") else None
+    action = (args.get("action") or "").strip()
+    status = (args.get("status") or "").strip()
+    resource_contains = (args.get("resource_contains") or "").strip().lower()
+
+    def matches(rec):
+        if user_id is not None and rec["user_id"] != user_id:
+            return False
+        if (action and rec["action"] != action) or (status and rec["status"] != status):
+            return False
+        if resource_contains and resource_contains not in format_resource(rec["resource_type"], rec["resource_key"]).lower():
+            return False
+        return True
+
+    return matches
+
+
+def _archived_rows(args, before_id=None):
+    """
+    Yields archived entries matching the /logs filter set, newest first, as
+    row-like objects (same attributes as the export query). Archives are only
+    searched when date_from is given, i.e. the caller asked to reach back in time.
+    Archived months are older than anything live, so they continue the id-desc order.
+    """
+    dt_from = _parse_date(args.get("date_from"))
+    if not dt_from or dt_from == "INVALID":
+        return
+    dt_to = _parse_date(args.get("date_to"))
+    dt_end = dt_to + timedelta(days=1) if dt_to else None
+    matches = _record_filter(args)
+
+    usernames = None
+    for rec in iter_archived(g.tenant_id, dt_from, dt_end):
+        if before_id is not None and rec["id"] >= before_id:
+            continue
+        if rec["timestamp"] < dt_from or (dt_end and rec["timestamp"] >= dt_end):
+            continue
+        if not matches(rec):
+            continue
+
+        # Segments archived before actor snapshots existed fall back to current names
+        if rec["actor_username"] is None and rec["user_id"] is not None:
+            if usernames is None:
+                usernames = {
+                    uid: (name, role) for uid, name, role in db.session.execute(
+                        select(User.id, User.username, User.role).where(User.tenant_id == g.tenant_id)
+                    )
+                }
+            rec["actor_username"], rec["actor_role"] = usernames.get(rec["user_id"], (None, None))
+        yield SimpleNamespace(**rec)
+
+
+def _count_signature(args):
+    # Paging args don't change the total
+    return (g.tenant_id,) + tuple(sorted(
+        (k, v) for k, v in args.items(multi=True) if k not in ("limit", "before_id", "count")
+    ))
+
+
+def _estimated_count(q):
+    """
+    Reads the planner's row estimate for the filtered query (Postgres only).
+    Returns None when the database can't provide one.
+    """
+    conn = db.session.connection()
+    if conn.dialect.name != "postgresql":
+        return None
+    compiled = q.statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _capped_count(q, cap):
+    # Counting stops after cap + 1 rows instead of walking the whole filtered set
+    n = db.session.query(func.count()).select_from(q.with_entities(AuditLog.id).limit(cap + 1).subquery()).scalar()
+    return min(n, cap), n > cap
+
+
+def _log_total(q, mode, args):
+    """
+    Returns (total, capped) for the requested count mode.
+    estimated falls back to capped where planner statistics aren't available.
+    """
+    if mode == "none":
+        return None, False
+
+    if mode == "estimated":
+        estimate = _estimated_count(q)
+        if estimate is not None:
+            return estimate, False
+        mode = "capped"
+
+    if mode == "capped":
+        return _capped_count(q, config.AUDIT_COUNT_CAP)
+
+    key = _count_signature(args)
+    total = _count_cache.get(key)
+    if total is None:
+        total = q.count()
+        _count_cache.set(key, total)
+    return total, False
+
+
+@audit_bp.get("/logs")
+@require_auth(roles=["admin"])
+def get_audit_logs():
+    """
+    GET /api/audit/logs?<filters>&limit=200&before_id=...&count=exact|estimated|capped|none
+    count=none skips the total (clients reuse the first page's total while paging).
+    """
+    limit = request.args.get("limit", "200")
+    before_id = request.args.get("before_id")
+    count_mode = (request.args.get("count") or "exact").strip()
+    if count_mode not in COUNT_MODES:
+        return {"error": f"count must be one of {sorted(COUNT_MODES)}"}, 400
+
+    try:
+        limit = min(int(limit), 500)
+    except ValueError:
+        limit = 200
+
+    q = db.session.query(AuditLog)
+    q, error = _apply_log_filters(q, request.args)
+    if error:
+        return {"error": error}, 400
+
+    total, capped = _log_total(q, count_mode, request.args)
     if before_id:
         try:
             q = q.filter(AuditLog.id < int(before_id))
@@ -87,30 +273,172 @@ def get_audit_logs():
          .all()
     )
 
-    items = []
-    for log, username in rows:
-        items.append({
-            "id": log.id,
-            "timestamp": log.timestamp.isoformat(),
-            "userId": log.user_id,
-            "username": username,
-            "action": log.action,
-            "resource": log.resource,
-            "ipAddress": log.ip_address,
-            "status": log.status,
-            "description": log.description,
-        })
+    # Top up from cold archive segments once the live table runs out
+    if len(rows) < limit:
+        cursor = rows[-1].id if rows else (int(before_id) if before_id else None)
+        rows.extend(islice(_archived_rows(request.args, cursor), limit - len(rows)))
+
+    items = [_log_item(log) for log in rows]
     next_before_id = items[-1]["id"] if items else None
     
-    return {"total": total, "nextBeforeId": next_before_id, "items": items}, 200
+    return {
+        "total": total,
+        "totalMode": count_mode,
+        "totalCapped": capped,
+        "nextBeforeId": next_before_id,
+        "items": items,
+    }, 200
+
+
+
+def _log_item(log):
+    return {
+        "id": log.id,
+        "timestamp": log.timestamp,
+        "userId": log.user_id,
+        "username": log.actor_username,
+        "userRole": log.actor_role,
+        "action": log.action,
+        "resource": format_resource(log.resource_type, log.resource_key),
+        "ipAddress": log.ip_address,
+        "status": log.status,
+        "description": render_description(log.message, log.params),
+    }
+
+
+@audit_bp.get("/stream")
+@require_auth(roles=["admin"])
+def stream_audit_logs():
+    """
+    GET /api/audit/stream?action=&status=&user_id=&resource_contains=
+    Server-Sent Events tail of new entries matching the filters, one `audit` event
+    per entry with the entry id as the event id. On reconnect the client sends
+    Last-Event-ID (or ?last_id=) and anything it missed is replayed from the database
+    first; a `gap` event means more than AUDIT_STREAM_CATCHUP_LIMIT were missed and
+    the client should reload /logs instead. Each worker serves at most
+    AUDIT_STREAM_MAX_PER_WORKER streams at once; beyond that it answers 503.
+    """
+    if audit_hub.subscriber_count() >= config.AUDIT_STREAM_MAX_PER_WORKER:
+        return {"error": "too many open audit streams, retry shortly", "retry_after": 3}, 503
+
+    args = {k: request.args[k] for k in STREAM_FILTER_ARGS if request.args.get(k)}
+    if args.get("user_id"):
+        try:
+            int(args["user_id"])
+        except ValueError:
+            return {"error": "user_id must be an integer"}, 400
+
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+    if last_id:
+        try:
+            last_id = int(last_id)
+        except ValueError:
+            return {"error": "last_id must be an integer"}, 400
+
+    tenant_id = g.tenant_id
+    matches = _record_filter(args)
+    db.session.close()
+
+    def read_since(after_id):
+        # Catch-up after Last-Event-ID or a queue overflow: newest CATCHUP_LIMIT entries after
+        # after_id, oldest first. Live entries come from the worker's tail (services/audit_stream.py).
+        q, _ = _apply_log_filters(db.session.query(AuditLog), args)
+        rows = q.filter(AuditLog.id > after_id).order_by(AuditLog.id.desc()).limit(config.AUDIT_STREAM_CATCHUP_LIMIT).all()
+        records = [snapshot(log) for log in reversed(rows)]
+        db.session.close()
+        return records, len(rows) == config.AUDIT_STREAM_CATCHUP_LIMIT
+
+    def generate():
+        sub = None
+        floor = last_id or 0       # highest id confirmed by a database read
+        sent, sent_order = set(), deque()
+
+        def event(rec):
+            sent.add(rec["id"])
+            sent_order.append(rec["id"])
+            if len(sent_order) > config.AUDIT_STREAM_CATCHUP_LIMIT:
+                sent.discard(sent_order.popleft())
+            return f"id: {rec['id']}\nevent: audit\ndata: {current_app.json.dumps(_log_item(SimpleNamespace(**rec)))}\n\n"
+
+        def resync():
+            nonlocal floor
+            records, gap = read_since(floor)
+            if gap:
+                yield "event: gap\ndata: {}\n\n"
+            for rec in records:
+                floor = max(floor, rec["id"])
+                if rec["id"] not in sent:
+                    yield event(rec)
+
+        deadline = time.monotonic() + config.AUDIT_STREAM_MAX_SECONDS
+        next_keepalive = time.monotonic() + config.AUDIT_STREAM_HEARTBEAT_SECONDS
+        try:
+            # Subscribed only once the response is iterated, so a response that is never
+            # sent can't leave a subscription behind; the high-water mark is read after
+            # subscribing so nothing committed in between is lost
+            sub = audit_hub.subscribe(tenant_id)
+            if not last_id:
+                floor = db.session.query(func.max(AuditLog.id)).filter(AuditLog.tenant_id == tenant_id).scalar() or 0
+                db.session.close()
+
+            yield "retry: 3000\n\n"
+            yield from resync()
+
+            start = floor
+            while (now := time.monotonic()) < deadline:
+                rec = sub.get(timeout=max(0.0, min(next_keepalive, deadline) - now))
+
+                if sub.overflowed:
+                    sub.overflowed = False
+                    sub.drain()
+                    yield from resync()
+                elif rec is not None:
+                    # Anything up to the starting point was covered by the high-water mark or the replay
+                    floor = max(floor, rec["id"])
+                    if rec["id"] > start and rec["id"] not in sent and matches(rec):
+                        yield event(rec)
+
+                if time.monotonic() >= next_keepalive:
+                    yield ": keep-alive\n\n"
+                    next_keepalive = time.monotonic() + config.AUDIT_STREAM_HEARTBEAT_SECONDS
+        finally:
+            if sub is not None:
+                audit_hub.unsubscribe(sub)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 
+def _stats_range(args):
+    """
+    Resolves date_from/date_to (inclusive, YYYY-MM-DD) into a UTC [start, end) range.
+    Defaults to today. Returns (start, end, error_message).
+    """
+    now = datetime.now(timezone.utc)
+    start_today = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+
+    dt_from = _parse_date(args.get("date_from"))
+    dt_to = _parse_date(args.get("date_to"))
+    if dt_from == "INVALID" or dt_to == "INVALID":
+        return None, None, "date_from/date_to must be YYYY-MM-DD"
+
+    start = dt_from or start_today
+    end = (dt_to or max(start, start_today)) + timedelta(days=1)
+    if end <= start:
+        return None, None, "date_to must not be before date_from"
+    return start, end, None
+
+
 @audit_bp.get("/stats")
+@statement_timeout("report")
 @require_auth(roles=["admin"])
 def get_audit_stats():
     """
-    GET /api/audit/stats
+    GET /api/audit/stats?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (defaults to today)
     Returns:
       total_logins_today
       failed_logins_today
@@ -118,116 +446,262 @@ def get_audit_stats():
       unauthorized_attempts_today (403)
       server_errors_today (500)
       active_sessions
+    Event counts come from the hourly rollup table in a single query.
     """
+    start, end, error = _stats_range(request.args)
+    if error:
+        return {"error": error}, 400
 
-    now = datetime.now(timezone.utc)
-    start_today = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
-    start_tomorrow = start_today + timedelta(days=1)
-
-    def _count(action, status=None):
-        q = db.session.query(AuditLog).filter(
-            AuditLog.tenant_id == g.tenant_id,
-            AuditLog.action == action,
-            AuditLog.timestamp >= start_today,
-            AuditLog.timestamp < start_tomorrow,
-        )
-        if status:
-            q = q.filter(AuditLog.status == status)
-        return q.count()
-
-    total_logins_today = _count("LOGIN", "SUCCESS")
-    failed_logins_today = _count("LOGIN", "FAILED")
-
-    not_authenticated_today = _count("ACCESS_401", "FAILED")
-    unauthorized_attempts_today = _count("ACCESS_403", "FAILED")
-    server_errors_today = _count("ACCESS_500", "FAILED")
+    counts = rollup_counts(g.tenant_id, start, end, actions=STATS_ACTIONS)
 
     active_sessions = tenant_query(UserSession).count()
 
     return {
-        "total_logins_today": total_logins_today,
-        "failed_logins_today": failed_logins_today,
-        "not_authenticated_today": not_authenticated_today,
-        "unauthorized_attempts_today": unauthorized_attempts_today,
-        "server_errors_today": server_errors_today,
+        "total_logins_today": counts.get(("LOGIN", "SUCCESS"), 0),
+        "failed_logins_today": counts.get(("LOGIN", "FAILED"), 0),
+        "not_authenticated_today": counts.get(("ACCESS_401", "FAILED"), 0),
+        "unauthorized_attempts_today": counts.get(("ACCESS_403", "FAILED"), 0),
+        "server_errors_today": counts.get(("ACCESS_500", "FAILED"), 0),
         "active_sessions": active_sessions,
     }, 200
 
 
-@audit_bp.get("/export")
+@audit_bp.get("/stats/trend")
+@statement_timeout("report")
 @require_auth(roles=["admin"])
-def export_audit_logs():
+def get_audit_trend():
+    """
+    GET /api/audit/stats/trend?action=LOGIN&status=FAILED&date_from=...&date_to=...
+    Hourly event counts for one action, oldest first. Hours with no events are omitted.
+    """
+    action = (request.args.get("action") or "").strip()
+    if not action:
+        return {"error": "action is required"}, 400
+    status = (request.args.get("status") or "").strip() or None
+
+    start, end, error = _stats_range(request.args)
+    if error:
+        return {"error": error}, 400
+
+    series = rollup_series(g.tenant_id, start, end, action, status)
+    return {
+        "action": action,
+        "status": status,
+        "points": [{"hour": hour.isoformat(), "count": n} for hour, n in series],
+    }, 200
+
+
+def _patient_condition(patient_code):
     """
-    GET /api/audit/export?status=...&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
-    Returns CSV file download
+    Entries about one patient: patient/<code> and everything under it (forms, treatment plan).
+    Both branches are lookups on ix_audit_log_tenant_resource.
     """
-    import csv
-    import io
-    from flask import Response
+    escaped = patient_code.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return and_(
+        AuditLog.resource_type == "patient",
+        or_(AuditLog.resource_key == patient_code, AuditLog.resource_key.like(escaped + "/%", escape="\\")),
+    )
+
 
+@audit_bp.get("/patients/<patient_id>/access")
+@statement_timeout("report")
+@require_auth(roles=["admin"])
+def get_patient_access_history(patient_id):
+    """
+    GET /api/audit/patients/<id or code>/access?action=&user_id=&date_from=&date_to=&limit=100&before_id=...
+    Who viewed or changed one patient's chart, forms and treatment plan, newest first.
+    The first page (no before_id) also carries per-user and per-action counts over the
+    whole filtered history, grouped in the database. Archived months are not included.
+    """
     ip = client_ip()
+    p = get_patient_by_id_or_code(patient_id)
+    if not p:
+        log_access(g.user.id, "AUDIT_PATIENT_ACCESS", f"audit/patient/{patient_id}", "FAILED", ip,
+                   message="patient_not_found", params={"patient": patient_id})
+        return {"error": "patient not found"}, 404
 
-    status = (request.args.get("status") or "").strip()
-    date_from = request.args.get("date_from")
-    date_to = request.args.get("date_to")
-    user_id = request.args.get("user_id")
+    try:
+        limit = min(max(int(request.args.get("limit", "100")), 1), 500)
+    except ValueError:
+        limit = 100
+    before_id = request.args.get("before_id")
 
-    q = db.session.query(AuditLog, User.username).outerjoin(User, User.id == AuditLog.user_id).filter(AuditLog.tenant_id == g.tenant_id)
+    # resource_contains would widen the match beyond this patient, so it isn't accepted here
+    args = {k: v for k, v in request.args.items() if k != "resource_contains"}
+    stmt, error = _apply_log_filters(select(AuditLog), args)
+    if error:
+        return {"error": error}, 400
+    stmt = stmt.where(_patient_condition(p.patient_code))
+
+    summary = None
+    if not before_id:
+        counted = stmt.with_only_columns(
+            AuditLog.user_id, AuditLog.actor_username, AuditLog.actor_role, AuditLog.action,
+            func.count().label("n"), func.max(AuditLog.timestamp).label("last_at"),
+        ).group_by(AuditLog.user_id, AuditLog.actor_username, AuditLog.actor_role, AuditLog.action)
+
+        by_user, by_action = {}, {}
+        for row in db.session.execute(counted):
+            key = (row.user_id, row.actor_username)
+            u = by_user.setdefault(key, {
+                "userId": row.user_id, "username": row.actor_username, "userRole": row.actor_role,
+                "count": 0, "lastAccess": row.last_at, "actions": {},
+            })
+            u["count"] += row.n
+            u["lastAccess"] = max(u["lastAccess"], row.last_at)
+            u["actions"][row.action] = u["actions"].get(row.action, 0) + row.n
+            by_action[row.action] = by_action.get(row.action, 0) + row.n
+
+        users = sorted(by_user.values(), key=lambda u: -u["count"])
+        for u in users:
+            u["lastAccess"] = u["lastAccess"].isoformat()
+        summary = {
+            "total": sum(by_action.values()),
+            "byUser": users,
+            "byAction": [{"action": a, "count": n} for a, n in sorted(by_action.items(), key=lambda kv: -kv[1])],
+        }
 
-    if user_id:
+    if before_id:
         try:
-            q = q.filter(AuditLog.user_id == int(user_id))
+            stmt = stmt.where(AuditLog.id < int(before_id))
         except ValueError:
-            pass
+            return {"error": "before_id must be an integer"}, 400
+    rows = db.session.scalars(stmt.order_by(AuditLog.id.desc()).limit(limit)).all()
+    items = [_log_item(log) for log in rows]
 
-    if status:
-        q = q.filter(AuditLog.status == status)
+    if not before_id:
+        log_access(g.user.id, "AUDIT_PATIENT_ACCESS", f"audit/patient/{p.patient_code}", "SUCCESS", ip,
+                   message="patient_access_history_viewed", params={"name": f"{p.first_name} {p.last_name}", "code": p.patient_code})
 
-    dt_from = _parse_date(date_from)
-    dt_to = _parse_date(date_to)
+    return {
+        "patient": {"id": p.patient_code, "name": f"{p.first_name} {p.last_name}"},
+        "summary": summary,
+        "nextBeforeId": items[-1]["id"] if len(items) == limit else None,
+        "items": items,
+    }, 200
 
-    if dt_from == "INVALID" or dt_to == "INVALID":
-        log_access(g.user.id, "AUDIT_EXPORT", "audit/export", "FAILED", ip, description="Audit export failed — invalid date format")
-        return {"error": "date_from/date_to must be YYYY-MM-DD"}, 400
 
-    if dt_from:
-        q = q.filter(AuditLog.timestamp >= dt_from)
-    if dt_to:
-        q = q.filter(AuditLog.timestamp < (dt_to + timedelta(days=1)))
+@audit_bp.get("/export")
+@statement_timeout("export")
+@require_auth(roles=["admin"])
+def export_audit_logs():
+    """
+    GET /api/audit/export?format=csv|ndjson&gzip=1&<same filters as /logs>
+    Streams a file download. Rows are read through a server-side cursor and
+    written out in chunks, so memory stays flat regardless of export size.
+    """
+    ip = client_ip()
+
+    export_format = (request.args.get("format") or "csv").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        return {"error": "format must be csv or ndjson"}, 400
+    use_gzip = request.args.get("gzip") in ("1", "true")
 
-    rows = q.order_by(AuditLog.id.desc()).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["ID", "Timestamp", "User ID", "Username", "Action", "Resource", "IP Address", "Status", "Description"])
-
-    for log, username in rows:
-        writer.writerow([
-            log.id,
-            log.timestamp.isoformat() if log.timestamp else "",
-            log.user_id or "",
-            username or "",
-            log.action,
-            log.resource,
-            log.ip_address or "",
-            log.status,
-            log.description or "",
-        ])
-
-    csv_data = output.getvalue()
-    output.close()
-
-    filename = f"audit_logs_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.csv"
-
-    filters = []
-    if status: filters.append(f"status={status}")
-    if date_from: filters.append(f"from={date_from}")
-    if date_to: filters.append(f"to={date_to}")
-    if user_id: filters.append(f"user_id={user_id}")
+    stmt = select(
+        AuditLog.id, AuditLog.timestamp, AuditLog.user_id, AuditLog.actor_username, AuditLog.actor_role,
+        AuditLog.action, AuditLog.resource_type, AuditLog.resource_key, AuditLog.ip_address, AuditLog.status,
+        AuditLog.message, AuditLog.params,
+    )
+    stmt, error = _apply_log_filters(stmt, request.args)
+    if error:
+        log_access(g.user.id, "AUDIT_EXPORT", "audit/export", "FAILED", ip, message="audit_export_failed", params={"reason": error})
+        return {"error": error}, 400
+    stmt = stmt.order_by(AuditLog.id.desc())
+
+    filters = [f"{k}={request.args[k]}" for k in EXPORT_FILTER_ARGS if request.args.get(k)]
     filter_desc = f" with filters: {', '.join(filters)}" if filters else " (no filters)"
-    log_access(g.user.id, "AUDIT_EXPORT", "audit/export", "SUCCESS", ip, description=f"Exported {len(rows)} audit log entries to CSV{filter_desc}")
+    user_id = g.user.id
+    label = export_format.upper()
+
+    def generate():
+        result = db.session.execute(stmt, execution_options={"yield_per": EXPORT_BATCH_ROWS})
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if use_gzip else None
+        exported = 0
+        completed = False
+
+        def emit(text):
+            data = text.encode("utf-8")
+            return compressor.compress(data) if compressor else data
+
+        def render(batch):
+            if export_format == "csv":
+                return emit("".join(_csv_line(_export_csv_row(row)) for row in batch))
+            return emit("".join(json.dumps(_export_record(row)) + "\n" for row in batch))
+
+        try:
+            if export_format == "csv":
+                yield emit(_csv_line(EXPORT_CSV_HEADER))
+
+            last_id = None
+            for batch in result.partitions():
+                exported += len(batch)
+                last_id = batch[-1].id
+                out = render(batch)
+                if out:
+                    yield out
+
+            # Older entries continue from cold archive segments when the date range reaches them
+            archived = _archived_rows(request.args, last_id)
+            while batch := list(islice(archived, EXPORT_BATCH_ROWS)):
+                exported += len(batch)
+                out = render(batch)
+                if out:
+                    yield out
+
+            if compressor:
+                yield compressor.flush()
+            completed = True
+        finally:
+            result.close()
+            if completed:
+                log_access(user_id, "AUDIT_EXPORT", "audit/export", "SUCCESS", ip, message="audit_exported",
+                           params={"count": exported, "format": label, "filters": filter_desc})
+            else:
+                log_access(user_id, "AUDIT_EXPORT", "audit/export", "FAILED", ip, message="audit_export_aborted",
+                           params={"count": exported, "format": label, "filters": filter_desc})
+
+    extension = export_format + (".gz" if use_gzip else "")
+    mimetype = "application/gzip" if use_gzip else EXPORT_FORMATS[export_format]
+    filename = f"audit_logs_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.{extension}"
+
     return Response(
-        csv_data,
-        mimetype="text/csv",
+        stream_with_context(generate()),
+        mimetype=mimetype,
         headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
\ No newline at end of file
+    )
+
+
+def _csv_line(values) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+def _export_csv_row(row):
+    return [
+        row.id,
+        row.timestamp.isoformat() if row.timestamp else "",
+        row.user_id or "",
+        row.actor_username or "",
+        row.actor_role or "",
+        row.action,
+        format_resource(row.resource_type, row.resource_key),
+        row.ip_address or "",
+        row.status,
+        render_description(row.message, row.params) or "",
+    ]
+
+
+def _export_record(row):
+    return {
+        "id": row.id,
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+        "userId": row.user_id,
+        "username": row.actor_username,
+        "userRole": row.actor_role,
+        "action": row.action,
+        "resource": format_resource(row.resource_type, row.resource_key),
+        "ipAddress": row.ip_address,
+        "status": row.status,
+        "description": render_description(row.message, row.params),
+    }
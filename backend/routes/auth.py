@@ -2,6 +2,7 @@ from datetime import datetime, timedelta, timezone
 import secrets
 
 from flask import Blueprint, request
+from sqlalchemy import case, or_, update
 from werkzeug.security import check_password_hash
 
 from extensions import db
@@ -30,38 +31,71 @@ def login():
     t_id = tenant.id
 
     if login_limiter.is_rate_limited(ip):
-        log_access(None, "LOGIN", "auth", "FAILED", ip, description=f"Rate limited login attempt for '{username}'", tenant_id=t_id)
+        log_access(None, "LOGIN", "auth", "FAILED", ip, message="login_rate_limited", params={"username": username}, tenant_id=t_id)
         return {"error": "Too many login attempts. Please wait 60 seconds.", "retry_after": 60}, 429
 
     if not username or not password:
-        log_access(None, "LOGIN", "auth", "FAILED", ip, description="Login failed — missing username or password", tenant_id=t_id)
+        log_access(None, "LOGIN", "auth", "FAILED", ip, message="login_missing_credentials", tenant_id=t_id)
         return {"error": "username and password required"}, 400
 
     user = User.query.filter_by(username=username, tenant_id=t_id).first()
 
     if not user:
-        log_access(None, "LOGIN", "auth", "FAILED", ip, description=f"Login failed — username '{username}' not found", tenant_id=t_id)
+        log_access(None, "LOGIN", "auth", "FAILED", ip, message="login_unknown_user", params={"username": username}, tenant_id=t_id)
         return {"error": "invalid credentials"}, 401
 
     if user.permanently_locked:
-        log_access(user.id, "LOGIN", "auth", "FAILED", ip, description=f"Login blocked — '{user.username}' is permanently locked", tenant_id=t_id)
+        log_access(user.id, "LOGIN", "auth", "FAILED", ip, message="login_permanently_locked", params={"username": user.username}, tenant_id=t_id)
         return {"error": "account is permanently locked. contact an administrator"}, 403
 
-    if user.locked_until and user.locked_until > datetime.now(timezone.utc):
-        log_access(user.id, "LOGIN", "auth", "FAILED", ip, description=f"Login blocked — '{user.username}' temporarily locked", tenant_id=t_id)
+    locked_until = user.locked_until
+    if locked_until and locked_until.tzinfo is None:
+        locked_until = locked_until.replace(tzinfo=timezone.utc)  # SQLite drops the offset
+    if locked_until and locked_until > datetime.now(timezone.utc):
+        log_access(user.id, "LOGIN", "auth", "FAILED", ip, message="login_temporarily_locked", params={"username": user.username}, tenant_id=t_id)
         return {"error": "account locked. try again later"}, 403
 
+    # The hash check runs with no row lock held; the counter and lock state are then
+    # changed by a single conditional UPDATE, so concurrent attempts can't lose increments
+    # and an account locked meanwhile by another attempt is reported as locked
+    now = datetime.now(timezone.utc)
+    unlocked = (
+        User.id == user.id,
+        User.permanently_locked.is_(False),
+        or_(User.locked_until.is_(None), User.locked_until <= now),
+    )
+
     if not check_password_hash(user.password_hash, password):
-        user.failed_login_attempts += 1
-        if user.failed_login_attempts >= config.MAX_FAILED_LOGINS:
-            user.locked_until = datetime.now(timezone.utc) + timedelta(minutes=config.ACCOUNT_LOCKOUT_MINUTES)
+        counted = db.session.execute(
+            update(User)
+            .where(*unlocked)
+            .values(
+                failed_login_attempts=User.failed_login_attempts + 1,
+                locked_until=case(
+                    (User.failed_login_attempts + 1 >= config.MAX_FAILED_LOGINS,
+                     now + timedelta(minutes=config.ACCOUNT_LOCKOUT_MINUTES)),
+                    else_=User.locked_until,
+                ),
+            ),
+            execution_options={"synchronize_session": False},
+        ).rowcount
         db.session.commit()
-        log_access(user.id, "LOGIN", "auth", "FAILED", ip, description=f"Login failed — wrong password for '{user.username}'", tenant_id=t_id)
+        if not counted:
+            log_access(user.id, "LOGIN", "auth", "FAILED", ip, message="login_temporarily_locked", params={"username": user.username}, tenant_id=t_id)
+            return {"error": "account locked. try again later"}, 403
+        log_access(user.id, "LOGIN", "auth", "FAILED", ip, message="login_wrong_password", params={"username": user.username}, tenant_id=t_id)
         return {"error": "invalid credentials"}, 401
 
-    user.failed_login_attempts = 0
-    user.locked_until = None
+    reset = db.session.execute(
+        update(User)
+        .where(*unlocked)
+        .values(failed_login_attempts=0, locked_until=None, last_login=now, last_seen=now),
+        execution_options={"synchronize_session": False},
+    ).rowcount
     db.session.commit()
+    if not reset:
+        log_access(user.id, "LOGIN", "auth", "FAILED", ip, message="login_temporarily_locked", params={"username": user.username}, tenant_id=t_id)
+        return {"error": "account locked. try again later"}, 403
 
     session_id = secrets.token_urlsafe(32)
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=config.SESSION_TIMEOUT_MINUTES)
@@ -70,7 +104,7 @@ def login():
     db.session.add(sess)
     db.session.commit()
 
-    log_access(user.id, "LOGIN", "auth", "SUCCESS", ip, description=f"User '{user.username}' ({user.role}) logged in", tenant_id=t_id)
+    log_access(user.id, "LOGIN", "auth", "SUCCESS", ip, message="login_success", params={"username": user.username, "role": user.role}, tenant_id=t_id)
 
     return {
         "user_id": user.id,
@@ -123,5 +157,5 @@ def logout():
     db.session.delete(sess)
     db.session.commit()
 
-    log_access(user.id, "LOGOUT", "auth", "SUCCESS", ip, description=f"User '{user.username}' logged out")
+    log_access(user.id, "LOGOUT", "auth", "SUCCESS", ip, message="logout", params={"username": user.username})
     return {"ok": True}, 200
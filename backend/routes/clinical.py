@@ -1,14 +1,23 @@
+from datetime import datetime, timezone
+
 from flask import Blueprint, request, g
+from sqlalchemy import and_, case, func, or_, select
 
+import config
 from auth_middleware import require_auth
 from extensions import db
-from models import Patient, TreatmentPlan
+from models import Patient, TreatmentGoal, TreatmentPlan, TreatmentPlanRevision, User
 from services.audit_logger import log_access
 from services.helpers import client_ip, parse_date_iso, get_patient_by_id_or_code, check_patient_access, tenant_query
-from sqlalchemy.orm.attributes import flag_modified
+from services.plan_revisions import diff, plan_at, plan_document, record_revision
+from services.ttl_cache import TTLCache
+from services.db_engine import statement_timeout
+from sqlalchemy.orm import selectinload
 
 clinical_bp = Blueprint("clinical", __name__, url_prefix="/api/patients")
 
+_overdue_cache = TTLCache(ttl_seconds=config.TREATMENT_PLAN_OVERDUE_CACHE_SECONDS)
+
 
 
 
@@ -16,11 +25,12 @@ def _serialize_plan(tp: TreatmentPlan):
     return {
         "id": tp.id,
         "patientId": tp.patient_id,
-        "startDate": tp.start_date.isoformat() if tp.start_date else None,
-        "reviewDate": tp.review_date.isoformat() if tp.review_date else None,
+        "startDate": tp.start_date,
+        "reviewDate": tp.review_date,
         "goals": tp.goals or [],
         "status": tp.status,
-        "updatedAt": tp.updated_at.isoformat() if tp.updated_at else None,
+        "revision": tp.revision,
+        "updatedAt": tp.updated_at,
     }
 
 
@@ -34,11 +44,11 @@ def get_treatment_plan(patient_id):
 
     p = get_patient_by_id_or_code(patient_id)
     if not p:
-        log_access(g.user.id, "TREATMENTPLAN_GET", f"patient/{patient_id}/treatment-plan", "FAILED", ip, description=f"Patient '{patient_id}' not found")
+        log_access(g.user.id, "TREATMENTPLAN_GET", f"patient/{patient_id}/treatment-plan", "FAILED", ip, message="patient_not_found", params={"patient": patient_id})
         return {"error": "patient not found"}, 404
 
     if not check_patient_access(p):
-        log_access(g.user.id, "TREATMENTPLAN_GET", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, description=f"Access denied to treatment plan for patient {p.patient_code}")
+        log_access(g.user.id, "TREATMENTPLAN_GET", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, message="plan_access_denied", params={"code": p.patient_code})
         return {"error": "forbidden"}, 403
 
     tp = TreatmentPlan.query.filter_by(patient_id=p.id).first()
@@ -59,67 +69,229 @@ def upsert_treatment_plan(patient_id):
 
     p = get_patient_by_id_or_code(patient_id)
     if not p:
-        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{patient_id}/treatment-plan", "FAILED", ip, description=f"Treatment plan update failed — patient '{patient_id}' not found")
+        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{patient_id}/treatment-plan", "FAILED", ip, message="plan_patient_not_found", params={"patient": patient_id})
         return {"error": "patient not found"}, 404
 
     if not check_patient_access(p):
-        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, description=f"Access denied to treatment plan for patient {p.patient_code}")
+        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, message="plan_access_denied", params={"code": p.patient_code})
         return {"error": "forbidden"}, 403
 
     start_date = parse_date_iso(data.get("startDate"))
     review_date = parse_date_iso(data.get("reviewDate"))
     if start_date == "INVALID" or review_date == "INVALID":
-        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, description=f"Treatment plan update failed for {p.patient_code} — invalid date format")
+        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, message="plan_update_failed", params={"code": p.patient_code, "reason": "invalid date format"})
         return {"error": "startDate/reviewDate must be YYYY-MM-DD"}, 400
 
     status = (data.get("status") or "active").strip()
     if status not in {"active", "archived"}:
-        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, description=f"Treatment plan update failed for {p.patient_code} — invalid status")
+        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, message="plan_update_failed", params={"code": p.patient_code, "reason": "invalid status"})
         return {"error": "status must be active or archived"}, 400
 
     goals = data.get("goals", [])
     if goals is None:
         goals = []
-    if not isinstance(goals, (list, dict)):
-        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, description=f"Treatment plan update failed for {p.patient_code} — goals must be a list")
-        return {"error": "goals must be a list or object"}, 400
+    if not isinstance(goals, list) or not all(isinstance(goal, dict) for goal in goals):
+        log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, message="plan_update_failed", params={"code": p.patient_code, "reason": "goals must be a list"})
+        return {"error": "goals must be a list of objects"}, 400
 
-    tp = TreatmentPlan.query.filter_by(patient_id=p.id).first()
+    # Row lock serializes concurrent saves so revision numbers don't collide
+    tp = TreatmentPlan.query.filter_by(patient_id=p.id).with_for_update().first()
     created = False
+    previous = None
     if not tp:
         tp = TreatmentPlan(patient_id=p.id, tenant_id=g.tenant_id)
         db.session.add(tp)
         created = True
+    else:
+        previous = plan_document(tp)
 
     tp.start_date = start_date
     tp.review_date = review_date
     tp.goals = goals
     tp.status = status
-    flag_modified(tp, "goals")
 
+    record_revision(tp, previous, g.user.id)
     db.session.commit()
 
     action_word = "Created" if created else "Updated"
-    log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "SUCCESS", ip, description=f"{action_word} treatment plan for {p.first_name} {p.last_name} ({p.patient_code})")
+    log_access(g.user.id, "TREATMENTPLAN_UPSERT", f"patient/{p.patient_code}/treatment-plan", "SUCCESS", ip, message="plan_saved",
+               params={"verb": action_word, "name": f"{p.first_name} {p.last_name}", "code": p.patient_code})
     return {"created": created, "treatmentPlan": _serialize_plan(tp)}, 200
 
 
+def _plan_for_history(patient_id, ip):
+    """Resolves and access-checks the patient's plan. Returns (plan, error_response)."""
+    p = get_patient_by_id_or_code(patient_id)
+    if not p:
+        log_access(g.user.id, "TREATMENTPLAN_GET", f"patient/{patient_id}/treatment-plan", "FAILED", ip, message="patient_not_found", params={"patient": patient_id})
+        return None, ({"error": "patient not found"}, 404)
+
+    if not check_patient_access(p):
+        log_access(g.user.id, "TREATMENTPLAN_GET", f"patient/{p.patient_code}/treatment-plan", "FAILED", ip, message="plan_access_denied", params={"code": p.patient_code})
+        return None, ({"error": "forbidden"}, 403)
+
+    tp = TreatmentPlan.query.filter_by(patient_id=p.id).first()
+    if not tp:
+        return None, ({"error": "treatment plan not found"}, 404)
+    return tp, None
+
+
+@clinical_bp.get("/<patient_id>/treatment-plan/revisions")
+@require_auth(roles=["technician", "psychiatrist", "admin"])
+def list_treatment_plan_revisions(patient_id):
+    """
+    GET /api/patients/<id>/treatment-plan/revisions?limit=50&before_version=...
+    Revision metadata, newest first. Fetch a version's content from /revisions/<version>.
+    """
+    tp, error = _plan_for_history(patient_id, client_ip())
+    if error:
+        return error
+
+    try:
+        limit = min(max(int(request.args.get("limit", "50")), 1), 200)
+    except ValueError:
+        limit = 50
+
+    q = (
+        db.session.query(TreatmentPlanRevision.version, TreatmentPlanRevision.kind, TreatmentPlanRevision.data,
+                         TreatmentPlanRevision.created_at, TreatmentPlanRevision.user_id, User.username)
+        .outerjoin(User, User.id == TreatmentPlanRevision.user_id)
+        .filter(TreatmentPlanRevision.plan_id == tp.id)
+    )
+    before_version = request.args.get("before_version")
+    if before_version:
+        try:
+            q = q.filter(TreatmentPlanRevision.version < int(before_version))
+        except ValueError:
+            return {"error": "before_version must be an integer"}, 400
+
+    rows = q.order_by(TreatmentPlanRevision.version.desc()).limit(limit).all()
+    items = [{
+        "version": r.version,
+        "createdAt": r.created_at.isoformat(),
+        "userId": r.user_id,
+        "username": r.username,
+        "changes": None if r.kind == "snapshot" else len(r.data),
+    } for r in rows]
+
+    return {
+        "currentVersion": tp.revision,
+        "nextBeforeVersion": items[-1]["version"] if len(items) == limit else None,
+        "items": items,
+    }, 200
+
+
+@clinical_bp.get("/<patient_id>/treatment-plan/revisions/<int:version>")
+@require_auth(roles=["technician", "psychiatrist", "admin"])
+def get_treatment_plan_revision(patient_id, version):
+    """
+    GET /api/patients/<id>/treatment-plan/revisions/<version>
+    The plan (startDate, reviewDate, status, goals) as it was at that version.
+    """
+    tp, error = _plan_for_history(patient_id, client_ip())
+    if error:
+        return error
+
+    doc = plan_at(tp.id, version)
+    if doc is None:
+        return {"error": "revision not found"}, 404
+    return {"version": version, "treatmentPlan": doc}, 200
+
+
+@clinical_bp.get("/<patient_id>/treatment-plan/revisions/<int:version>/diff")
+@require_auth(roles=["technician", "psychiatrist", "admin"])
+def diff_treatment_plan_revision(patient_id, version):
+    """
+    GET /api/patients/<id>/treatment-plan/revisions/<version>/diff?against=<older version>
+    Changes from `against` (default: the previous version) to `version`, as
+    ["set", path, value] / ["del", path] / ["trim", path, length] operations.
+    """
+    tp, error = _plan_for_history(patient_id, client_ip())
+    if error:
+        return error
+
+    try:
+        against = int(request.args.get("against", version - 1))
+    except ValueError:
+        return {"error": "against must be an integer"}, 400
+
+    new = plan_at(tp.id, version)
+    old = plan_at(tp.id, against) if against >= 1 else {}
+    if new is None or old is None:
+        return {"error": "revision not found"}, 404
+    return {"from": against, "to": version, "changes": diff(old, new)}, 200
+
+
 @clinical_bp.get("/treatment-plans")
 @require_auth(roles=["technician", "psychiatrist", "admin"])
 def list_treatment_plans():
     """
-    GET /api/patients/treatment-plans
-    Returns all treatment plans with patient info.
+    GET /api/patients/treatment-plans?status=active&review_from=YYYY-MM-DD&review_to=YYYY-MM-DD
+        &overdue=1&provider_id=&patient=PT-001&limit=100&cursor=...
+    Review worklist: plans with patient info, soonest review first (plans without a
+    review date last). Pass nextCursor back as cursor for the next page.
+    overdueCount is the number of active plans past their review date in the caller's
+    scope (provider_id / technician assignment), whatever the other filters.
     """
-    ip = client_ip()
-
-    q = db.session.query(TreatmentPlan, Patient).join(Patient, Patient.id == TreatmentPlan.patient_id).filter(TreatmentPlan.tenant_id == g.tenant_id)
+    status = (request.args.get("status") or "").strip()
+    review_from = parse_date_iso(request.args.get("review_from"))
+    review_to = parse_date_iso(request.args.get("review_to"))
+    if review_from == "INVALID" or review_to == "INVALID":
+        return {"error": "review_from/review_to must be YYYY-MM-DD"}, 400
+    overdue = request.args.get("overdue") in ("1", "true")
+    patient_code = (request.args.get("patient") or "").strip()
 
     # RBAC: technicians only see assigned patients
-    if g.user.role == "technician":
-        q = q.filter(Patient.assigned_provider_id == g.user.id)
-
-    rows = q.order_by(Patient.last_name.asc()).all()
+    provider_id, error = _provider_scope()
+    if error:
+        return error
+
+    try:
+        limit = min(max(int(request.args.get("limit", "100")), 1), 500)
+    except ValueError:
+        limit = 100
+
+    cursor = _parse_plan_cursor(request.args.get("cursor"))
+    if cursor == "INVALID":
+        return {"error": "invalid cursor"}, 400
+
+    today = datetime.now(timezone.utc).date()
+
+    q = (
+        db.session.query(TreatmentPlan, Patient)
+        .join(Patient, Patient.id == TreatmentPlan.patient_id)
+        .filter(TreatmentPlan.tenant_id == g.tenant_id)
+        .options(selectinload(TreatmentPlan.goal_items))
+    )
+    if provider_id:
+        q = q.filter(Patient.assigned_provider_id == provider_id)
+    if status:
+        q = q.filter(TreatmentPlan.status == status)
+    if overdue:
+        q = q.filter(TreatmentPlan.status == "active", TreatmentPlan.review_date < today)
+    if review_from:
+        q = q.filter(TreatmentPlan.review_date >= review_from)
+    if review_to:
+        q = q.filter(TreatmentPlan.review_date <= review_to)
+    if patient_code:
+        q = q.filter(Patient.patient_code == patient_code)
+
+    if cursor:
+        review_date, plan_id = cursor
+        if review_date is None:
+            q = q.filter(TreatmentPlan.review_date.is_(None), TreatmentPlan.id > plan_id)
+        else:
+            q = q.filter(or_(
+                TreatmentPlan.review_date > review_date,
+                and_(TreatmentPlan.review_date == review_date, TreatmentPlan.id > plan_id),
+                TreatmentPlan.review_date.is_(None),
+            ))
+
+    rows = (
+        q.order_by(TreatmentPlan.review_date.asc().nulls_last(), TreatmentPlan.id.asc())
+         .limit(limit)
+         .all()
+    )
 
     items = []
     for tp, p in rows:
@@ -127,6 +299,170 @@ def list_treatment_plans():
         plan["patientName"] = f"{p.first_name} {p.last_name}"
         plan["patientCode"] = p.patient_code
         plan["patientStatus"] = p.status
+        plan["overdue"] = tp.status == "active" and tp.review_date is not None and tp.review_date < today
         items.append(plan)
 
-    return items, 200
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1][0]
+        next_cursor = f"{last.review_date.isoformat() if last.review_date else ''}|{last.id}"
+
+    return {
+        "items": items,
+        "nextCursor": next_cursor,
+        "overdueCount": _overdue_count(provider_id, today),
+    }, 200
+
+
+def _parse_plan_cursor(value):
+    """
+    Cursor is "<review date or empty>|<plan id>" (the last row of the previous page).
+    Returns (review_date, id), None when absent, or "INVALID".
+    """
+    if not value:
+        return None
+    review, _, plan_id = value.partition("|")
+    review_date = parse_date_iso(review)
+    if review_date == "INVALID" or not plan_id.isdigit():
+        return "INVALID"
+    return review_date, int(plan_id)
+
+
+def _overdue_count(provider_id, today):
+    # Index-only count on (tenant_id, status, review_date); cached briefly per scope
+    key = (g.tenant_id, provider_id, today)
+    n = _overdue_cache.get(key)
+    if n is None:
+        q = db.session.query(func.count(TreatmentPlan.id)).filter(
+            TreatmentPlan.tenant_id == g.tenant_id,
+            TreatmentPlan.status == "active",
+            TreatmentPlan.review_date < today,
+        )
+        if provider_id:
+            q = q.join(Patient, Patient.id == TreatmentPlan.patient_id).filter(Patient.assigned_provider_id == provider_id)
+        n = q.scalar()
+        _overdue_cache.set(key, n)
+    return n
+
+
+def _scoped_plans(provider_id):
+    """Tenant's plans, limited to one provider's patients when provider_id is set."""
+    q = select(TreatmentPlan.id).where(TreatmentPlan.tenant_id == g.tenant_id)
+    if provider_id:
+        q = q.join(Patient, Patient.id == TreatmentPlan.patient_id).where(Patient.assigned_provider_id == provider_id)
+    return q
+
+
+def _provider_scope():
+    """provider_id query arg, forced to the caller for technicians. Returns (provider_id, error)."""
+    if g.user.role == "technician":
+        return g.user.id, None
+    provider_id = request.args.get("provider_id")
+    if not provider_id:
+        return None, None
+    try:
+        return int(provider_id), None
+    except ValueError:
+        return None, ({"error": "provider_id must be an integer"}, 400)
+
+
+@clinical_bp.get("/treatment-plans/goal-stats")
+@statement_timeout("report")
+@require_auth(roles=["technician", "psychiatrist", "admin"])
+def get_goal_stats():
+    """
+    GET /api/patients/treatment-plans/goal-stats?provider_id=
+    Plan and goal counts across the tenant (or one provider's patients), computed in SQL:
+      plans, activePlans
+      goals, goalsByStatus
+      overdueGoals: goals of active plans past their target date and not met
+      plansWithoutMeasurableGoals: active plans with no goal that has a target date or progress
+    """
+    provider_id, error = _provider_scope()
+    if error:
+        return error
+    today = datetime.now(timezone.utc).date()
+    scoped = _scoped_plans(provider_id).subquery()
+
+    plans, active_plans = db.session.execute(
+        select(func.count(TreatmentPlan.id), func.coalesce(func.sum(case((TreatmentPlan.status == "active", 1), else_=0)), 0))
+        .where(TreatmentPlan.id.in_(select(scoped.c.id)))
+    ).one()
+
+    overdue = case(
+        (and_(TreatmentPlan.status == "active", TreatmentGoal.target_date < today, TreatmentGoal.status != "met"), 1),
+        else_=0,
+    )
+    by_status = db.session.execute(
+        select(TreatmentGoal.status, func.count(TreatmentGoal.id), func.sum(overdue))
+        .join(TreatmentPlan, TreatmentPlan.id == TreatmentGoal.plan_id)
+        .where(TreatmentGoal.tenant_id == g.tenant_id, TreatmentGoal.plan_id.in_(select(scoped.c.id)))
+        .group_by(TreatmentGoal.status)
+    ).all()
+
+    measurable = (
+        select(TreatmentGoal.id)
+        .where(TreatmentGoal.plan_id == TreatmentPlan.id)
+        .where(or_(TreatmentGoal.target_date.is_not(None), TreatmentGoal.progress.is_not(None)))
+        .exists()
+    )
+    unmeasurable = db.session.scalar(
+        select(func.count(TreatmentPlan.id))
+        .where(TreatmentPlan.id.in_(select(scoped.c.id)), TreatmentPlan.status == "active", ~measurable)
+    )
+
+    return {
+        "plans": plans,
+        "activePlans": active_plans,
+        "goals": sum(n for _, n, _ in by_status),
+        "goalsByStatus": {status: n for status, n, _ in by_status},
+        "overdueGoals": sum(o or 0 for _, _, o in by_status),
+        "plansWithoutMeasurableGoals": unmeasurable,
+    }, 200
+
+
+@clinical_bp.get("/treatment-plans/unmeasurable")
+@statement_timeout("report")
+@require_auth(roles=["technician", "psychiatrist", "admin"])
+def list_plans_without_measurable_goals():
+    """
+    GET /api/patients/treatment-plans/unmeasurable?provider_id=&limit=100&after_id=...
+    Active plans none of whose goals has a target date or progress, by plan id.
+    """
+    provider_id, error = _provider_scope()
+    if error:
+        return error
+    try:
+        limit = min(max(int(request.args.get("limit", "100")), 1), 500)
+        after_id = int(request.args.get("after_id", "0"))
+    except ValueError:
+        return {"error": "limit/after_id must be integers"}, 400
+
+    goal_count = (
+        select(func.count(TreatmentGoal.id)).where(TreatmentGoal.plan_id == TreatmentPlan.id).scalar_subquery()
+    )
+    measurable = (
+        select(TreatmentGoal.id)
+        .where(TreatmentGoal.plan_id == TreatmentPlan.id)
+        .where(or_(TreatmentGoal.target_date.is_not(None), TreatmentGoal.progress.is_not(None)))
+        .exists()
+    )
+    q = (
+        select(TreatmentPlan.id, TreatmentPlan.review_date, Patient.patient_code, Patient.first_name, Patient.last_name,
+               goal_count.label("goal_count"))
+        .join(Patient, Patient.id == TreatmentPlan.patient_id)
+        .where(TreatmentPlan.tenant_id == g.tenant_id, TreatmentPlan.status == "active", TreatmentPlan.id > after_id, ~measurable)
+        .order_by(TreatmentPlan.id)
+        .limit(limit)
+    )
+    if provider_id:
+        q = q.where(Patient.assigned_provider_id == provider_id)
+
+    items = [{
+        "planId": r.id,
+        "patientCode": r.patient_code,
+        "patientName": f"{r.first_name} {r.last_name}",
+        "reviewDate": r.review_date,
+        "goalCount": r.goal_count,
+    } for r in db.session.execute(q)]
+    return {"items": items, "nextAfterId": items[-1]["planId"] if len(items) == limit else None}, 200
@@ -1,23 +1,32 @@
 from datetime import datetime, timezone
 from flask import Blueprint, request, g
+from sqlalchemy import insert, or_, select
 
 from auth_middleware import require_auth
 from extensions import db
-from models import FormTemplate, PatientForm, Patient, User
+from models import FormTemplate, FormTemplateVersion, PatientForm, Patient, User
 from services.audit_logger import log_access
+from services.compression import etag_matches
 from services.helpers import client_ip, get_patient_by_id_or_code, check_patient_access, tenant_query
+from services.scoring import validate_scoring, apply_form_score
+from services.template_versions import get_or_create_version, ensure_current_version, version_snapshot
 from sqlalchemy.orm.attributes import flag_modified
 
 forms_bp = Blueprint("forms", __name__, url_prefix="/api")
 
+BULK_INSERT_BATCH = 500
+
 
 def _serialize_template(t: FormTemplate):
+    version = version_snapshot(t.current_version_id)
     return {
         "id": t.id,
         "name": t.name,
         "category": t.category,
         "description": t.description,
         "fields": t.fields or [],
+        "scoring": t.scoring,
+        "version": version["hash"] if version else None,
         "allowedRoles": t.allowed_roles or [],
         "status": t.status,
         "createdBy": t.created_by,
@@ -36,14 +45,19 @@ def _serialize_form(f: PatientForm):
     filler = User.query.get(f.filled_by) if f.filled_by else None
     filler_name = (filler.full_name or filler.username) if filler else None
 
+    version = version_snapshot(f.template_version_id)
+
     return {
         "id": f.id,
         "patientId": f.patient_id,
         "templateId": f.template_id,
         "templateName": template_name,
         "templateCategory": template_category,
+        "templateVersion": version["hash"] if version else None,
         "formData": f.form_data or {},
         "status": f.status,
+        "score": f.score,
+        "severity": f.severity,
         "filledBy": f.filled_by,
         "filledByName": filler_name,
         "createdAt": f.created_at.isoformat() if f.created_at else None,
@@ -81,7 +95,7 @@ def get_template(template_id):
     ip = client_ip()
     t = FormTemplate.query.get(template_id)
     if not t:
-        log_access(g.user.id, "TEMPLATE_GET", f"template/{template_id}", "FAILED", ip, description=f"Template #{template_id} not found")
+        log_access(g.user.id, "TEMPLATE_GET", f"template/{template_id}", "FAILED", ip, message="template_not_found", params={"template_id": template_id})
         return {"error": "template not found"}, 404
 
     data = _serialize_template(t)
@@ -99,39 +113,47 @@ def create_template():
     name = (data.get("name") or "").strip()
     if not name:
         if not name:
-            log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, description="Template creation failed — name is required")
+            log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, message="template_create_failed", params={"reason": "name is required"})
         return {"error": "name is required"}, 400
 
     category = (data.get("category") or "").strip()
     if not category:
-        log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, description="Template creation failed — category is required")
+        log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, message="template_create_failed", params={"reason": "category is required"})
         return {"error": "category is required"}, 400
 
     fields = data.get("fields", [])
     if not isinstance(fields, list):
-        log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, description="Template creation failed — fields must be a list")
+        log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, message="template_create_failed", params={"reason": "fields must be a list"})
         return {"error": "fields must be a list"}, 400
 
     allowed_roles = data.get("allowedRoles", ["admin", "psychiatrist", "technician"])
     if not isinstance(allowed_roles, list):
-        log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, description="Template creation failed — allowedRoles must be a list")
+        log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, message="template_create_failed", params={"reason": "allowedRoles must be a list"})
         return {"error": "allowedRoles must be a list"}, 400
 
+    scoring = data.get("scoring")
+    is_valid, error_msg = validate_scoring(scoring, fields)
+    if not is_valid:
+        log_access(g.user.id, "TEMPLATE_CREATE", "templates", "FAILED", ip, message="template_create_failed", params={"reason": error_msg})
+        return {"error": error_msg}, 400
+
     t = FormTemplate(
         tenant_id=g.tenant_id,
         name=name,
         category=category,
         description=(data.get("description") or "").strip() or None,
         fields=fields,
+        scoring=scoring,
         allowed_roles=allowed_roles,
         status="active",
         created_by=g.user.id,
     )
+    t.current_version_id = get_or_create_version(fields, scoring).id
 
     db.session.add(t)
     db.session.commit()
 
-    log_access(g.user.id, "TEMPLATE_CREATE", f"template/{t.id}", "SUCCESS", ip, description=f"Created form template '{t.name}' ({t.category})")
+    log_access(g.user.id, "TEMPLATE_CREATE", f"template/{t.id}", "SUCCESS", ip, message="template_created", params={"name": t.name, "category": t.category})
     return _serialize_template(t), 201
 
 
@@ -143,7 +165,7 @@ def update_template(template_id):
 
     t = FormTemplate.query.get(template_id)
     if not t:
-        log_access(g.user.id, "TEMPLATE_UPDATE", f"template/{template_id}", "FAILED", ip, description=f"Template update failed — template #{template_id} not found")
+        log_access(g.user.id, "TEMPLATE_UPDATE", f"template/{template_id}", "FAILED", ip, message="template_update_not_found", params={"template_id": template_id})
         return {"error": "template not found"}, 404
 
     if "name" in data:
@@ -164,6 +186,18 @@ def update_template(template_id):
         t.fields = data["fields"]
         flag_modified(t, "fields")
 
+    if "scoring" in data:
+        t.scoring = data["scoring"]
+        flag_modified(t, "scoring")
+
+    # Re-check rules whenever fields or scoring change so labels stay in sync
+    if "fields" in data or "scoring" in data:
+        is_valid, error_msg = validate_scoring(t.scoring, t.fields)
+        if not is_valid:
+            return {"error": error_msg}, 400
+        # Never edit a version in place; existing forms keep the one they were filled against
+        t.current_version_id = get_or_create_version(t.fields, t.scoring).id
+
     if "allowedRoles" in data:
         if not isinstance(data["allowedRoles"], list):
             return {"error": "allowedRoles must be a list"}, 400
@@ -179,10 +213,126 @@ def update_template(template_id):
     db.session.commit()
 
     updated_fields = [k for k in data.keys()]
-    log_access(g.user.id, "TEMPLATE_UPDATE", f"template/{t.id}", "SUCCESS", ip, description=f"Updated template '{t.name}' — fields: {', '.join(updated_fields)}")
+    log_access(g.user.id, "TEMPLATE_UPDATE", f"template/{t.id}", "SUCCESS", ip, message="template_updated", params={"name": t.name, "fields": ", ".join(updated_fields)})
     return _serialize_template(t), 200
 
 
+@forms_bp.get("/templates/versions/<content_hash>")
+@require_auth(roles=["admin", "psychiatrist", "technician"])
+def get_template_version(content_hash):
+    """
+    GET /api/templates/versions/<sha256>
+    Versions are immutable, so responses may be cached by the browser indefinitely.
+    Only versions referenced by the caller's tenant are visible.
+    """
+    v = FormTemplateVersion.query.filter_by(content_hash=content_hash).first()
+    in_tenant = v and (
+        tenant_query(FormTemplate).filter(FormTemplate.current_version_id == v.id).first()
+        or tenant_query(PatientForm).filter(PatientForm.template_version_id == v.id).first()
+    )
+    if not in_tenant:
+        return {"error": "template version not found"}, 404
+
+    if etag_matches(v.content_hash):
+        return "", 304, {"ETag": f'"{v.content_hash}"', "Cache-Control": "private, max-age=31536000, immutable"}
+
+    body = {"version": v.content_hash, "fields": v.fields or [], "scoring": v.scoring}
+    return body, 200, {"ETag": f'"{v.content_hash}"', "Cache-Control": "private, max-age=31536000, immutable"}
+
+
+@forms_bp.post("/templates/<int:template_id>/assign")
+@require_auth(roles=["admin", "psychiatrist", "technician"])
+def bulk_assign_template(template_id):
+    """
+    POST /api/templates/<id>/assign
+    Body: {
+      patientIds?: ["PT-001", 12, ...],
+      filter?: {status?, riskLevel?, assignedProviderId?}
+    }
+    Creates an empty draft of the template for every matching patient the
+    caller can access. Patients that already have a draft of it are skipped.
+    """
+    ip = client_ip()
+    data = request.get_json(silent=True) or {}
+
+    template = tenant_query(FormTemplate).filter(FormTemplate.id == template_id).first()
+    if not template or template.status != "active":
+        log_access(g.user.id, "FORM_BULK_ASSIGN", f"template/{template_id}", "FAILED", ip, message="bulk_assign_not_found", params={"template_id": template_id})
+        return {"error": "template not found or archived"}, 404
+
+    patient_ids = data.get("patientIds")
+    filters = data.get("filter") or {}
+    if patient_ids is not None and (not isinstance(patient_ids, list) or not patient_ids):
+        return {"error": "patientIds must be a non-empty list"}, 400
+    if not isinstance(filters, dict):
+        return {"error": "filter must be an object"}, 400
+
+    q = select(Patient.id, Patient.patient_code).where(Patient.tenant_id == g.tenant_id)
+
+    # RBAC: technicians only reach assigned patients
+    if g.user.role == "technician":
+        q = q.where(Patient.assigned_provider_id == g.user.id)
+
+    requested = None
+    if patient_ids is not None:
+        requested = [str(pid).strip() for pid in patient_ids if str(pid).strip()]
+        numeric = [int(pid) for pid in requested if pid.isdigit()]
+        q = q.where(or_(Patient.id.in_(numeric), Patient.patient_code.in_(requested)))
+    elif "status" not in filters:
+        # Cohort sends default to active patients only
+        q = q.where(Patient.status == "active")
+
+    if filters.get("status"):
+        q = q.where(Patient.status == filters["status"])
+    if filters.get("riskLevel"):
+        q = q.where(Patient.risk_level == filters["riskLevel"])
+    if filters.get("assignedProviderId"):
+        try:
+            q = q.where(Patient.assigned_provider_id == int(filters["assignedProviderId"]))
+        except (TypeError, ValueError):
+            return {"error": "assignedProviderId must be an integer"}, 400
+
+    matched = db.session.execute(q).all()
+
+    has_draft = set(db.session.scalars(
+        select(PatientForm.patient_id).where(
+            PatientForm.tenant_id == g.tenant_id,
+            PatientForm.template_id == template.id,
+            PatientForm.status == "draft",
+            PatientForm.patient_id.in_(q.with_only_columns(Patient.id).scalar_subquery()),
+        )
+    ))
+
+    skipped = []
+    if requested is not None:
+        found = {str(pid) for pid, _ in matched} | {code for _, code in matched}
+        skipped.extend({"patientId": pid, "reason": "not found or not accessible"} for pid in requested if pid not in found)
+
+    version_id = ensure_current_version(template)
+    rows = []
+    for pid, code in matched:
+        if pid in has_draft:
+            skipped.append({"patientId": code, "reason": "draft already exists"})
+            continue
+        rows.append({
+            "tenant_id": g.tenant_id,
+            "patient_id": pid,
+            "template_id": template.id,
+            "template_version_id": version_id,
+            "form_data": {},
+            "status": "draft",
+            "filled_by": g.user.id,
+        })
+
+    for start in range(0, len(rows), BULK_INSERT_BATCH):
+        db.session.execute(insert(PatientForm), rows[start:start + BULK_INSERT_BATCH])
+    db.session.commit()
+
+    log_access(g.user.id, "FORM_BULK_ASSIGN", f"template/{template.id}", "SUCCESS", ip, message="bulk_assigned",
+               params={"name": template.name, "created": len(rows), "skipped": len(skipped)})
+    return {"templateId": template.id, "created": len(rows), "skipped": skipped}, 200
+
+
 # ─── PATIENT FORM ENDPOINTS ───
 
 @forms_bp.get("/patients/<patient_id>/forms")
@@ -192,11 +342,11 @@ def list_patient_forms(patient_id):
 
     p = get_patient_by_id_or_code(patient_id)
     if not p:
-        log_access(g.user.id, "FORM_LIST", f"patient/{patient_id}/forms", "FAILED", ip, description=f"Patient '{patient_id}' not found")
+        log_access(g.user.id, "FORM_LIST", f"patient/{patient_id}/forms", "FAILED", ip, message="patient_not_found", params={"patient": patient_id})
         return {"error": "patient not found"}, 404
 
     if not check_patient_access(p):
-        log_access(g.user.id, "FORM_LIST", f"patient/{p.patient_code}/forms", "FAILED", ip, description=f"Access denied to forms for patient {p.patient_code}")
+        log_access(g.user.id, "FORM_LIST", f"patient/{p.patient_code}/forms", "FAILED", ip, message="forms_access_denied", params={"code": p.patient_code})
         return {"error": "forbidden"}, 403
 
     forms = (
@@ -224,27 +374,31 @@ def get_patient_form(patient_id, form_id):
 
     p = get_patient_by_id_or_code(patient_id)
     if not p:
-        log_access(g.user.id, "FORM_GET", f"patient/{patient_id}/forms/{form_id}", "FAILED", ip, description=f"Patient '{patient_id}' not found")
+        log_access(g.user.id, "FORM_GET", f"patient/{patient_id}/forms/{form_id}", "FAILED", ip, message="patient_not_found", params={"patient": patient_id})
         return {"error": "patient not found"}, 404
 
     if not check_patient_access(p):
-        log_access(g.user.id, "FORM_GET", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, description=f"Access denied to form #{form_id} for patient {p.patient_code}")
+        log_access(g.user.id, "FORM_GET", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, message="form_access_denied", params={"form_id": form_id, "code": p.patient_code})
         return {"error": "forbidden"}, 403
 
     f = PatientForm.query.filter_by(id=form_id, patient_id=p.id).first()
     if not f:
-        log_access(g.user.id, "FORM_GET", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, description=f"Form #{form_id} not found for patient {p.patient_code}")
+        log_access(g.user.id, "FORM_GET", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, message="form_not_found", params={"form_id": form_id, "code": p.patient_code})
         return {"error": "form not found"}, 404
 
     # Check role visibility
     template = FormTemplate.query.get(f.template_id)
     if template and g.user.role not in (template.allowed_roles or []):
-        log_access(g.user.id, "FORM_GET", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, description=f"Role '{g.user.role}' not allowed to view form #{form_id}")
+        log_access(g.user.id, "FORM_GET", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, message="form_role_denied", params={"role": g.user.role, "form_id": form_id})
         return {"error": "forbidden"}, 403
 
     data = _serialize_form(f)
-    # Include template fields so frontend can render the form
-    data["templateFields"] = template.fields if template else []
+    # Include the fields of the version this form was filled against so the frontend can render it
+    version = version_snapshot(f.template_version_id)
+    if version:
+        data["templateFields"] = version["fields"]
+    else:
+        data["templateFields"] = template.fields if template else []
 
     return data, 200
 
@@ -257,46 +411,49 @@ def create_patient_form(patient_id):
 
     p = get_patient_by_id_or_code(patient_id)
     if not p:
-        log_access(g.user.id, "FORM_CREATE", f"patient/{patient_id}/forms", "FAILED", ip, description=f"Form creation failed — patient '{patient_id}' not found")
+        log_access(g.user.id, "FORM_CREATE", f"patient/{patient_id}/forms", "FAILED", ip, message="form_create_patient_not_found", params={"patient": patient_id})
         return {"error": "patient not found"}, 404
 
     if not check_patient_access(p):
-        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, description=f"Access denied to create form for patient {p.patient_code}")
+        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, message="form_create_denied", params={"code": p.patient_code})
         return {"error": "forbidden"}, 403
 
     template_id = data.get("templateId")
     if not template_id:
-        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, description="Form creation failed — templateId is required")
+        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, message="form_create_failed", params={"reason": "templateId is required"})
         return {"error": "templateId is required"}, 400
 
     template = FormTemplate.query.get(template_id)
     if not template or template.status != "active":
-        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, description=f"Form creation failed — template #{template_id} not found or archived")
+        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, message="form_create_failed", params={"reason": f"template #{template_id} not found or archived"})
         return {"error": "template not found or archived"}, 404
 
     form_data = data.get("formData", {})
     if not isinstance(form_data, dict):
-        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, description="Form creation failed — formData must be an object")
+        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, message="form_create_failed", params={"reason": "formData must be an object"})
         return {"error": "formData must be an object"}, 400
 
     status = (data.get("status") or "draft").strip()
     if status not in {"draft", "completed"}:
-        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, description=f"Form creation failed — invalid status '{status}'")
+        log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms", "FAILED", ip, message="form_create_failed", params={"reason": f"invalid status '{status}'"})
         return {"error": "status must be draft or completed"}, 400
 
     f = PatientForm(
         tenant_id=g.tenant_id,
         patient_id=p.id,
-        template_id=template_id,
+        template_id=template.id,
+        template_version_id=ensure_current_version(template),
         form_data=form_data,
         status=status,
         filled_by=g.user.id,
     )
+    apply_form_score(f, template)
 
     db.session.add(f)
     db.session.commit()
 
-    log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms/{f.id}", "SUCCESS", ip, description=f"Added '{template.name}' form to {p.first_name} {p.last_name} ({p.patient_code})")
+    log_access(g.user.id, "FORM_CREATE", f"patient/{p.patient_code}/forms/{f.id}", "SUCCESS", ip, message="form_created",
+               params={"template": template.name, "name": f"{p.first_name} {p.last_name}", "code": p.patient_code})
     return _serialize_form(f), 201
 
 
@@ -308,16 +465,16 @@ def update_patient_form(patient_id, form_id):
 
     p = get_patient_by_id_or_code(patient_id)
     if not p:
-        log_access(g.user.id, "FORM_UPDATE", f"patient/{patient_id}/forms/{form_id}", "FAILED", ip, description=f"Form update failed — patient '{patient_id}' not found")
+        log_access(g.user.id, "FORM_UPDATE", f"patient/{patient_id}/forms/{form_id}", "FAILED", ip, message="form_update_patient_not_found", params={"patient": patient_id})
         return {"error": "patient not found"}, 404
 
     if not check_patient_access(p):
-        log_access(g.user.id, "FORM_UPDATE", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, description=f"Access denied to update form #{form_id} for patient {p.patient_code}")
+        log_access(g.user.id, "FORM_UPDATE", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, message="form_update_denied", params={"form_id": form_id, "code": p.patient_code})
         return {"error": "forbidden"}, 403
 
     f = PatientForm.query.filter_by(id=form_id, patient_id=p.id).first()
     if not f:
-        log_access(g.user.id, "FORM_UPDATE", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, description=f"Form #{form_id} not found for patient {p.patient_code}")
+        log_access(g.user.id, "FORM_UPDATE", f"patient/{p.patient_code}/forms/{form_id}", "FAILED", ip, message="form_not_found", params={"form_id": form_id, "code": p.patient_code})
         return {"error": "form not found"}, 404
 
     if "formData" in data:
@@ -325,6 +482,7 @@ def update_patient_form(patient_id, form_id):
             return {"error": "formData must be an object"}, 400
         f.form_data = data["formData"]
         flag_modified(f, "form_data")
+        apply_form_score(f, FormTemplate.query.get(f.template_id))
 
     if "status" in data:
         status = (data["status"] or "").strip()
@@ -337,9 +495,11 @@ def update_patient_form(patient_id, form_id):
     template = FormTemplate.query.get(f.template_id)
     tpl_name = template.name if template else f"form #{f.id}"
     if "status" in data and data["status"] == "completed":
-        log_access(g.user.id, "FORM_SIGN", f"patient/{p.patient_code}/forms/{f.id}", "SUCCESS", ip, description=f"Signed and completed '{tpl_name}' for {p.first_name} {p.last_name} ({p.patient_code})")
+        log_access(g.user.id, "FORM_SIGN", f"patient/{p.patient_code}/forms/{f.id}", "SUCCESS", ip, message="form_signed",
+                   params={"template": tpl_name, "name": f"{p.first_name} {p.last_name}", "code": p.patient_code})
     else:
-        log_access(g.user.id, "FORM_UPDATE", f"patient/{p.patient_code}/forms/{f.id}", "SUCCESS", ip, description=f"Saved draft of '{tpl_name}' for {p.first_name} {p.last_name} ({p.patient_code})")
+        log_access(g.user.id, "FORM_UPDATE", f"patient/{p.patient_code}/forms/{f.id}", "SUCCESS", ip, message="form_draft_saved",
+                   params={"template": tpl_name, "name": f"{p.first_name} {p.last_name}", "code": p.patient_code})
     return _serialize_form(f), 200
 
 @forms_bp.delete("/patients/<patient_id>/forms/<int:form_id>")
@@ -366,6 +526,7 @@ def delete_patient_form(patient_id, form_id):
 
     db.session.delete(f)
     db.session.commit()
-    log_access(g.user.id, "FORM_DELETE", f"patient/{p.patient_code}/forms/{form_id}", "SUCCESS", ip, description=f"Deleted '{tpl_name}' from {p.first_name} {p.last_name} ({p.patient_code})")
+    log_access(g.user.id, "FORM_DELETE", f"patient/{p.patient_code}/forms/{form_id}", "SUCCESS", ip, message="form_deleted",
+               params={"template": tpl_name, "name": f"{p.first_name} {p.last_name}", "code": p.patient_code})
     
     return {"ok": True}, 200
@@ -42,7 +42,7 @@ def _serialize_patient(p: Patient):
         "id": p.patient_code,
         "firstName": p.first_name,
         "lastName": p.last_name,
-        "dateOfBirth": p.date_of_birth.isoformat() if p.date_of_birth else None,
+        "dateOfBirth": p.date_of_birth,
         "phone": p.phone,
         "email": p.email,
         "status": p.status,
@@ -78,12 +78,12 @@ def _serialize_treatment_plan(tp: TreatmentPlan):
     return {
         "id": tp.id,
         "patientId": tp.patient_id,
-        "startDate": tp.start_date.isoformat() if tp.start_date else None,
-        "reviewDate": tp.review_date.isoformat() if tp.review_date else None,
+        "startDate": tp.start_date,
+        "reviewDate": tp.review_date,
         "goals": tp.goals,
         "status": tp.status,
-        "createdAt": created.isoformat() if created else None,
-        "updatedAt": updated.isoformat() if updated else None,
+        "createdAt": created,
+        "updatedAt": updated,
     }
 
 
@@ -152,12 +152,12 @@ def get_patient(patient_id):
         p = Patient.query.filter_by(patient_code=patient_id).first()
 
     if not p:
-        log_access(g.user.id, "PATIENT_GET", f"patient/{patient_id}", "FAILED", ip, description=f"Patient '{patient_id}' not found")
+        log_access(g.user.id, "PATIENT_GET", f"patient/{patient_id}", "FAILED", ip, message="patient_not_found", params={"patient": patient_id})
         return {"error": "patient not found"}, 404
 
     if g.user.role == "technician":
         if not p.assigned_provider_id or p.assigned_provider_id != g.user.id:
-            log_access(g.user.id, "PATIENT_GET", f"patient/{p.patient_code}", "FAILED", ip, description=f"Access denied to patient {p.patient_code} — not assigned provider")
+            log_access(g.user.id, "PATIENT_GET", f"patient/{p.patient_code}", "FAILED", ip, message="patient_access_denied", params={"code": p.patient_code})
             return {"error": "forbidden"}, 403
 
     tp = (
@@ -167,7 +167,8 @@ def get_patient(patient_id):
         .first()
     )
 
-    log_access(g.user.id, "PATIENT_GET", f"patient/{p.patient_code}", "SUCCESS", ip, description=f"Viewed patient record for {p.first_name} {p.last_name} ({p.patient_code})")
+    log_access(g.user.id, "PATIENT_GET", f"patient/{p.patient_code}", "SUCCESS", ip, message="patient_viewed",
+               params={"name": f"{p.first_name} {p.last_name}", "code": p.patient_code})
 
     return {
         **_serialize_patient(p),
@@ -197,23 +198,23 @@ def create_patient():
     last_name = (data.get("lastName") or "").strip()
 
     if not first_name or not last_name:
-        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, description="Patient creation failed — missing first or last name")
+        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, message="patient_create_failed", params={"reason": "missing first or last name"})
         return {"error": "firstName and lastName are required"}, 400
 
     dob = parse_date_iso(data.get("dateOfBirth"))
     if dob == "INVALID":
-        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, description="Patient creation failed — invalid date of birth format")
+        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, message="patient_create_failed", params={"reason": "invalid date of birth format"})
         return {"error": "dateOfBirth must be YYYY-MM-DD"}, 400
 
     status = (data.get("status") or "active").strip()
     risk = (data.get("riskLevel") or "low").strip()
 
     if status not in VALID_STATUS:
-        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, description=f"Patient creation failed — invalid status '{status}'")
+        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, message="patient_create_failed", params={"reason": f"invalid status '{status}'"})
         return {"error": f"status must be one of {sorted(VALID_STATUS)}"}, 400
 
     if risk not in VALID_RISK:
-        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, description=f"Patient creation failed — invalid risk level '{risk}'")
+        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, message="patient_create_failed", params={"reason": f"invalid risk level '{risk}'"})
         return {"error": f"riskLevel must be one of {sorted(VALID_RISK)}"}, 400
 
     #assigned provider handling
@@ -228,11 +229,11 @@ def create_patient():
         try:
             assigned_provider_id = int(assigned_provider_id)
         except ValueError:
-            log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, description="Patient creation failed — assignedProviderId must be an integer")
+            log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, message="patient_create_failed", params={"reason": "assignedProviderId must be an integer"})
             return {"error": "assignedProviderId must be an integer"}, 400
 
         if not User.query.get(assigned_provider_id):
-            log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, description=f"Patient creation failed — provider #{assigned_provider_id} not found")
+            log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, message="patient_create_failed", params={"reason": f"provider #{assigned_provider_id} not found"})
             return {"error": "assignedProviderId does not exist"}, 400
 
     patient_code = (data.get("patientCode") or "").strip()
@@ -240,7 +241,7 @@ def create_patient():
         # validate uniqueness if provided
         existing = Patient.query.filter_by(patient_code=patient_code).first()
         if existing:
-            log_access(g.user.id, "PATIENT_CREATE", f"patient/{patient_code}", "FAILED", ip, description=f"Patient creation failed — code '{patient_code}' already exists")
+            log_access(g.user.id, "PATIENT_CREATE", f"patient/{patient_code}", "FAILED", ip, message="patient_create_failed", params={"reason": f"code '{patient_code}' already exists"})
             return {"error": "patientCode already exists"}, 409
     else:
         patient_code = _next_patient_code()
@@ -248,7 +249,7 @@ def create_patient():
     # SSN validation (last 4 digits only)
     ssn_last4 = (data.get("ssnLast4") or "").strip()
     if ssn_last4 and (len(ssn_last4) != 4 or not ssn_last4.isdigit()):
-        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, description="Patient creation failed — ssnLast4 must be exactly 4 digits")
+        log_access(g.user.id, "PATIENT_CREATE", "patient", "FAILED", ip, message="patient_create_failed", params={"reason": "ssnLast4 must be exactly 4 digits"})
         return {"error": "ssnLast4 must be exactly 4 digits"}, 400
 
     p = Patient(
@@ -304,12 +305,12 @@ def update_patient(patient_id):
 
     p = get_patient_by_id_or_code(patient_id)
     if not p:
-        log_access(g.user.id, "PATIENT_UPDATE", f"patient/{patient_id}", "FAILED", ip, description=f"Patient update failed — '{patient_id}' not found")
+        log_access(g.user.id, "PATIENT_UPDATE", f"patient/{patient_id}", "FAILED", ip, message="patient_update_not_found", params={"patient": patient_id})
         return {"error": "patient not found"}, 404
 
     #technician can only update assigned
     if g.user.role == "technician" and p.assigned_provider_id != g.user.id:
-        log_access(g.user.id, "PATIENT_UPDATE", f"patient/{p.patient_code}", "FAILED", ip, description=f"Access denied to update patient {p.patient_code} — not assigned provider")
+        log_access(g.user.id, "PATIENT_UPDATE", f"patient/{p.patient_code}", "FAILED", ip, message="patient_update_denied", params={"code": p.patient_code})
         return {"error": "forbidden"}, 403
 
     #Update allowed fields
@@ -438,6 +439,7 @@ def update_patient(patient_id):
     db.session.commit()
 
     updated_fields = [k for k in data.keys() if k != "patientCode"]
-    log_access(g.user.id, "PATIENT_UPDATE", f"patient/{p.patient_code}", "SUCCESS", ip, description=f"Updated patient {p.first_name} {p.last_name} ({p.patient_code}) — fields: {', '.join(updated_fields)}")
+    log_access(g.user.id, "PATIENT_UPDATE", f"patient/{p.patient_code}", "SUCCESS", ip, message="patient_updated",
+               params={"name": f"{p.first_name} {p.last_name}", "code": p.patient_code, "fields": ", ".join(updated_fields)})
     return _serialize_patient(p), 200
 
@@ -1,12 +1,14 @@
 # User management (IT admin)
 from flask import Blueprint, request, g
 from datetime import datetime, timezone
+from sqlalchemy import or_
 
 from auth_middleware import require_auth
 from extensions import db
 from models import User
 from services.audit_logger import log_access
 from services.helpers import client_ip, tenant_query
+from services.user_provisioning import ProvisioningConflict, ProvisioningError, provision_users
 from werkzeug.security import generate_password_hash
 
 users_bp = Blueprint("users", __name__, url_prefix="/api/users")
@@ -23,7 +25,8 @@ def _serialize_user(u: User):
         "is_locked": is_temp_locked or u.permanently_locked,
         "permanently_locked": u.permanently_locked,
         "locked_until": u.locked_until.isoformat() if u.locked_until else None,
-        "last_login": None,
+        "last_login": u.last_login.isoformat() if u.last_login else None,
+        "last_seen": u.last_seen.isoformat() if u.last_seen else None,
     }
 
 
@@ -31,12 +34,30 @@ def _serialize_user(u: User):
 @require_auth(roles=["admin"])
 def list_users():
     """
-    GET /api/users
-    Admin only
+    GET /api/users?role=technician&locked=1|0&limit=100&after_id=...
+    Admin only. Ordered by id; pass nextAfterId back as after_id for the next page.
+    locked=1 covers both temporary and permanent locks.
     """
-    users = tenant_query(User).order_by(User.id.asc()).all()
-
-    return [_serialize_user(u) for u in users], 200
+    role = (request.args.get("role") or "").strip()
+    locked = request.args.get("locked")
+    try:
+        limit = min(max(int(request.args.get("limit", "100")), 1), 500)
+        after_id = int(request.args.get("after_id", "0"))
+    except ValueError:
+        return {"error": "limit/after_id must be integers"}, 400
+
+    q = tenant_query(User).filter(User.id > after_id)
+    if role:
+        q = q.filter(User.role == role)
+    now = datetime.now(timezone.utc)
+    if locked in ("1", "true"):
+        q = q.filter(or_(User.permanently_locked.is_(True), User.locked_until > now))
+    elif locked in ("0", "false"):
+        q = q.filter(User.permanently_locked.is_(False), or_(User.locked_until.is_(None), User.locked_until <= now))
+
+    users = q.order_by(User.id.asc()).limit(limit).all()
+    items = [_serialize_user(u) for u in users]
+    return {"items": items, "nextAfterId": items[-1]["id"] if len(items) == limit else None}, 200
 
 
 @users_bp.post("/<int:user_id>/unlock")
@@ -49,7 +70,7 @@ def unlock_user(user_id: int):
     ip = client_ip()
     u = User.query.get(user_id)
     if not u:
-        log_access(g.user.id, "USER_UNLOCK", f"user/{user_id}", "FAILED", ip, description=f"Failed to unlock user #{user_id} — not found")
+        log_access(g.user.id, "USER_UNLOCK", f"user/{user_id}", "FAILED", ip, message="user_unlock_not_found", params={"user_id": user_id})
         return {"error": "user not found"}, 404
 
     u.failed_login_attempts = 0
@@ -57,7 +78,7 @@ def unlock_user(user_id: int):
     u.permanently_locked = False
     db.session.commit()
 
-    log_access(g.user.id, "USER_UNLOCK", f"user/{u.id}", "SUCCESS", ip, description=f"Unlocked account for '{u.username}' ({u.role})")
+    log_access(g.user.id, "USER_UNLOCK", f"user/{u.id}", "SUCCESS", ip, message="user_unlocked", params={"username": u.username, "role": u.role})
     return {"ok": True, "user": _serialize_user(u)}, 200
 
 
@@ -71,17 +92,17 @@ def lock_user(user_id: int):
     ip = client_ip()
     u = User.query.get(user_id)
     if not u:
-        log_access(g.user.id, "USER_LOCK", f"user/{user_id}", "FAILED", ip, description=f"Failed to lock user #{user_id} — not found")
+        log_access(g.user.id, "USER_LOCK", f"user/{user_id}", "FAILED", ip, message="user_lock_not_found", params={"user_id": user_id})
         return {"error": "user not found"}, 404
 
     if u.id == g.user.id:
-        log_access(g.user.id, "USER_LOCK", f"user/{user_id}", "FAILED", ip, description="Attempted to lock own account — denied")
+        log_access(g.user.id, "USER_LOCK", f"user/{user_id}", "FAILED", ip, message="user_lock_self")
         return {"error": "cannot lock your own account"}, 400
 
     u.permanently_locked = True
     db.session.commit()
 
-    log_access(g.user.id, "USER_LOCK", f"user/{u.id}", "SUCCESS", ip, description=f"Permanently locked account for '{u.username}' ({u.role})")
+    log_access(g.user.id, "USER_LOCK", f"user/{u.id}", "SUCCESS", ip, message="user_locked", params={"username": u.username, "role": u.role})
     return {"ok": True, "user": _serialize_user(u)}, 200
 
 
@@ -100,12 +121,12 @@ def reset_password(user_id: int):
     from services.password_validator import validate_password
     is_valid, error_msg = validate_password(new_password)
     if not is_valid:
-        log_access(g.user.id, "USER_RESET_PASSWORD", f"user/{user_id}", "FAILED", ip, description=f"Password reset failed for user #{user_id} — {error_msg}")
+        log_access(g.user.id, "USER_RESET_PASSWORD", f"user/{user_id}", "FAILED", ip, message="password_reset_invalid", params={"user_id": user_id, "reason": error_msg})
         return {"error": error_msg}, 400
 
     u = User.query.get(user_id)
     if not u:
-        log_access(g.user.id, "USER_RESET_PASSWORD", f"user/{user_id}", "FAILED", ip, description=f"Password reset failed — user #{user_id} not found")
+        log_access(g.user.id, "USER_RESET_PASSWORD", f"user/{user_id}", "FAILED", ip, message="password_reset_not_found", params={"user_id": user_id})
         return {"error": "user not found"}, 404
 
     u.password_hash = generate_password_hash(new_password)
@@ -114,7 +135,7 @@ def reset_password(user_id: int):
     u.permanently_locked = False
     db.session.commit()
 
-    log_access(g.user.id, "USER_RESET_PASSWORD", f"user/{u.id}", "SUCCESS", ip, description=f"Reset password for '{u.username}' ({u.role})")
+    log_access(g.user.id, "USER_RESET_PASSWORD", f"user/{u.id}", "SUCCESS", ip, message="password_reset", params={"username": u.username, "role": u.role})
     return {"ok": True}, 200
 
 
@@ -131,7 +152,7 @@ def update_user(user_id: int):
 
     u = User.query.get(user_id)
     if not u:
-        log_access(g.user.id, "USER_UPDATE", f"user/{user_id}", "FAILED", ip, description=f"User #{user_id} not found")
+        log_access(g.user.id, "USER_UPDATE", f"user/{user_id}", "FAILED", ip, message="user_not_found", params={"user_id": user_id})
         return {"error": "user not found"}, 404
 
     changes = []
@@ -144,7 +165,7 @@ def update_user(user_id: int):
             return {"error": "username must be at least 3 characters"}, 400
         existing = tenant_query(User).filter_by(username=new_username).first()
         if existing and existing.id != u.id:
-            log_access(g.user.id, "USER_UPDATE", f"user/{user_id}", "FAILED", ip, description=f"Username '{new_username}' already taken")
+            log_access(g.user.id, "USER_UPDATE", f"user/{user_id}", "FAILED", ip, message="username_taken", params={"username": new_username})
             return {"error": "username already exists"}, 409
         changes.append(f"username '{u.username}' → '{new_username}'")
         u.username = new_username
@@ -154,7 +175,7 @@ def update_user(user_id: int):
         if new_role not in {"admin", "psychiatrist", "technician"}:
             return {"error": "role must be admin, psychiatrist, or technician"}, 400
         if u.id == g.user.id and new_role != u.role:
-            log_access(g.user.id, "USER_UPDATE", f"user/{user_id}", "FAILED", ip, description="Attempted to change own role — denied")
+            log_access(g.user.id, "USER_UPDATE", f"user/{user_id}", "FAILED", ip, message="role_change_self")
             return {"error": "cannot change your own role"}, 400
         changes.append(f"role '{u.role}' → '{new_role}'")
         u.role = new_role
@@ -169,7 +190,7 @@ def update_user(user_id: int):
 
     db.session.commit()
 
-    log_access(g.user.id, "USER_UPDATE", f"user/{u.id}", "SUCCESS", ip, description=f"Updated user '{u.username}': {', '.join(changes)}")
+    log_access(g.user.id, "USER_UPDATE", f"user/{u.id}", "SUCCESS", ip, message="user_updated", params={"username": u.username, "changes": ", ".join(changes)})
     return {"ok": True, "user": _serialize_user(u)}, 200
 
 @users_bp.post("/")
@@ -189,22 +210,22 @@ def create_user():
     full_name = (data.get("full_name") or "").strip() or None
 
     if not username or len(username) < 3:
-        log_access(g.user.id, "USER_CREATE", "users", "FAILED", ip, description="User creation failed — username must be at least 3 characters")
+        log_access(g.user.id, "USER_CREATE", "users", "FAILED", ip, message="user_create_failed", params={"reason": "username must be at least 3 characters"})
         return {"error": "username must be at least 3 characters"}, 400
 
     from services.password_validator import validate_password
     is_valid, error_msg = validate_password(password)
     if not is_valid:
-        log_access(g.user.id, "USER_CREATE", "users", "FAILED", ip, description=f"User creation failed — {error_msg} for '{username}'")
+        log_access(g.user.id, "USER_CREATE", "users", "FAILED", ip, message="user_create_failed", params={"reason": f"{error_msg} for '{username}'"})
         return {"error": error_msg}, 400
 
     if role not in {"admin", "psychiatrist", "technician"}:
-        log_access(g.user.id, "USER_CREATE", "users", "FAILED", ip, description=f"User creation failed — invalid role '{role}'")
+        log_access(g.user.id, "USER_CREATE", "users", "FAILED", ip, message="user_create_failed", params={"reason": f"invalid role '{role}'"})
         return {"error": "role must be admin, psychiatrist, or technician"}, 400
 
     existing = tenant_query(User).filter_by(username=username).first()
     if existing:
-        log_access(g.user.id, "USER_CREATE", "users", "FAILED", ip, description=f"User creation failed — username '{username}' already exists")
+        log_access(g.user.id, "USER_CREATE", "users", "FAILED", ip, message="user_create_failed", params={"reason": f"username '{username}' already exists"})
         return {"error": "username already exists"}, 409
 
     u = User(
@@ -218,5 +239,43 @@ def create_user():
     db.session.add(u)
     db.session.commit()
 
-    log_access(g.user.id, "USER_CREATE", f"user/{u.id}", "SUCCESS", ip, description=f"Created user '{u.username}' ({u.role}){' — ' + u.full_name if u.full_name else ''}")
+    log_access(g.user.id, "USER_CREATE", f"user/{u.id}", "SUCCESS", ip, message="user_created_named" if u.full_name else "user_created",
+               params={"username": u.username, "role": u.role, "full_name": u.full_name})
     return {"ok": True, "user": _serialize_user(u)}, 201
+
+
+@users_bp.post("/bulk")
+@require_auth(roles=["admin"])
+def bulk_create_users():
+    """
+    POST /api/users/bulk[?dry_run=1]
+    Body: a CSV (Content-Type: text/csv, or a multipart "file" upload) with the header
+    username,password,role,full_name. Admin only.
+    All rows are validated first; if any is invalid nothing is created and the
+    per-row errors are returned with a 400. dry_run only validates. A username
+    taken by a concurrent request between validation and insert returns a 409.
+    """
+    ip = client_ip()
+    upload = request.files.get("file")
+    raw = upload.read() if upload else request.get_data()
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"error": "CSV must be UTF-8"}, 400
+
+    dry_run = request.args.get("dry_run") in ("1", "true")
+    try:
+        result = provision_users(g.tenant_id, text, actor_id=g.user.id, ip=ip, dry_run=dry_run)
+    except ProvisioningConflict as e:
+        log_access(g.user.id, "USER_BULK_CREATE", "users", "FAILED", ip, message="user_create_failed", params={"reason": str(e)})
+        return {"error": str(e)}, 409
+    except ProvisioningError as e:
+        log_access(g.user.id, "USER_BULK_CREATE", "users", "FAILED", ip, message="user_create_failed", params={"reason": str(e)})
+        return {"error": str(e)}, 400
+
+    if result["errors"]:
+        return {"error": f"{len(result['errors'])} of {result['rows']} rows are invalid; no users were created",
+                "rows": result["rows"], "errors": result["errors"]}, 400
+    if dry_run:
+        return {"ok": True, "dry_run": True, "rows": result["rows"], "errors": []}, 200
+    return {"ok": True, "rows": result["rows"], "users": [_serialize_user(u) for u in result["created"]]}, 201
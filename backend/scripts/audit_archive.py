@@ -0,0 +1,59 @@
+# audit_log partition maintenance and cold archival; meant to run from cron/a scheduler
+#
+#   python scripts/audit_archive.py partitions [--months-ahead 2]
+#   python scripts/audit_archive.py archive [--older-than-months 12] [--archive-dir DIR]
+#   python scripts/audit_archive.py verify [--archive-dir DIR]
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from services.audit_archive import ensure_partitions, archive_old_months, verify_archive
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="audit_log partitioning and archival")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_parts = sub.add_parser("partitions", help="create upcoming monthly partitions (Postgres)")
+    p_parts.add_argument("--months-ahead", type=int, default=2)
+
+    p_archive = sub.add_parser("archive", help="move old months to compressed NDJSON segments")
+    p_archive.add_argument("--older-than-months", type=int, default=None)
+    p_archive.add_argument("--archive-dir", default=None)
+
+    p_verify = sub.add_parser("verify", help="check archived segment checksums")
+    p_verify.add_argument("--archive-dir", default=None)
+
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.command == "partitions":
+            created = ensure_partitions(months_ahead=args.months_ahead)
+            print(f"Created partitions: {', '.join(created)}" if created else "Partitions up to date.")
+
+        elif args.command == "archive":
+            # Make sure the month being written into has a partition before old ones are dropped
+            ensure_partitions()
+            summaries = archive_old_months(args.older_than_months, args.archive_dir)
+            for s in summaries:
+                print(f"{s['month']}: archived {s['rows']} rows for {s['tenants']} tenants")
+            if not summaries:
+                print("Nothing to archive.")
+
+        elif args.command == "verify":
+            problems = verify_archive(args.archive_dir)
+            for p in problems:
+                print(f"  - {p}")
+            print("Archive OK." if not problems else f"{len(problems)} problem(s) found.")
+            if problems:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
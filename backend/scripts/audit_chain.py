@@ -0,0 +1,56 @@
+# Verifies or checkpoints the audit_log hash chain (see services/audit_chain.py)
+#
+#   python scripts/audit_chain.py verify [tenant_slug] [--workers N]
+#   python scripts/audit_chain.py checkpoint
+#
+# verify exits 1 when any tenant's chain is broken, printing the first broken entry id.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from services.audit_chain import checkpoint_heads, verify_chain
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="audit_log hash chain")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_verify = sub.add_parser("verify", help="check every entry's hash against its predecessor")
+    p_verify.add_argument("tenant_slug", nargs="?", help="limit to one tenant")
+    p_verify.add_argument("--workers", type=int, default=None, help="processes to verify segments in (default: CPU count)")
+
+    sub.add_parser("checkpoint", help="record the current chain head of every tenant")
+
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.command == "checkpoint":
+            print(f"{checkpoint_heads()} checkpoints written")
+            return
+
+        started = time.monotonic()
+        reports = verify_chain(args.tenant_slug, workers=args.workers)
+        if args.tenant_slug and not reports:
+            print(f"Tenant '{args.tenant_slug}' not found.")
+            sys.exit(1)
+
+        broken = False
+        for r in reports:
+            if r["broken_id"] is None:
+                print(f"{r['tenant']}: OK — {r['rows']:,} entries in {r['segments']} segments")
+            else:
+                broken = True
+                print(f"{r['tenant']}: BROKEN at entry {r['broken_id']} — {r['reason']}")
+        print(f"verified in {time.monotonic() - started:.1f}s")
+        sys.exit(1 if broken else 0)
+
+
+if __name__ == "__main__":
+    main()
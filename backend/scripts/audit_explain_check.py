@@ -0,0 +1,207 @@
+# EXPLAIN harness for the audit endpoints (Postgres only)
+#
+# Seeds a scratch tenant with synthetic audit rows (1M by default), runs the
+# real /logs, /stats and /export queries through EXPLAIN and checks that each
+# plan uses the composite index it was designed for, and that date-ranged
+# queries only scan the monthly partitions covering the range. Monthly
+# partitions are created for the whole seeded span first, so the plans are
+# those of the production layout rather than of one big default partition.
+# Exits non-zero on a miss.
+#
+#   python scripts/audit_explain_check.py [--rows 1000000] [--keep]
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import g
+from sqlalchemy import select, text
+
+from app import create_app
+from extensions import db
+from models import AuditLog, AuditRollupHourly, Tenant
+from routes.audit import _apply_log_filters, _patient_condition
+from services.audit_archive import add_months, ensure_partitions, month_start, partition_name
+from services.audit_codes import ACTIONS, RESOURCE_TYPES, STATUSES
+
+app = create_app()
+
+SCRATCH_SLUG = "explain-check"
+SEED_INTERVAL_SECONDS = 20
+
+
+def _months_between(start: datetime, end: datetime) -> int:
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def _partitions_for(start: datetime, end: datetime) -> set:
+    """Monthly partition names overlapping [start, end)."""
+    names, month = set(), month_start(start)
+    while month < end:
+        names.add(partition_name(month))
+        month = add_months(month, 1)
+    return names
+
+
+def _seed(tenant_id: int, rows: int) -> None:
+    # One row every SEED_INTERVAL_SECONDS going back from now; action/status mix roughly like production
+    actions = [ACTIONS[a] for a in ("PATIENT_GET", "LOGIN", "FORM_UPDATE", "PATIENT_UPDATE", "ACCESS_403", "TREATMENTPLAN_UPSERT")]
+    db.session.execute(text("""
+        INSERT INTO audit_log (tenant_id, "timestamp", user_id, action, resource_type, resource_key, ip_address, status)
+        SELECT :tid,
+               now() - (g * :interval * interval '1 second'),
+               1 + g % 25,
+               (:actions)[1 + g % 6],
+               :patient,
+               'PT-' || lpad((g % 500)::text, 3, '0'),
+               ('10.0.0.' || (g % 250))::inet,
+               CASE WHEN g % 11 = 0 THEN :failed ELSE :success END
+        FROM generate_series(1, :n) AS g
+    """), {
+        "tid": tenant_id, "n": rows, "interval": SEED_INTERVAL_SECONDS, "actions": actions, "patient": RESOURCE_TYPES["patient"],
+        "failed": STATUSES["FAILED"], "success": STATUSES["SUCCESS"],
+    })
+    db.session.commit()
+    db.session.execute(text("ANALYZE audit_log"))
+    db.session.commit()
+
+
+def _index_parents() -> dict:
+    # Partition indexes are auto-named; map them back to the parent index we created
+    rows = db.session.execute(text("""
+        SELECT c.relname, p.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relkind = 'I'
+    """)).all()
+    return dict(rows)
+
+
+def _plan(stmt) -> dict:
+    conn = db.session.connection()
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    return conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()[0]["Plan"]
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def _check(name, stmt, expected: set, parents: dict, forbid_tables=(), partitions: set | None = None) -> bool:
+    """
+    Passes when the plan uses one of the expected indexes, touches none of forbid_tables
+    and, if partitions is given, scans no audit_log partition outside it (pruning worked).
+    """
+    plan = _plan(stmt)
+    nodes = list(_walk(plan))
+    used = {parents.get(n["Index Name"], n["Index Name"]) for n in nodes if "Index Name" in n}
+    relations = {n.get("Relation Name", "") for n in nodes}
+
+    ok = bool(used & expected) if expected else True
+    if any(r.startswith(t) for r in relations for t in forbid_tables):
+        ok = False
+    scanned = {r for r in relations if r.startswith("audit_log_")}
+    if partitions is not None and not scanned <= partitions:
+        ok = False
+
+    pruning = f" partitions={sorted(scanned)}" if partitions is not None else ""
+    print(f"[{'PASS' if ok else 'FAIL'}] {name}: indexes={sorted(used) or '-'}{pruning}")
+    if not ok:
+        print(json.dumps(plan, indent=2))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check audit query plans against the composite indexes")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tenant and its rows")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            print("EXPLAIN checks need PostgreSQL.")
+            sys.exit(2)
+
+        tenant = Tenant.query.filter_by(slug=SCRATCH_SLUG).first()
+        if not tenant:
+            tenant = Tenant(name="EXPLAIN check", slug=SCRATCH_SLUG, status="active")
+            db.session.add(tenant)
+            db.session.commit()
+            # Partitions from the oldest seeded month through two months ahead, as in production
+            now = datetime.now(timezone.utc)
+            oldest = now - timedelta(seconds=args.rows * SEED_INTERVAL_SECONDS)
+            ensure_partitions(months_ahead=_months_between(oldest, now) + 2, now=oldest)
+            print(f"Seeding {args.rows:,} audit rows...")
+            _seed(tenant.id, args.rows)
+
+        in_default = db.session.execute(
+            text("SELECT count(*) FROM audit_log_default WHERE tenant_id = :tid"), {"tid": tenant.id}
+        ).scalar()
+        layout_ok = in_default == 0
+        print(f"[{'PASS' if layout_ok else 'FAIL'}] seeded rows in monthly partitions: {in_default:,} in audit_log_default")
+
+        parents = _index_parents()
+        today = date.today()
+        week_ago = (today - timedelta(days=7)).isoformat()
+        # date_from/date_to are whole UTC days, date_to inclusive (_apply_log_filters)
+        week_start = datetime.fromisoformat(week_ago).replace(tzinfo=timezone.utc)
+        week_end = datetime(today.year, today.month, today.day, tzinfo=timezone.utc) + timedelta(days=1)
+        week_partitions = _partitions_for(week_start, week_end)
+        # Without date_to the range runs past the last partition, so the default one stays in
+        open_partitions = _partitions_for(week_start, add_months(month_start(week_end), 3)) | {"audit_log_default"}
+
+        def logs_query(**filters):
+            with app.test_request_context(query_string=filters):
+                g.tenant_id = tenant.id
+                stmt, _ = _apply_log_filters(select(AuditLog), filters)
+                return stmt
+
+        checks = [
+            ("/logs first page", logs_query().order_by(AuditLog.id.desc()).limit(200),
+             {"ix_audit_log_tenant_id_desc"}, None),
+            ("/logs next page", logs_query().where(AuditLog.id < 500_000).order_by(AuditLog.id.desc()).limit(200),
+             {"ix_audit_log_tenant_id_desc"}, None),
+            ("/logs action+status", logs_query(action="ACCESS_403", status="FAILED").order_by(AuditLog.id.desc()).limit(200),
+             {"ix_audit_log_tenant_action_status_ts"}, None),
+            ("/logs date range", logs_query(date_from=week_ago, date_to=today.isoformat()).order_by(AuditLog.id.desc()).limit(200),
+             {"ix_audit_log_tenant_timestamp", "ix_audit_log_tenant_id_desc"}, week_partitions),
+            ("/logs resource type+key prefix", logs_query(resource_contains="patient/PT-04").order_by(AuditLog.id.desc()).limit(200),
+             {"ix_audit_log_tenant_resource_lower", "ix_audit_log_resource_key_trgm"}, None),
+            ("/logs resource free text", logs_query(resource_contains="T-123").with_only_columns(AuditLog.id),
+             {"ix_audit_log_resource_key_trgm"}, None),
+            ("/patients access history", logs_query().where(_patient_condition("PT-042")).order_by(AuditLog.id.desc()).limit(100),
+             {"ix_audit_log_tenant_resource"}, None),
+            ("/logs count action+status+range", logs_query(action="LOGIN", status="FAILED", date_from=week_ago).with_only_columns(AuditLog.id),
+             {"ix_audit_log_tenant_action_status_ts"}, open_partitions),
+            ("/export date range", logs_query(date_from=week_ago).order_by(AuditLog.id.desc()),
+             {"ix_audit_log_tenant_timestamp", "ix_audit_log_tenant_id_desc"}, open_partitions),
+            ("/stats rollup read",
+             select(AuditRollupHourly.action, AuditRollupHourly.status, AuditRollupHourly.count)
+             .where(AuditRollupHourly.tenant_id == tenant.id, AuditRollupHourly.hour >= week_ago),
+             set(), None),
+        ]
+
+        results = [layout_ok]
+        for name, stmt, expected, partitions in checks:
+            forbid = ("audit_log",) if name.startswith("/stats") else ()
+            results.append(_check(name, stmt, expected, parents, forbid_tables=forbid, partitions=partitions))
+
+        if not args.keep:
+            db.session.execute(text("DELETE FROM audit_log WHERE tenant_id = :tid"), {"tid": tenant.id})
+            db.session.delete(tenant)
+            db.session.commit()
+
+        if not all(results):
+            sys.exit(1)
+        print("All audit query plans use their indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# audit_log retention purge; safe to interrupt and re-run (see services/audit_retention.py)
+#
+#   python scripts/audit_purge.py run [tenant_slug] [--dry-run] [--batch-rows 5000] [--pause 0.5]
+#   python scripts/audit_purge.py policy <tenant_slug> [days | default]
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from extensions import db
+from models import Tenant
+from services.audit_retention import purge_all, retention_days
+
+app = create_app()
+
+
+def _progress(tenant, deleted, fraction):
+    print(f"  {tenant.slug}: {deleted:,} rows deleted ({fraction:.0%})", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="audit_log retention purge")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="delete audit entries past each tenant's retention")
+    p_run.add_argument("tenant_slug", nargs="?", help="limit to one tenant")
+    p_run.add_argument("--dry-run", action="store_true", help="only count what would be deleted")
+    p_run.add_argument("--batch-rows", type=int, default=None)
+    p_run.add_argument("--pause", type=float, default=None, help="seconds to sleep between batches")
+    p_run.add_argument("--archive-dir", default=None)
+
+    p_policy = sub.add_parser("policy", help="show or set a tenant's retention in days")
+    p_policy.add_argument("tenant_slug")
+    p_policy.add_argument("days", nargs="?", help="number of days, or 'default' to clear the override")
+
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.command == "policy":
+            tenant = Tenant.query.filter_by(slug=args.tenant_slug).first()
+            if not tenant:
+                print(f"Tenant '{args.tenant_slug}' not found.")
+                sys.exit(1)
+            if args.days is not None:
+                if args.days == "default":
+                    tenant.audit_retention_days = None
+                elif not args.days.isdigit() or int(args.days) < 1:
+                    print("days must be a positive integer or 'default'.")
+                    sys.exit(1)
+                else:
+                    tenant.audit_retention_days = int(args.days)
+                db.session.commit()
+            source = "override" if tenant.audit_retention_days else "default"
+            print(f"{tenant.slug}: keep audit entries for {retention_days(tenant)} days ({source})")
+            return
+
+        summaries = purge_all(
+            args.tenant_slug,
+            batch_rows=args.batch_rows,
+            pause_seconds=args.pause,
+            dry_run=args.dry_run,
+            archive_dir=args.archive_dir,
+            progress=_progress,
+        )
+        if args.tenant_slug and not summaries:
+            print(f"Tenant '{args.tenant_slug}' not found.")
+            sys.exit(1)
+        for s in summaries:
+            verb = "would delete" if args.dry_run else "deleted"
+            line = f"{s['tenant']}: {verb} {s['deleted']:,} entries older than {s['cutoff']:%Y-%m-%d}"
+            if s["archived"]:
+                line += f"; removed archived months {', '.join(s['archived'])}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
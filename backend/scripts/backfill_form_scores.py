@@ -0,0 +1,40 @@
+# recompute materialized form scores after adding or changing template scoring rules
+#
+#   python scripts/backfill_form_scores.py                 # every tenant
+#   python scripts/backfill_form_scores.py sunrise-detox   # one tenant
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from models import Tenant
+from services.scoring import backfill_form_scores
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill PatientForm.score/severity from template scoring rules")
+    parser.add_argument("tenant_slug", nargs="?", help="limit to one tenant (default: all tenants)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with app.app_context():
+        q = Tenant.query
+        if args.tenant_slug:
+            q = q.filter_by(slug=args.tenant_slug)
+        tenants = q.order_by(Tenant.id.asc()).all()
+        if not tenants:
+            print(f"No tenant found for '{args.tenant_slug}'")
+            return
+
+        for tenant in tenants:
+            summary = backfill_form_scores(tenant.id, batch_size=args.batch_size)
+            print(f"{tenant.slug}: rescored {summary['forms']} forms across {summary['versions']} scored template versions")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ from werkzeug.security import generate_password_hash
 from app import create_app
 from extensions import db
 from models import Tenant, User, Patient, AuditLog, TreatmentPlan, FormTemplate, PatientForm
+from services.audit_chain import chain_entry
+from services.template_versions import ensure_current_version
 import random
 
 app = create_app()
@@ -137,6 +139,8 @@ def seed():
             AuditLog(
                 tenant_id=tenant1.id,
                 user_id=t1_tech.id if t1_tech else None,
+                actor_username=t1_tech.username if t1_tech else None,
+                actor_role=t1_tech.role if t1_tech else None,
                 action="SEED",
                 resource="database",
                 ip_address="127.0.0.1",
@@ -146,6 +150,8 @@ def seed():
             AuditLog(
                 tenant_id=tenant2.id,
                 user_id=t2_tech.id if t2_tech else None,
+                actor_username=t2_tech.username if t2_tech else None,
+                actor_role=t2_tech.role if t2_tech else None,
                 action="SEED",
                 resource="database",
                 ip_address="127.0.0.1",
@@ -153,7 +159,9 @@ def seed():
                 timestamp=datetime.now(timezone.utc) - timedelta(days=1),
             ),
         ]
-        db.session.add_all(logs)
+        for log in logs:
+            db.session.add(log)
+            chain_entry(log)
         db.session.commit()
 
         # ── Treatment Plans ──
@@ -169,8 +177,8 @@ def seed():
                     start_date=start,
                     review_date=review,
                     goals=[
-                        {"goal": "Reduce symptoms", "target": "4 weeks"},
-                        {"goal": "Improve daily routine", "target": "2 weeks"},
+                        {"id": "goal-1", "description": "Reduce symptoms", "status": "in-progress", "targetDate": (start + timedelta(weeks=4)).isoformat()},
+                        {"id": "goal-2", "description": "Improve daily routine", "status": "in-progress", "targetDate": (start + timedelta(weeks=2)).isoformat()},
                     ],
                     status="active",
                     updated_at=now,
@@ -187,8 +195,8 @@ def seed():
                     start_date=start,
                     review_date=review,
                     goals=[
-                        {"goal": "Complete detox protocol", "target": "2 weeks"},
-                        {"goal": "Establish sobriety support plan", "target": "3 weeks"},
+                        {"id": "goal-1", "description": "Complete detox protocol", "status": "in-progress", "targetDate": (start + timedelta(weeks=2)).isoformat()},
+                        {"id": "goal-2", "description": "Establish sobriety support plan", "status": "in-progress", "targetDate": (start + timedelta(weeks=3)).isoformat()},
                     ],
                     status="active",
                     updated_at=now,
@@ -234,6 +242,16 @@ def seed():
                         {"label": "Moving or speaking slowly", "type": "scale", "min": 0, "max": 3},
                         {"label": "Thoughts of self-harm", "type": "scale", "min": 0, "max": 3},
                     ],
+                    scoring={
+                        "method": "sum",
+                        "bands": [
+                            {"min": 0, "max": 4, "label": "Minimal"},
+                            {"min": 5, "max": 9, "label": "Mild"},
+                            {"min": 10, "max": 14, "label": "Moderate"},
+                            {"min": 15, "max": 19, "label": "Moderately severe"},
+                            {"min": 20, "max": 27, "label": "Severe"},
+                        ],
+                    },
                     allowed_roles=["admin", "psychiatrist"],
                     created_by=creator.id,
                 ),
@@ -251,6 +269,15 @@ def seed():
                         {"label": "Becoming easily annoyed", "type": "scale", "min": 0, "max": 3},
                         {"label": "Feeling afraid", "type": "scale", "min": 0, "max": 3},
                     ],
+                    scoring={
+                        "method": "sum",
+                        "bands": [
+                            {"min": 0, "max": 4, "label": "Minimal"},
+                            {"min": 5, "max": 9, "label": "Mild"},
+                            {"min": 10, "max": 14, "label": "Moderate"},
+                            {"min": 15, "max": 21, "label": "Severe"},
+                        ],
+                    },
                     allowed_roles=["admin", "psychiatrist"],
                     created_by=creator.id,
                 ),
@@ -324,6 +351,10 @@ def seed():
 
         db.session.commit()
 
+        for t in FormTemplate.query.all():
+            ensure_current_version(t)
+        db.session.commit()
+
         # ── Sample Patient Forms ──
         # Tenant 1 forms
         t1_intake = FormTemplate.query.filter_by(tenant_id=tenant1.id, name="New Patient Intake Form").first()
@@ -335,6 +366,7 @@ def seed():
                     tenant_id=tenant1.id,
                     patient_id=p.id,
                     template_id=t1_intake.id,
+                    template_version_id=t1_intake.current_version_id,
                     form_data={
                         "Full Name": f"{p.first_name} {p.last_name}",
                         "Date of Birth": p.date_of_birth.isoformat() if p.date_of_birth else "",
@@ -356,6 +388,7 @@ def seed():
                     tenant_id=tenant1.id,
                     patient_id=p.id,
                     template_id=t1_symptom.id,
+                    template_version_id=t1_symptom.current_version_id,
                     form_data={
                         "Current Symptoms": ["Anxiety", "Insomnia", "Fatigue"],
                         "Symptom Duration": "2-4 weeks",
@@ -377,6 +410,7 @@ def seed():
                     tenant_id=tenant2.id,
                     patient_id=p.id,
                     template_id=t2_intake.id,
+                    template_version_id=t2_intake.current_version_id,
                     form_data={
                         "Full Name": f"{p.first_name} {p.last_name}",
                         "Date of Birth": p.date_of_birth.isoformat() if p.date_of_birth else "",
@@ -0,0 +1,123 @@
+# Before/after benchmark for the API JSON provider (services/json_provider.py)
+#
+#   python scripts/json_benchmark.py --username admin1 --password ... [--tenant slug] [--rows 5000] [--repeat 20]
+#
+# Each big list endpoint is requested once through the test client and the object
+# handed to the JSON provider is captured; its list is then repeated up to --rows
+# items. Building the response is timed for:
+#
+#   before   Flask's default provider on the payload with dates already turned into
+#            strings, as the serializers used to return it (their .isoformat()
+#            calls are not timed, so this understates the old cost slightly)
+#   stdlib   IsoJSONProvider: stdlib json, dates encoded by the provider
+#   orjson   OrjsonProvider (skipped when orjson is not installed)
+#
+# Reported per endpoint: median milliseconds per response, speedup over before,
+# and the body size.
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from services.json_provider import IsoJSONProvider, OrjsonProvider, orjson
+
+app = create_app()
+
+ENDPOINTS = [
+    "/api/patients",
+    "/api/patients/treatment-plans?limit=200",
+    "/api/audit/logs?limit=200",
+]
+
+
+def _to_iso(obj):
+    if isinstance(obj, dict):
+        return {k: _to_iso(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_iso(v) for v in obj]
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return obj
+
+
+def _capture(client, path, headers):
+    captured = {}
+    provider = app.json
+
+    class Capture(type(provider)):
+        def response(self, *args, **kwargs):
+            captured["obj"] = self._prepare_response_obj(args, kwargs)
+            return super().response(captured["obj"])
+
+    app.json = Capture(app)
+    try:
+        resp = client.get(path, headers=headers)
+    finally:
+        app.json = provider
+    if resp.status_code != 200:
+        raise SystemExit(f"{path}: HTTP {resp.status_code} {resp.get_data(as_text=True)[:200]}")
+    return captured["obj"]
+
+
+def _scale(obj, rows):
+    items = obj if isinstance(obj, list) else obj.get("items")
+    if not items:
+        return obj, 0
+    scaled = (items * (rows // len(items) + 1))[:rows]
+    return (scaled if isinstance(obj, list) else {**obj, "items": scaled}), len(scaled)
+
+
+def _time(fn, repeat):
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, len(body.get_data())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON provider before/after benchmark")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--tenant", help="tenant slug (default: DEV_TENANT_SLUG)")
+    parser.add_argument("--rows", type=int, default=5000, help="items per list payload")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--path", action="append", help="endpoint to include (repeatable)")
+    args = parser.parse_args()
+
+    headers = {"Host": f"{args.tenant}.benchmark.local"} if args.tenant else {}
+    client = app.test_client()
+    login = client.post("/api/auth/login", json={"username": args.username, "password": args.password}, headers=headers)
+    if login.status_code != 200:
+        raise SystemExit(f"login failed: {login.get_json()}")
+    headers["Authorization"] = f"Bearer {login.get_json()['session_id']}"
+
+    providers = {"stdlib": IsoJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(app)
+    before = DefaultJSONProvider(app)
+
+    print(f"{'endpoint':<42} {'rows':>6} {'variant':<8} {'ms':>9} {'speedup':>8} {'bytes':>10}")
+    with app.app_context():
+        for path in args.path or ENDPOINTS:
+            payload, rows = _scale(_capture(client, path, headers), args.rows)
+            preformatted = _to_iso(payload)
+            base_ms, size = _time(lambda: before.response(preformatted), args.repeat)
+            print(f"{path:<42} {rows:>6} {'before':<8} {base_ms:>9.2f} {'1.00x':>8} {size:>10,}")
+            for name, provider in providers.items():
+                ms, size = _time(lambda: provider.response(payload), args.repeat)
+                print(f"{'':<42} {'':>6} {name:<8} {ms:>9.2f} {base_ms / ms:>7.2f}x {size:>10,}")
+
+
+if __name__ == "__main__":
+    main()
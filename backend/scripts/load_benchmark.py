@@ -0,0 +1,222 @@
+# HTTP load benchmark for the production server (gunicorn.conf.py)
+#
+#   python scripts/load_benchmark.py run --url http://localhost:5000 --username admin1 --password ... [--tenant slug]
+#   python scripts/load_benchmark.py compare --username admin1 --password ... [--tenant slug]
+#
+# run drives an already running server. compare starts gunicorn on a local port once
+# per worker model and runs the same load against each:
+#
+#   process   sync workers, one request per process      (2 x CPUs + 1) x 1
+#   threaded  a single gthread worker                     1 x (2 x CPUs + 1) x 4 threads
+#   hybrid    gunicorn.conf.py defaults (gthread)         (2 x CPUs + 1) x 4 threads
+#
+# Every model gets the same number of request slots except process, which is
+# what a sync deployment would run. The load is a closed loop: --concurrency
+# clients each send the next request as soon as the previous one returns,
+# cycling through --path (default: the admin worklists and audit views).
+# Reported per endpoint: requests, errors (non-2xx or transport), p50/p95/p99
+# latency; plus overall throughput. Use a Postgres DATABASE_URL seeded with
+# scripts/database_generation.py; SQLite serializes writes and flattens the
+# differences.
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_PATHS = [
+    "/api/patients",
+    "/api/patients/treatment-plans?limit=50",
+    "/api/audit/logs?limit=50",
+    "/api/audit/stats",
+    "/api/users",
+    "/api/templates",
+]
+
+
+def _request(url, host, method="GET", body=None, token=None, timeout=30):
+    headers = {"Content-Type": "application/json"}
+    if host:
+        headers["Host"] = host
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.status, resp.read()
+
+
+def _login(base, host, username, password) -> str:
+    status, raw = _request(f"{base}/api/auth/login", host, "POST", {"username": username, "password": password})
+    return json.loads(raw)["session_id"]
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+def run_load(base, host, token, paths, concurrency, duration, warmup) -> dict:
+    """Closed-loop load; returns {"rps", "requests", "errors", "endpoints": {path: stats}}."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    stop_at = time.monotonic() + warmup + duration
+    measure_from = time.monotonic() + warmup
+
+    def client(n):
+        i = n
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                return
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.monotonic()
+            try:
+                status, _ = _request(base + path, host, token=token)
+                ok = 200 <= status < 300
+            except (urllib.error.URLError, OSError):
+                ok = False
+            elapsed = time.monotonic() - started
+            if started < measure_from:
+                continue
+            with lock:
+                latencies[path].append(elapsed)
+                if not ok:
+                    errors[path] += 1
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    endpoints = {}
+    for path in paths:
+        values = sorted(latencies[path])
+        endpoints[path] = {
+            "requests": len(values),
+            "errors": errors[path],
+            "p50_ms": _percentile(values, 50) * 1000,
+            "p95_ms": _percentile(values, 95) * 1000,
+            "p99_ms": _percentile(values, 99) * 1000,
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "rps": total / duration,
+        "requests": total,
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "endpoints": endpoints,
+    }
+
+
+def _print_report(name, report):
+    print(f"\n== {name}: {report['rps']:.1f} req/s, {report['requests']} requests, {report['errors']} errors")
+    print(f"   {'endpoint':<42} {'reqs':>7} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for path, e in report["endpoints"].items():
+        print(f"   {path:<42} {e['requests']:>7} {e['errors']:>5} {e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f}")
+
+
+def _models(cpus):
+    slots = cpus * 2 + 1
+    return {
+        "process": {"GUNICORN_WORKERS": str(slots), "GUNICORN_THREADS": "1", "GUNICORN_WORKER_CLASS": "sync"},
+        "threaded": {"GUNICORN_WORKERS": "1", "GUNICORN_THREADS": str(slots * 4), "GUNICORN_WORKER_CLASS": "gthread"},
+        "hybrid": {"GUNICORN_WORKERS": str(slots), "GUNICORN_THREADS": "4", "GUNICORN_WORKER_CLASS": "gthread"},
+    }
+
+
+def _wait_ready(base, host, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if _request(f"{base}/health", host, timeout=2)[0] == 200:
+                return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.3)
+    raise RuntimeError("server did not become ready")
+
+
+def compare(args):
+    cpus = args.cpus or os.cpu_count() or 1
+    base = f"http://127.0.0.1:{args.port}"
+    reports = {}
+    for name, env in _models(cpus).items():
+        if args.models and name not in args.models:
+            continue
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+            cwd=BACKEND_DIR,
+            env={**os.environ, **env, "GUNICORN_BIND": f"127.0.0.1:{args.port}", "GUNICORN_ACCESS_LOG": ""},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_ready(base, args.host)
+            token = _login(base, args.host, args.username, args.password)
+            print(f"{name}: {env['GUNICORN_WORKERS']} workers x {env['GUNICORN_THREADS']} threads ({env['GUNICORN_WORKER_CLASS']})")
+            reports[name] = run_load(base, args.host, token, args.path or DEFAULT_PATHS, args.concurrency, args.duration, args.warmup)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=60)
+
+    for name, report in reports.items():
+        _print_report(name, report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"cpus": cpus, "concurrency": args.concurrency, "duration": args.duration, "models": reports}, fh, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load benchmark: threaded vs process workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--username", required=True)
+        p.add_argument("--password", required=True)
+        p.add_argument("--tenant", help="tenant slug, sent as the Host subdomain (default: the server's DEV_TENANT_SLUG)")
+        p.add_argument("--path", action="append", help="endpoint to include (repeatable; default: a mix of worklist and audit views)")
+        p.add_argument("--concurrency", type=int, default=32, help="simultaneous clients")
+        p.add_argument("--duration", type=float, default=30, help="measured seconds per run")
+        p.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before each run")
+        p.add_argument("--json", help="also write the results to this file")
+
+    p_run = sub.add_parser("run", help="load an already running server")
+    p_run.add_argument("--url", default="http://localhost:5000")
+    common(p_run)
+
+    p_cmp = sub.add_parser("compare", help="start gunicorn per worker model and load each")
+    p_cmp.add_argument("--port", type=int, default=5055)
+    p_cmp.add_argument("--cpus", type=int, default=None, help="size the models for this many CPUs (default: this machine)")
+    p_cmp.add_argument("--models", nargs="+", choices=["process", "threaded", "hybrid"], help="subset of models to run")
+    common(p_cmp)
+
+    args = parser.parse_args()
+    args.host = f"{args.tenant}.benchmark.local" if args.tenant else None
+
+    if args.command == "compare":
+        compare(args)
+        return
+
+    base = args.url.rstrip("/")
+    token = _login(base, args.host, args.username, args.password)
+    report = run_load(base, args.host, token, args.path or DEFAULT_PATHS, args.concurrency, args.duration, args.warmup)
+    _print_report(base, report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
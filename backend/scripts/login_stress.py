@@ -0,0 +1,120 @@
+# Concurrency check for failed-login counting and lockout (routes/auth.py)
+#
+# Fires parallel bad-password logins at one account of a scratch tenant through the
+# app's test client and checks that the counter saw every attempt exactly once:
+#
+#   1. lockout out of reach: N concurrent failures must leave failed_login_attempts == N
+#   2. lockout in reach:     of N concurrent failures exactly MAX_FAILED_LOGINS are
+#                            counted (401), the rest see the lock (403), and the
+#                            account ends up locked
+#
+# Most meaningful against PostgreSQL; on SQLite writes are serialized anyway.
+# The scratch tenant is suspended again when the run ends.
+#
+#   python scripts/login_stress.py [--attempts 200] [--threads 32]
+
+import argparse
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from werkzeug.security import generate_password_hash
+
+import config
+from app import create_app
+from extensions import db
+from models import Tenant, User
+from services.rate_limiter import login_limiter
+
+app = create_app()
+
+SCRATCH_SLUG = "login-stress"
+USERNAME = "stress-target"
+
+
+def _reset(user_id: int) -> None:
+    u = db.session.get(User, user_id)
+    u.failed_login_attempts = 0
+    u.locked_until = None
+    u.permanently_locked = False
+    db.session.commit()
+
+
+def _fire(attempts: int, threads: int) -> Counter:
+    client = app.test_client()
+
+    def attempt(n: int) -> int:
+        # A distinct client address per attempt keeps the per-IP rate limiter out of the way
+        return client.post(
+            "/api/auth/login",
+            json={"username": USERNAME, "password": "wrong-password"},
+            headers={"Host": f"{SCRATCH_SLUG}.stress.local", "X-Forwarded-For": f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"},
+        ).status_code
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return Counter(pool.map(attempt, range(attempts)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parallel failed-login stress check")
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+
+    with app.app_context():
+        tenant = Tenant.query.filter_by(slug=SCRATCH_SLUG).first()
+        if not tenant:
+            tenant = Tenant(name="Login stress check", slug=SCRATCH_SLUG)
+            db.session.add(tenant)
+            db.session.flush()
+        tenant.status = "active"
+        user = User.query.filter_by(tenant_id=tenant.id, username=USERNAME).first()
+        if not user:
+            user = User(tenant_id=tenant.id, username=USERNAME, role="technician",
+                        password_hash=generate_password_hash("Unused-Passw0rd!"))
+            db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        login_limiter.max_requests = args.attempts + 1
+
+        failures = []
+        max_failed = config.MAX_FAILED_LOGINS
+        try:
+            _reset(user_id)
+            config.MAX_FAILED_LOGINS = args.attempts + 1
+            statuses = _fire(args.attempts, args.threads)
+            db.session.expire_all()
+            count = db.session.get(User, user_id).failed_login_attempts
+            print(f"no lockout: {dict(statuses)}, failed_login_attempts={count}")
+            if count != args.attempts or statuses[401] != args.attempts:
+                failures.append(f"expected {args.attempts} counted failures, got {count}")
+
+            _reset(user_id)
+            config.MAX_FAILED_LOGINS = max_failed
+            statuses = _fire(args.attempts, args.threads)
+            db.session.expire_all()
+            u = db.session.get(User, user_id)
+            print(f"lockout at {max_failed}: {dict(statuses)}, failed_login_attempts={u.failed_login_attempts}, locked_until={u.locked_until}")
+            if u.failed_login_attempts != max_failed or statuses[401] != max_failed:
+                failures.append(f"expected exactly {max_failed} counted failures before lockout, got {u.failed_login_attempts}")
+            if u.locked_until is None:
+                failures.append("account was not locked")
+            if statuses[401] + statuses[403] != args.attempts:
+                failures.append(f"unexpected responses: {dict(statuses)}")
+        finally:
+            config.MAX_FAILED_LOGINS = max_failed
+            _reset(user_id)
+            db.session.get(Tenant, tenant.id).status = "suspended"
+            db.session.commit()
+
+    for f in failures:
+        print(f"FAIL: {f}")
+    print("OK" if not failures else f"{len(failures)} checks failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
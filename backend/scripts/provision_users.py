@@ -0,0 +1,63 @@
+# Creates a tenant's users in bulk from a CSV (see services/user_provisioning.py)
+#
+#   python scripts/provision_users.py <tenant_slug> users.csv [--dry-run] [--workers N]
+#
+# The CSV header is username,password,role,full_name. Nothing is created unless every
+# row is valid; invalid rows are printed and the script exits 1.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app
+from extensions import db
+from models import Tenant
+from services.user_provisioning import ProvisioningError, provision_users
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bulk user provisioning")
+    parser.add_argument("tenant_slug")
+    parser.add_argument("csv_path", help="CSV file, or - for stdin")
+    parser.add_argument("--dry-run", action="store_true", help="validate only")
+    parser.add_argument("--workers", type=int, default=None, help="processes to hash passwords in (default: USER_PROVISION_WORKERS or CPU count)")
+    args = parser.parse_args()
+
+    if args.csv_path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.csv_path, "r", encoding="utf-8-sig", newline="") as fh:
+            text = fh.read()
+
+    with app.app_context():
+        tenant = db.session.scalar(db.select(Tenant).where(Tenant.slug == args.tenant_slug))
+        if tenant is None:
+            print(f"Tenant '{args.tenant_slug}' not found.")
+            sys.exit(1)
+
+        started = time.monotonic()
+        try:
+            result = provision_users(tenant.id, text, dry_run=args.dry_run, workers=args.workers)
+        except ProvisioningError as e:
+            print(f"Rejected: {e}")
+            sys.exit(1)
+
+        if result["errors"]:
+            for e in result["errors"]:
+                print(f"  row {e['row']} ({e['username'] or '—'}): {e['error']}")
+            print(f"Rejected: {len(result['errors'])} of {result['rows']} rows invalid; no users created.")
+            sys.exit(1)
+
+        if args.dry_run:
+            print(f"{result['rows']} rows valid (dry run, nothing created)")
+        else:
+            print(f"Created {len(result['created'])} users in {tenant.slug} in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Monthly partitioning and cold archival for audit_log.
+
+On Postgres, audit_log is range-partitioned by month (see migration
+c2e6a9f4b817). ensure_partitions() keeps upcoming months created ahead of
+time; rows that arrive before their partition exists land in
+audit_log_default and are moved when the partition is created.
+
+Months older than AUDIT_ARCHIVE_AFTER_MONTHS are written out as gzipped
+NDJSON segments, one per tenant per month, under AUDIT_ARCHIVE_DIR:
+
+    <archive_dir>/<tenant_id>/2025-01.ndjson.gz
+    <archive_dir>/<tenant_id>/manifest.json   {month: {file, rows, sha256, first_id, last_id}}
+
+Rows written into a month after it was archived (late inserts into the
+default partition, or on SQLite) go to an extra segment, 2025-01.2 and so
+on, next to the first; an archived segment is never rewritten.
+
+Segments are written newest id first, matching the /logs ordering, and
+the month is only dropped from the database after its segments and
+checksums are on disk. On SQLite audit_log stays a plain table and
+archived months are removed with batched deletes.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select, text
+
+import config
+from extensions import db
+from models import AuditLog
+from services.audit_chain import anchor_before_delete
+from services.audit_codes import parse_resource
+
+ARCHIVE_BATCH_ROWS = 1000
+DELETE_BATCH_ROWS = 5000
+
+
+def month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(dt: datetime, n: int) -> datetime:
+    y, m = divmod(dt.month - 1 + n, 12)
+    return datetime(dt.year + y, m + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"audit_log_{month:%Y_%m}"
+
+
+def is_partitioned() -> bool:
+    conn = db.session.connection()
+    if conn.dialect.name != "postgresql":
+        return False
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'audit_log'")).scalar()
+    return kind == "p"
+
+
+# ─── PARTITION MAINTENANCE (Postgres) ───
+
+def ensure_partitions(months_ahead: int = 2, now: datetime | None = None) -> list[str]:
+    """
+    Creates monthly partitions from the current month through months_ahead.
+    Rows already sitting in the default partition for a new month are moved
+    into it in the same transaction. Returns the names created.
+    """
+    if not is_partitioned():
+        return []
+
+    conn = db.session.connection()
+    existing = set(conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'audit_log'"
+    )).scalars())
+
+    created = []
+    current = month_start(now or datetime.now(timezone.utc))
+    for n in range(months_ahead + 1):
+        start = add_months(current, n)
+        end = add_months(start, 1)
+        name = partition_name(start)
+        if name in existing:
+            continue
+
+        bounds = {"start": start, "end": end}
+        conn.execute(text(f'CREATE TABLE "{name}" (LIKE audit_log INCLUDING DEFAULTS)'))
+        conn.execute(text(
+            f'WITH moved AS (DELETE FROM audit_log_default WHERE "timestamp" >= :start AND "timestamp" < :end RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ), bounds)
+        conn.execute(text(
+            f"ALTER TABLE audit_log ATTACH PARTITION \"{name}\" "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        created.append(name)
+
+    db.session.commit()
+    return created
+
+
+# ─── ARCHIVAL ───
+
+def _tenant_dir(archive_dir: str, tenant_id: int) -> str:
+    return os.path.join(archive_dir, str(tenant_id))
+
+
+def load_manifest(archive_dir: str, tenant_id: int) -> dict:
+    path = os.path.join(_tenant_dir(archive_dir, tenant_id), "manifest.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _write_manifest(archive_dir: str, tenant_id: int, manifest: dict) -> None:
+    # Write-then-rename so a crash never leaves a half-written manifest
+    path = os.path.join(_tenant_dir(archive_dir, tenant_id), "manifest.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _record(row) -> dict:
+    # Every column, so segments keep up with schema changes without edits here
+    rec = {}
+    for col in AuditLog.__table__.columns:
+        value = getattr(row, col.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            value = bytes(value).hex()
+        rec[col.name] = value
+    return rec
+
+
+def _archive_tenant_month(tenant_id: int, start: datetime, end: datetime, archive_dir: str) -> dict:
+    """
+    Streams one tenant's rows for [start, end) into a gzipped NDJSON segment
+    and records it in the tenant manifest.
+    """
+    tdir = _tenant_dir(archive_dir, tenant_id)
+    os.makedirs(tdir, exist_ok=True)
+
+    manifest = load_manifest(archive_dir, tenant_id)
+    month_key = f"{start:%Y-%m}"
+    n = 1
+    while month_key in manifest:
+        n += 1
+        month_key = f"{start:%Y-%m}.{n}"
+    filename = f"{month_key}.ndjson.gz"
+    path = os.path.join(tdir, filename)
+    tmp = path + ".tmp"
+
+    stmt = (
+        select(AuditLog)
+        .where(AuditLog.tenant_id == tenant_id, AuditLog.timestamp >= start, AuditLog.timestamp < end)
+        .order_by(AuditLog.id.desc())
+    )
+
+    rows = 0
+    first_id = last_id = None
+    with gzip.open(tmp, "wt", encoding="utf-8") as out:
+        for log in db.session.scalars(stmt, execution_options={"yield_per": ARCHIVE_BATCH_ROWS}):
+            out.write(json.dumps(_record(log), separators=(",", ":")) + "\n")
+            rows += 1
+            first_id = log.id if first_id is None else first_id
+            last_id = log.id
+    os.replace(tmp, path)
+
+    entry = {
+        "file": filename,
+        "rows": rows,
+        "sha256": _sha256_file(path),
+        "first_id": first_id,
+        "last_id": last_id,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+    }
+    manifest[month_key] = entry
+    _write_manifest(archive_dir, tenant_id, manifest)
+    return entry
+
+
+def _drop_month(start: datetime, end: datetime) -> None:
+    """
+    Removes an archived month from the database: detach + drop when it is its
+    own partition, otherwise batched deletes (SQLite, or rows in the default partition).
+    """
+    conn = db.session.connection()
+    name = partition_name(start)
+    if is_partitioned() and conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar():
+        conn.execute(text(f'ALTER TABLE audit_log DETACH PARTITION "{name}"'))
+        conn.execute(text(f'DROP TABLE "{name}"'))
+        db.session.commit()
+        return
+
+    while True:
+        ids = select(AuditLog.id).where(AuditLog.timestamp >= start, AuditLog.timestamp < end).limit(DELETE_BATCH_ROWS)
+        deleted = db.session.execute(delete(AuditLog).where(AuditLog.id.in_(ids.scalar_subquery()))).rowcount
+        db.session.commit()
+        if not deleted:
+            break
+
+
+def archive_old_months(older_than_months: int | None = None, archive_dir: str | None = None, now: datetime | None = None) -> list[dict]:
+    """
+    Archives and drops every month that ended more than older_than_months ago.
+    Returns one summary per archived month.
+    """
+    older_than_months = config.AUDIT_ARCHIVE_AFTER_MONTHS if older_than_months is None else older_than_months
+    archive_dir = archive_dir or config.AUDIT_ARCHIVE_DIR
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -older_than_months)
+
+    oldest = db.session.execute(select(func.min(AuditLog.timestamp)).where(AuditLog.timestamp < cutoff)).scalar()
+    if oldest is None:
+        return []
+    if oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+
+    summaries = []
+    start = month_start(oldest)
+    while start < cutoff:
+        end = add_months(start, 1)
+        tenant_ids = db.session.execute(
+            select(AuditLog.tenant_id)
+            .where(AuditLog.timestamp >= start, AuditLog.timestamp < end)
+            .distinct()
+        ).scalars().all()
+
+        if tenant_ids:
+            segments = {tid: _archive_tenant_month(tid, start, end, archive_dir) for tid in tenant_ids}
+            for tid in tenant_ids:
+                anchor_before_delete(tid, AuditLog.timestamp >= start, AuditLog.timestamp < end)
+            db.session.commit()
+            _drop_month(start, end)
+            summaries.append({
+                "month": f"{start:%Y-%m}",
+                "tenants": len(segments),
+                "rows": sum(s["rows"] for s in segments.values()),
+            })
+        start = end
+
+    return summaries
+
+
+def purge_archived(tenant_id: int, cutoff: datetime, archive_dir: str | None = None) -> list[str]:
+    """
+    Deletes a tenant's segments whose month ended on or before cutoff (retention purge).
+    The manifest entry goes first, so an interrupted purge leaves at most an orphaned file.
+    Returns the purged month keys.
+    """
+    archive_dir = archive_dir or config.AUDIT_ARCHIVE_DIR
+    manifest = load_manifest(archive_dir, tenant_id)
+    expired = [k for k, entry in manifest.items() if datetime.fromisoformat(entry["end"]) <= cutoff]
+    if not expired:
+        return []
+
+    files = [manifest.pop(k)["file"] for k in expired]
+    _write_manifest(archive_dir, tenant_id, manifest)
+    for name in files:
+        path = os.path.join(_tenant_dir(archive_dir, tenant_id), name)
+        if os.path.exists(path):
+            os.remove(path)
+    return sorted(expired)
+
+
+def verify_archive(archive_dir: str | None = None) -> list[str]:
+    """
+    Re-hashes every segment against its manifest. Returns a list of problems (empty if clean).
+    """
+    archive_dir = archive_dir or config.AUDIT_ARCHIVE_DIR
+    problems = []
+    if not os.path.isdir(archive_dir):
+        return problems
+
+    for tenant in sorted(os.listdir(archive_dir)):
+        if not tenant.isdigit():
+            continue
+        manifest = load_manifest(archive_dir, int(tenant))
+        for month_key, entry in sorted(manifest.items()):
+            path = os.path.join(_tenant_dir(archive_dir, int(tenant)), entry["file"])
+            if not os.path.exists(path):
+                problems.append(f"tenant {tenant} {month_key}: segment missing")
+            elif _sha256_file(path) != entry["sha256"]:
+                problems.append(f"tenant {tenant} {month_key}: checksum mismatch")
+    return problems
+
+
+# ─── READ PATH ───
+
+def iter_archived(tenant_id: int, start: datetime | None = None, end: datetime | None = None, archive_dir: str | None = None):
+    """
+    Yields archived records for a tenant, newest id first, from every segment
+    overlapping [start, end). Timestamps are returned as aware datetimes.
+    """
+    archive_dir = archive_dir or config.AUDIT_ARCHIVE_DIR
+    manifest = load_manifest(archive_dir, tenant_id)
+
+    # Late segments of a month hold higher ids than the month's first segment
+    for entry in sorted(manifest.values(), key=lambda e: (e["start"], e["first_id"] or 0), reverse=True):
+        seg_start = datetime.fromisoformat(entry["start"])
+        seg_end = datetime.fromisoformat(entry["end"])
+        if (start and seg_end <= start) or (end and seg_start >= end):
+            continue
+
+        path = os.path.join(_tenant_dir(archive_dir, tenant_id), entry["file"])
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                rec = json.loads(line)
+                rec["timestamp"] = datetime.fromisoformat(rec["timestamp"])
+                yield _upgrade_record(rec)
+
+
+def _upgrade_record(rec: dict) -> dict:
+    # Older segments predate the compact audit columns and the actor snapshot
+    if "resource" in rec:
+        rec["resource_type"], rec["resource_key"] = parse_resource(rec.pop("resource"))
+    if "description" in rec:
+        text = rec.pop("description")
+        rec["message"], rec["params"] = None, ({"text": text} if text else None)
+    rec.setdefault("actor_username", None)
+    rec.setdefault("actor_role", None)
+    return rec
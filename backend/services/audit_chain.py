@@ -0,0 +1,253 @@
+"""
+Tamper-evident hash chain over audit_log.
+
+Every entry stores sha256(previous entry's hash + canonical entry content),
+chained per tenant. log_access links entries through chain_entry(), which
+locks the tenant's audit_chain_head row, so appends are serialized per tenant
+and ids are assigned under the lock: within a tenant, id order is chain order.
+
+Every AUDIT_CHAIN_CHECKPOINT_EVERY entries the head is copied into
+audit_chain_checkpoint. Purges and archival add "anchor" checkpoints for the
+last row they remove, so the chain can still be verified once its start is
+gone. Entries written before the chain existed have no hash and are skipped.
+
+verify_chain() splits each tenant's chain at its checkpoints and checks the
+segments in parallel across a process pool. Each worker streams its range
+with a server-side cursor, so memory stays flat whatever the table size.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timezone
+from ipaddress import ip_address
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+import config
+from extensions import db
+from models import AuditChainCheckpoint, AuditChainHead, AuditLog, Tenant
+from services.audit_codes import ACTIONS, MESSAGE_CODES, RESOURCE_TYPES, STATUSES
+
+GENESIS_HASH = bytes(32)
+VERIFY_BATCH_ROWS = 5000
+
+
+def _canonical_ip(value):
+    if not value:
+        return None
+    try:
+        return str(ip_address(str(value).strip()))
+    except ValueError:
+        return None
+
+
+def entry_digest(prev_hash: bytes, rec) -> bytes:
+    """
+    Hash of one entry given its predecessor's. rec is any mapping of AuditLog column
+    names to values as the ORM presents them; values are normalized the way they are
+    stored (catalog codes, canonical IP, UTC timestamp) so a freshly built entry and
+    the same row read back hash identically. The id is not hashed: it is assigned
+    after the hash, and order is already fixed by the chain itself.
+    """
+    ts = rec["timestamp"]
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    values = [
+        rec["tenant_id"],
+        ts.astimezone(timezone.utc).isoformat(),
+        rec["user_id"],
+        rec["actor_username"],
+        rec["actor_role"],
+        ACTIONS.get(rec["action"]),
+        STATUSES.get(rec["status"]),
+        RESOURCE_TYPES.get(rec["resource_type"]),
+        rec["resource_key"],
+        _canonical_ip(rec["ip_address"]),
+        MESSAGE_CODES.get(rec["message"]),
+        rec["params"],
+    ]
+    payload = json.dumps(values, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(bytes(prev_hash) + payload).digest()
+
+
+def _lock_head(tenant_id: int) -> AuditChainHead:
+    q = select(AuditChainHead).where(AuditChainHead.tenant_id == tenant_id).with_for_update()
+    head = db.session.execute(q).scalar_one_or_none()
+    if head is None:
+        # First entry for the tenant: create the head, tolerating a concurrent creator
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.session.execute(
+            insert(AuditChainHead)
+            .values(tenant_id=tenant_id, last_id=None, last_hash=GENESIS_HASH, entries=0)
+            .on_conflict_do_nothing(index_elements=["tenant_id"])
+        )
+        head = db.session.execute(q).scalar_one()
+    return head
+
+
+def chain_entry(entry: AuditLog) -> None:
+    """
+    Links a new, not yet flushed entry onto its tenant's chain and flushes it.
+    The head stays locked until the caller commits. Does not commit.
+    """
+    with db.session.no_autoflush:
+        head = _lock_head(entry.tenant_id)
+        entry.entry_hash = entry_digest(head.last_hash, {c.name: getattr(entry, c.key) for c in AuditLog.__table__.columns})
+    db.session.flush()
+
+    head.last_id = entry.id
+    head.last_hash = entry.entry_hash
+    head.entries += 1
+    if head.entries % config.AUDIT_CHAIN_CHECKPOINT_EVERY == 0:
+        db.session.add(AuditChainCheckpoint(tenant_id=entry.tenant_id, last_id=entry.id, entry_hash=entry.entry_hash))
+
+
+def anchor_before_delete(tenant_id: int, *where) -> None:
+    """
+    Records the last chained entry matching where as an anchor checkpoint, before
+    the caller deletes those rows, so verification can start after them.
+    Does not commit.
+    """
+    row = db.session.execute(
+        select(AuditLog.id, AuditLog.entry_hash)
+        .where(AuditLog.tenant_id == tenant_id, AuditLog.entry_hash.is_not(None), *where)
+        .order_by(AuditLog.id.desc())
+        .limit(1)
+    ).first()
+    if row:
+        db.session.add(AuditChainCheckpoint(tenant_id=tenant_id, last_id=row.id, entry_hash=row.entry_hash, kind="anchor"))
+
+
+def checkpoint_heads() -> int:
+    """
+    Checkpoints every tenant's chain head that moved since its latest checkpoint.
+    Returns how many checkpoints were written.
+    """
+    latest = (
+        select(AuditChainCheckpoint.tenant_id, func.max(AuditChainCheckpoint.last_id).label("last_id"))
+        .group_by(AuditChainCheckpoint.tenant_id)
+        .subquery()
+    )
+    heads = db.session.execute(
+        select(AuditChainHead)
+        .outerjoin(latest, latest.c.tenant_id == AuditChainHead.tenant_id)
+        .where(AuditChainHead.last_id.is_not(None))
+        .where((latest.c.last_id.is_(None)) | (latest.c.last_id < AuditChainHead.last_id))
+    ).scalars().all()
+    for head in heads:
+        db.session.add(AuditChainCheckpoint(tenant_id=head.tenant_id, last_id=head.last_id, entry_hash=head.last_hash))
+    db.session.commit()
+    return len(heads)
+
+
+def _segments(tenant_id: int) -> list[tuple]:
+    """
+    Splits a tenant's chain at its checkpoints into
+    (tenant_id, after_id, start_hash, end_id, end_hash) ranges that verify independently.
+    """
+    head = db.session.get(AuditChainHead, tenant_id)
+    if head is None or head.last_id is None:
+        return []
+    first = db.session.scalar(
+        select(func.min(AuditLog.id)).where(AuditLog.tenant_id == tenant_id, AuditLog.entry_hash.is_not(None))
+    )
+    if first is None:
+        return []
+
+    checkpoints = db.session.execute(
+        select(AuditChainCheckpoint.last_id, AuditChainCheckpoint.entry_hash)
+        .where(AuditChainCheckpoint.tenant_id == tenant_id)
+        .order_by(AuditChainCheckpoint.last_id)
+    ).all()
+
+    # Start from the newest checkpoint before the oldest surviving entry (purged/archived
+    # rows), or from genesis when the chain is complete
+    start_id, start_hash = first - 1, GENESIS_HASH
+    for last_id, entry_hash in checkpoints:
+        if last_id < first:
+            start_id, start_hash = last_id, bytes(entry_hash)
+
+    segments = []
+    for end_id, end_hash in [(c.last_id, bytes(c.entry_hash)) for c in checkpoints if c.last_id >= first] + [(head.last_id, bytes(head.last_hash))]:
+        if end_id <= start_id:
+            continue
+        segments.append((tenant_id, start_id, start_hash, end_id, end_hash))
+        start_id, start_hash = end_id, end_hash
+    return segments
+
+
+def _check_segment(engine, segment: tuple) -> dict:
+    tenant_id, after_id, prev, end_id, end_hash = segment
+    result = {"tenant_id": tenant_id, "after_id": after_id, "end_id": end_id, "rows": 0, "broken_id": None, "reason": None}
+
+    stmt = (
+        select(AuditLog.__table__)
+        .where(AuditLog.tenant_id == tenant_id, AuditLog.id > after_id, AuditLog.id <= end_id)
+        .order_by(AuditLog.id)
+    )
+    with engine.connect() as conn:
+        rows = conn.execution_options(yield_per=VERIFY_BATCH_ROWS).execute(stmt)
+        for row in rows:
+            rec = row._mapping
+            result["rows"] += 1
+            stored = bytes(rec["entry_hash"]) if rec["entry_hash"] is not None else None
+            if stored is None or entry_digest(prev, rec) != stored:
+                result["broken_id"] = rec["id"]
+                result["reason"] = "hash missing" if stored is None else "hash does not match predecessor and content"
+                return result
+            prev = stored
+
+    if prev != end_hash:
+        result["broken_id"] = end_id
+        result["reason"] = "chain does not reach checkpoint (entries removed or inserted)"
+    return result
+
+
+_worker_engine = None
+
+
+def _init_worker(database_url: str) -> None:
+    global _worker_engine
+    _worker_engine = create_engine(database_url)
+
+
+def _verify_in_worker(segment: tuple) -> dict:
+    return _check_segment(_worker_engine, segment)
+
+
+def verify_chain(tenant_slug: str | None = None, workers: int | None = None) -> list[dict]:
+    """
+    Verifies the chain of one tenant (by slug) or all tenants.
+    Returns one report per tenant: {"tenant", "segments", "rows", "broken_id", "reason"},
+    where broken_id is the first entry (lowest id) whose link fails, or None.
+    """
+    q = select(Tenant).order_by(Tenant.id)
+    if tenant_slug:
+        q = q.where(Tenant.slug == tenant_slug)
+    tenants = db.session.scalars(q).all()
+    slugs = {t.id: t.slug for t in tenants}
+    segments = [seg for t in tenants for seg in _segments(t.id)]
+    db.session.close()
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(segments) > 1:
+        # Forked workers must not share the parent's pooled connections
+        url = db.engine.url.render_as_string(hide_password=False)
+        db.engine.dispose()
+        with ProcessPoolExecutor(max_workers=min(workers, len(segments)), initializer=_init_worker, initargs=(url,)) as pool:
+            results = list(pool.map(_verify_in_worker, segments))
+    else:
+        results = [_check_segment(db.engine, seg) for seg in segments]
+
+    reports = {tid: {"tenant": slug, "segments": 0, "rows": 0, "broken_id": None, "reason": None} for tid, slug in slugs.items()}
+    for r in results:
+        report = reports[r["tenant_id"]]
+        report["segments"] += 1
+        report["rows"] += r["rows"]
+        if r["broken_id"] is not None and (report["broken_id"] is None or r["broken_id"] < report["broken_id"]):
+            report["broken_id"], report["reason"] = r["broken_id"], r["reason"]
+    return list(reports.values())
@@ -0,0 +1,153 @@
+# Audit log code catalogs
+#
+# audit_log stores actions, statuses, resource types and messages as small
+# integers (see db_types.CodeEnum). Codes are persisted, so entries may only
+# ever be appended — never renumbered or reused.
+
+ACTIONS = {
+    "UNKNOWN": 0,
+    "SEED": 1,
+    "LOGIN": 2,
+    "LOGOUT": 3,
+    "ACCESS_403": 4,
+    "USER_CREATE": 5,
+    "USER_UPDATE": 6,
+    "USER_LOCK": 7,
+    "USER_UNLOCK": 8,
+    "USER_RESET_PASSWORD": 9,
+    "PATIENT_GET": 10,
+    "PATIENT_CREATE": 11,
+    "PATIENT_UPDATE": 12,
+    "TREATMENTPLAN_GET": 13,
+    "TREATMENTPLAN_UPSERT": 14,
+    "TEMPLATE_GET": 15,
+    "TEMPLATE_CREATE": 16,
+    "TEMPLATE_UPDATE": 17,
+    "FORM_BULK_ASSIGN": 18,
+    "FORM_LIST": 19,
+    "FORM_GET": 20,
+    "FORM_CREATE": 21,
+    "FORM_UPDATE": 22,
+    "FORM_SIGN": 23,
+    "FORM_DELETE": 24,
+    "AUDIT_EXPORT": 25,
+    "AUDIT_PATIENT_ACCESS": 26,
+    "USER_BULK_CREATE": 27,
+}
+
+STATUSES = {
+    "SUCCESS": 0,
+    "FAILED": 1,
+}
+
+# First path segment of the resource; the rest is kept as resource_key.
+# Resources with an unlisted prefix (e.g. raw request paths) are stored whole under "other".
+RESOURCE_TYPES = {
+    "other": 0,
+    "database": 1,
+    "auth": 2,
+    "user": 3,
+    "users": 4,
+    "patient": 5,
+    "template": 6,
+    "templates": 7,
+    "audit": 8,
+}
+
+# Description templates, rendered from the entry's params when logs are read or exported
+MESSAGES = {
+    "access_denied_role": (1, "'{username}' ({role}) denied access to {method} {path}"),
+    "login_rate_limited": (2, "Rate limited login attempt for '{username}'"),
+    "login_missing_credentials": (3, "Login failed — missing username or password"),
+    "login_unknown_user": (4, "Login failed — username '{username}' not found"),
+    "login_permanently_locked": (5, "Login blocked — '{username}' is permanently locked"),
+    "login_temporarily_locked": (6, "Login blocked — '{username}' temporarily locked"),
+    "login_wrong_password": (7, "Login failed — wrong password for '{username}'"),
+    "login_success": (8, "User '{username}' ({role}) logged in"),
+    "logout": (9, "User '{username}' logged out"),
+    "user_unlock_not_found": (10, "Failed to unlock user #{user_id} — not found"),
+    "user_unlocked": (11, "Unlocked account for '{username}' ({role})"),
+    "user_lock_not_found": (12, "Failed to lock user #{user_id} — not found"),
+    "user_lock_self": (13, "Attempted to lock own account — denied"),
+    "user_locked": (14, "Permanently locked account for '{username}' ({role})"),
+    "password_reset_invalid": (15, "Password reset failed for user #{user_id} — {reason}"),
+    "password_reset_not_found": (16, "Password reset failed — user #{user_id} not found"),
+    "password_reset": (17, "Reset password for '{username}' ({role})"),
+    "user_not_found": (18, "User #{user_id} not found"),
+    "username_taken": (19, "Username '{username}' already taken"),
+    "role_change_self": (20, "Attempted to change own role — denied"),
+    "user_updated": (21, "Updated user '{username}': {changes}"),
+    "user_create_failed": (22, "User creation failed — {reason}"),
+    "user_created": (23, "Created user '{username}' ({role})"),
+    "user_created_named": (24, "Created user '{username}' ({role}) — {full_name}"),
+    "patient_not_found": (25, "Patient '{patient}' not found"),
+    "patient_access_denied": (26, "Access denied to patient {code} — not assigned provider"),
+    "patient_viewed": (27, "Viewed patient record for {name} ({code})"),
+    "patient_create_failed": (28, "Patient creation failed — {reason}"),
+    "patient_update_not_found": (29, "Patient update failed — '{patient}' not found"),
+    "patient_update_denied": (30, "Access denied to update patient {code} — not assigned provider"),
+    "patient_updated": (31, "Updated patient {name} ({code}) — fields: {fields}"),
+    "plan_access_denied": (32, "Access denied to treatment plan for patient {code}"),
+    "plan_patient_not_found": (33, "Treatment plan update failed — patient '{patient}' not found"),
+    "plan_update_failed": (34, "Treatment plan update failed for {code} — {reason}"),
+    "plan_saved": (35, "{verb} treatment plan for {name} ({code})"),
+    "template_not_found": (36, "Template #{template_id} not found"),
+    "template_create_failed": (37, "Template creation failed — {reason}"),
+    "template_created": (38, "Created form template '{name}' ({category})"),
+    "template_update_not_found": (39, "Template update failed — template #{template_id} not found"),
+    "template_updated": (40, "Updated template '{name}' — fields: {fields}"),
+    "bulk_assign_not_found": (41, "Bulk assignment failed — template #{template_id} not found or archived"),
+    "bulk_assigned": (42, "Assigned '{name}' to {created} patients ({skipped} skipped)"),
+    "forms_access_denied": (43, "Access denied to forms for patient {code}"),
+    "form_access_denied": (44, "Access denied to form #{form_id} for patient {code}"),
+    "form_not_found": (45, "Form #{form_id} not found for patient {code}"),
+    "form_role_denied": (46, "Role '{role}' not allowed to view form #{form_id}"),
+    "form_create_patient_not_found": (47, "Form creation failed — patient '{patient}' not found"),
+    "form_create_denied": (48, "Access denied to create form for patient {code}"),
+    "form_create_failed": (49, "Form creation failed — {reason}"),
+    "form_created": (50, "Added '{template}' form to {name} ({code})"),
+    "form_update_patient_not_found": (51, "Form update failed — patient '{patient}' not found"),
+    "form_update_denied": (52, "Access denied to update form #{form_id} for patient {code}"),
+    "form_signed": (53, "Signed and completed '{template}' for {name} ({code})"),
+    "form_draft_saved": (54, "Saved draft of '{template}' for {name} ({code})"),
+    "form_deleted": (55, "Deleted '{template}' from {name} ({code})"),
+    "audit_export_failed": (56, "Audit export failed — {reason}"),
+    "audit_exported": (57, "Exported {count} audit log entries to {format}{filters}"),
+    "audit_export_aborted": (58, "Audit export to {format} aborted after {count} entries{filters}"),
+    "patient_access_history_viewed": (59, "Viewed access history for {name} ({code})"),
+    "users_bulk_created": (60, "Bulk-created {count} users ({roles})"),
+    "users_bulk_create_failed": (61, "Bulk user import rejected — {invalid} of {rows} rows invalid"),
+}
+
+MESSAGE_CODES = {key: code for key, (code, _) in MESSAGES.items()}
+
+
+def parse_resource(resource):
+    """Split a resource path into (type, key), e.g. "patient/PT-001/forms" -> ("patient", "PT-001/forms")."""
+    if not resource:
+        return "other", None
+    head, _, rest = resource.partition("/")
+    if head in RESOURCE_TYPES and head != "other":
+        return head, rest or None
+    return "other", resource
+
+
+def format_resource(resource_type, resource_key):
+    """Inverse of parse_resource."""
+    if not resource_type or resource_type == "other":
+        return resource_key or ""
+    return f"{resource_type}/{resource_key}" if resource_key else resource_type
+
+
+def render_description(message, params):
+    """Render an entry's description from its message key and params (None when it has neither)."""
+    params = params or {}
+    if message is None:
+        return params.get("text")
+    entry = MESSAGES.get(message)
+    if entry is None:
+        return params.get("text")
+    try:
+        return entry[1].format(**params)
+    except (KeyError, IndexError, ValueError):
+        return entry[1]
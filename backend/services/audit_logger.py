@@ -2,22 +2,62 @@
 from datetime import datetime, timezone
 from flask import g
 from extensions import db
-from models import AuditLog
+from models import AuditLog, User
+from services.audit_chain import chain_entry
+from services.audit_codes import ACTIONS, MESSAGES, STATUSES
+from services.audit_rollup import bump_rollup
+from services.audit_stream import audit_hub, snapshot
 
-def log_access(user_id, action, resource, status, ip_address=None, description=None, tenant_id=None):
+def log_access(user_id, action, resource, status, ip_address=None, description=None, tenant_id=None,
+               message=None, params=None):
     # Capture tenant context if available (may not exist for unauthenticated requests)
     if tenant_id is None:
         tenant_id = getattr(g, "tenant_id", None)
 
+    # Catalog messages (services/audit_codes.py) are stored as a code + params and rendered on read;
+    # a free-text description is only kept for callers without a catalog entry
+    if message is None and description:
+        params = {"text": description}
+    elif message is not None and message not in MESSAGES:
+        # Uncatalogued key: keep whatever text there is instead of an unrenderable code
+        params = {**(params or {}), "text": description or message}
+        message = None
+
+    # The code columns are NOT NULL, so names missing from the catalog are stored as
+    # UNKNOWN with the original kept in params, like migrated legacy rows
+    if action not in ACTIONS:
+        params = {**(params or {}), "legacy_action": action}
+        action = "UNKNOWN"
+    if status not in STATUSES:
+        raise ValueError(f"audit status must be one of {', '.join(STATUSES)}, got {status!r}")
+
+    # Snapshot the actor's name and role; login paths have the user loaded but not yet on g
+    actor = None
+    if user_id is not None:
+        actor = getattr(g, "user", None)
+        if actor is None or actor.id != user_id:
+            actor = db.session.get(User, user_id)
+
+    now = datetime.now(timezone.utc)
     entry = AuditLog(
         tenant_id=tenant_id,
-        timestamp=datetime.now(timezone.utc),
+        timestamp=now,
         user_id=user_id,
+        actor_username=actor.username if actor else None,
+        actor_role=actor.role if actor else None,
         action=action,
         resource=resource,
         status=status,
         ip_address=ip_address,
-        description=description,
+        message=message,
+        params=params,
     )
     db.session.add(entry)
-    db.session.commit()
\ No newline at end of file
+    chain_entry(entry)  # locks the tenant's chain head until commit; flushes, so the id is assigned
+    bump_rollup(tenant_id, now, action, status)
+
+    # Live tail: publish only once committed
+    record = snapshot(entry) if audit_hub.has_subscribers(tenant_id) else None
+    db.session.commit()
+    if record:
+        audit_hub.publish(tenant_id, record)
\ No newline at end of file
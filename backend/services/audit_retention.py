@@ -0,0 +1,103 @@
+"""
+Retention purge for audit_log.
+
+Each tenant keeps entries for tenant.audit_retention_days, falling back to
+AUDIT_RETENTION_DAYS. Expired rows are deleted in bounded id-range batches
+(AUDIT_PURGE_BATCH_ROWS rows each), every batch in its own short
+transaction with a pause in between, so the table is never locked for long
+and autovacuum can keep up with the dead tuples.
+
+The job keeps no state of its own: each run starts from the oldest expired
+id still present, so an interrupted purge continues where it stopped the
+next time it runs. Archived segments (services/audit_archive.py) whose whole
+month is past the cutoff are removed as well.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+
+import config
+from extensions import db
+from models import AuditLog, Tenant
+from services.audit_archive import purge_archived
+from services.audit_chain import anchor_before_delete
+
+
+def retention_days(tenant: Tenant) -> int:
+    return tenant.audit_retention_days or config.AUDIT_RETENTION_DAYS
+
+
+def purge_cutoff(tenant: Tenant, now: datetime | None = None) -> datetime:
+    return (now or datetime.now(timezone.utc)) - timedelta(days=retention_days(tenant))
+
+
+def purge_tenant(tenant: Tenant, batch_rows: int | None = None, pause_seconds: float | None = None,
+                 dry_run: bool = False, now: datetime | None = None, archive_dir: str | None = None,
+                 progress=None) -> dict:
+    """
+    Deletes one tenant's expired audit entries.
+    progress(tenant, deleted, fraction) is called after every batch; fraction is
+    how far through the expired id range the purge is (0..1).
+    Returns {"tenant", "cutoff", "deleted", "batches", "archived"}; with dry_run,
+    "deleted" is the number of rows that would go and nothing is changed.
+    """
+    batch_rows = batch_rows or config.AUDIT_PURGE_BATCH_ROWS
+    pause_seconds = config.AUDIT_PURGE_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+    cutoff = purge_cutoff(tenant, now)
+    summary = {"tenant": tenant.slug, "cutoff": cutoff, "deleted": 0, "batches": 0, "archived": []}
+
+    expired = (AuditLog.tenant_id == tenant.id, AuditLog.timestamp < cutoff)
+
+    if dry_run:
+        summary["deleted"] = db.session.scalar(select(func.count()).select_from(AuditLog).where(*expired))
+        return summary
+
+    first = db.session.scalar(select(func.min(AuditLog.id)).where(*expired))
+    if first is not None:
+        # Ids follow insertion time, so the newest expired row bounds the range closely enough for
+        # progress; the timestamp predicate on every batch is what keeps the delete correct
+        last = db.session.scalar(select(AuditLog.id).where(*expired).order_by(AuditLog.timestamp.desc()).limit(1))
+        lo = first
+        while True:
+            # Upper id of the next batch_rows expired rows, so each batch is bounded in rows
+            # even though other tenants' ids are interleaved with this tenant's
+            hi = db.session.scalar(
+                select(AuditLog.id).where(*expired, AuditLog.id >= lo)
+                .order_by(AuditLog.id).offset(batch_rows - 1).limit(1)
+            )
+            batch = (*expired, AuditLog.id >= lo)
+            if hi is not None:
+                batch += (AuditLog.id <= hi,)
+            # Keep the hash chain verifiable once these rows are gone
+            anchor_before_delete(tenant.id, *batch)
+            deleted = db.session.execute(
+                delete(AuditLog).where(*batch), execution_options={"synchronize_session": False}
+            ).rowcount
+            db.session.commit()
+
+            summary["deleted"] += deleted
+            summary["batches"] += 1
+            if progress:
+                done = 1.0 if hi is None else min(1.0, (hi - first + 1) / max(1, last - first + 1))
+                progress(tenant, summary["deleted"], done)
+
+            if hi is None:
+                break
+            lo = hi + 1
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+    summary["archived"] = purge_archived(tenant.id, cutoff, archive_dir)
+    return summary
+
+
+def purge_all(tenant_slug: str | None = None, **kwargs) -> list[dict]:
+    """
+    Runs purge_tenant for one tenant (by slug) or all of them. Returns one summary per tenant.
+    """
+    q = select(Tenant).order_by(Tenant.id)
+    if tenant_slug:
+        q = q.where(Tenant.slug == tenant_slug)
+    return [purge_tenant(tenant, **kwargs) for tenant in db.session.scalars(q).all()]
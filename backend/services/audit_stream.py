@@ -0,0 +1,154 @@
+"""
+In-process fan-out hub for the live audit tail.
+
+Each worker process runs one tail thread while it has subscribers: every
+AUDIT_STREAM_POLL_SECONDS it reads the entries committed since the last
+poll, for the tenants being watched, and hands each to the matching
+subscriptions. N open /api/audit/stream connections in a worker therefore
+cost one query per poll, whichever process wrote the entries.
+log_access also publishes its own entries straight away after commit; the
+tail skips ids it has already published.
+
+The tail re-reads the last AUDIT_STREAM_POLL_LOOKBACK ids on every poll, so
+an entry whose transaction commits after a higher id was already seen is
+still picked up. A subscriber whose queue overflows is flagged and catches
+up from the database itself.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import func, select
+
+import config
+from extensions import db
+from models import AuditLog
+
+
+def snapshot(entry: AuditLog) -> dict:
+    # Plain dict of the row's columns, safe to hand to other threads after the session moves on
+    return {col.name: getattr(entry, col.key) for col in AuditLog.__table__.columns}
+
+
+class Subscription:
+    def __init__(self, tenant_id: int, max_queue: int):
+        self.tenant_id = tenant_id
+        self.overflowed = False
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+
+    def push(self, record: dict) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float):
+        # Next record, or None if nothing arrived within timeout
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self) -> None:
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class AuditHub:
+    def __init__(self, max_queue: int = 1000, poll_seconds: float = 1.0, lookback: int = 50):
+        self.max_queue = max_queue
+        self.poll_seconds = poll_seconds
+        self.lookback = lookback
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._app = None
+        self._tail: threading.Thread | None = None
+        self._last_id: int | None = None
+        self._published: set[int] = set()
+        self._published_order: deque[int] = deque()
+
+    def init_app(self, app) -> None:
+        # The tail thread needs an app context for its queries
+        self._app = app
+
+    def subscribe(self, tenant_id: int) -> Subscription:
+        sub = Subscription(tenant_id, self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(tenant_id, set()).add(sub)
+            # Started on demand, so it only ever runs in the worker that serves streams
+            if self._app is not None and self._tail is None:
+                self._tail = threading.Thread(target=self._run_tail, name="audit-tail", daemon=True)
+                self._tail.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.tenant_id)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.tenant_id]
+
+    def publish(self, tenant_id: int, record: dict) -> None:
+        with self._lock:
+            if record["id"] in self._published:
+                return
+            self._published.add(record["id"])
+            self._published_order.append(record["id"])
+            if len(self._published_order) > self.max_queue:
+                self._published.discard(self._published_order.popleft())
+            subs = list(self._subscribers.get(tenant_id, ()))
+        for sub in subs:
+            sub.push(record)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def has_subscribers(self, tenant_id: int) -> bool:
+        with self._lock:
+            return tenant_id in self._subscribers
+
+    def _run_tail(self) -> None:
+        with self._app.app_context():
+            while True:
+                with self._lock:
+                    tenants = list(self._subscribers)
+                    if not tenants:
+                        # Exits with the last subscriber; the next subscribe starts a new tail
+                        self._tail = None
+                        self._last_id = None
+                        return
+                try:
+                    self._poll(tenants)
+                except Exception:
+                    self._app.logger.exception("audit tail poll failed")
+                finally:
+                    db.session.close()
+                time.sleep(self.poll_seconds)
+
+    def _poll(self, tenants: list[int]) -> None:
+        if self._last_id is None:
+            # Streams replay anything older themselves (Last-Event-ID), so the tail starts at the head
+            self._last_id = db.session.execute(select(func.max(AuditLog.id))).scalar() or 0
+            return
+        rows = db.session.scalars(
+            select(AuditLog)
+            .where(AuditLog.id > self._last_id - self.lookback, AuditLog.tenant_id.in_(tenants))
+            .order_by(AuditLog.id)
+        ).all()
+        for log in rows:
+            self._last_id = max(self._last_id, log.id)
+            self.publish(log.tenant_id, snapshot(log))
+
+
+audit_hub = AuditHub(
+    max_queue=config.AUDIT_STREAM_QUEUE_SIZE,
+    poll_seconds=config.AUDIT_STREAM_POLL_SECONDS,
+    lookback=config.AUDIT_STREAM_POLL_LOOKBACK,
+)
@@ -0,0 +1,195 @@
+"""
+Response compression and per-endpoint traffic metrics.
+
+Responses are compressed with brotli or gzip, whichever the client prefers
+in Accept-Encoding (brotli wins ties; it is used only when the optional
+brotli package is installed). Buffered bodies under COMPRESS_MIN_BYTES go
+out as they are. Streamed responses (audit exports) are compressed chunk by
+chunk as the generator yields, so they stay streamed. Skipped:
+
+  - bodies that are already compressed (Content-Encoding set, gzip/zip/image types)
+  - Server-Sent Events, which must reach the client event by event
+  - /api/auth responses, which carry session tokens (BREACH)
+
+Every request records its latency up to the response headers
+(http_request_duration_seconds), plus the body bytes before and after
+compression (http_response_body_bytes_total, http_response_bytes_total),
+labelled by endpoint. Under gunicorn these are summed over all workers at
+scrape time (services/metrics.py), so rates and latency quantiles cover
+the whole deployment, not whichever worker answered the scrape.
+
+A strong ETag on a compressed response gets the encoding appended
+("<tag>-br"), since the bytes differ from the identity body. Conditional
+requests carrying that variant are matched by etag_matches(), and 304s echo
+it back.
+"""
+
+import time
+import zlib
+
+from flask import g, request
+
+import config
+from services import metrics
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+INCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "application/gzip", "application/zip", "application/x-gzip", "text/event-stream")
+
+request_duration = metrics.histogram(
+    "http_request_duration_seconds", "Time from request start to response headers", ("endpoint", "method")
+)
+body_bytes = metrics.counter(
+    "http_response_body_bytes_total", "Response body bytes before compression", ("endpoint",)
+)
+wire_bytes = metrics.counter(
+    "http_response_bytes_total", "Response body bytes sent, after compression", ("endpoint", "encoding")
+)
+
+
+ENCODINGS = ("br", "gzip")
+
+
+def _endpoint() -> str:
+    return request.endpoint or "unmatched"
+
+
+def choose_encoding() -> str | None:
+    accepted = request.accept_encodings
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda enc: accepted[enc])
+    return best if accepted[best] > 0 else None
+
+
+def etag_matches(tag: str) -> bool:
+    """True if If-None-Match names tag, plain or in any encoded variant compress_response gives it."""
+    inm = request.if_none_match
+    return any(inm.contains_weak(t) for t in (tag, *(f"{tag}-{enc}" for enc in ENCODINGS)))
+
+
+def _encode_etag(response, encoding: str) -> None:
+    tag, weak = response.get_etag()
+    if tag and not weak:
+        response.set_etag(f"{tag}-{encoding}")
+
+
+def _echo_etag(response) -> None:
+    # A 304 carries the validator the client holds, which is the encoded one if it got a compressed body
+    tag, weak = response.get_etag()
+    if not tag or weak:
+        return
+    response.vary.add("Accept-Encoding")
+    for enc in ENCODINGS:
+        if request.if_none_match.contains_weak(f"{tag}-{enc}"):
+            response.set_etag(f"{tag}-{enc}")
+            return
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=config.COMPRESS_BROTLI_QUALITY)
+            self.compress, self._finish = self._c.process, self._c.finish
+        else:
+            self._c = zlib.compressobj(config.COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.compress, self._finish = self._c.compress, self._c.flush
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def _compress_stream(chunks, encoding: str, endpoint: str):
+    compressor = _Compressor(encoding)
+    raw = sent = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            raw += len(chunk)
+            out = compressor.compress(chunk)
+            if out:
+                sent += len(out)
+                yield out
+        out = compressor.finish()
+        sent += len(out)
+        yield out
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        body_bytes.inc(raw, endpoint=endpoint)
+        wire_bytes.inc(sent, endpoint=endpoint, encoding=encoding)
+
+
+def _count_stream(chunks, endpoint: str):
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        body_bytes.inc(sent, endpoint=endpoint)
+        wire_bytes.inc(sent, endpoint=endpoint, encoding="identity")
+
+
+def _compressible(response) -> bool:
+    return (
+        200 <= response.status_code
+        and response.status_code not in (204, 206, 304)
+        and request.method != "HEAD"
+        and "Content-Encoding" not in response.headers
+        and not response.direct_passthrough
+        and not (response.mimetype or "").startswith(INCOMPRESSIBLE_TYPES)
+        and "no-transform" not in (response.headers.get("Cache-Control") or "")
+        and request.blueprint != "auth"
+    )
+
+
+def compress_response(response):
+    endpoint = _endpoint()
+    started = g.pop("request_started", None)
+    if started is not None:
+        request_duration.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+
+    if response.status_code == 304:
+        _echo_etag(response)
+
+    compressible = _compressible(response)
+    if compressible:
+        response.vary.add("Accept-Encoding")
+    encoding = choose_encoding() if compressible else None
+
+    if response.is_streamed:
+        if encoding:
+            response.response = _compress_stream(response.response, encoding, endpoint)
+            response.headers["Content-Encoding"] = encoding
+            response.headers.pop("Content-Length", None)
+            _encode_etag(response, encoding)
+        else:
+            response.response = _count_stream(response.response, endpoint)
+        return response
+
+    data = response.get_data()
+    body_bytes.inc(len(data), endpoint=endpoint)
+    if encoding and len(data) >= config.COMPRESS_MIN_BYTES:
+        compressor = _Compressor(encoding)
+        compressed = compressor.compress(data) + compressor.finish()
+        if len(compressed) < len(data):
+            response.set_data(compressed)
+            response.headers["Content-Encoding"] = encoding
+            _encode_etag(response, encoding)
+            data = compressed
+    wire_bytes.inc(len(data), endpoint=endpoint, encoding=response.headers.get("Content-Encoding", "identity"))
+    return response
+
+
+def init_compression(app) -> None:
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    app.after_request(compress_response)
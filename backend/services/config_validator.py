@@ -7,6 +7,9 @@ Prevents silent deployment with insecure defaults (NIST SP 800-123).
 import os
 import sys
 
+import config
+from services.json_provider import OrjsonProvider
+
 # Values that should never be used in a real deployment
 INSECURE_SECRETS = {"dev_secret", "change_me", "secret", "password", ""}
 
@@ -40,6 +43,39 @@ def validate_config(app):
     if cors_origins == "*":
         errors.append("CORS_ORIGINS is set to '*' — restrict to your frontend domain")
 
+    # Purging audit entries earlier than six years falls short of HIPAA documentation retention
+    if config.AUDIT_RETENTION_DAYS < 2190:
+        warnings.append(f"AUDIT_RETENTION_DAYS is {config.AUDIT_RETENTION_DAYS} — HIPAA expects audit records to be kept for six years (2190 days)")
+
+    # Connection pool: values SQLAlchemy would reject, or that make requests queue for connections
+    if config.DB_POOL_SIZE < 1:
+        errors.append(f"DB_POOL_SIZE is {config.DB_POOL_SIZE} — it must be at least 1")
+    if config.DB_MAX_OVERFLOW < 0:
+        errors.append(f"DB_MAX_OVERFLOW is {config.DB_MAX_OVERFLOW} — it must be 0 or more")
+    if config.DB_POOL_TIMEOUT_SECONDS <= 0:
+        errors.append(f"DB_POOL_TIMEOUT_SECONDS is {config.DB_POOL_TIMEOUT_SECONDS} — it must be positive")
+    if config.DB_POOL_RECYCLE_SECONDS < 0 and not config.DB_POOL_PRE_PING:
+        warnings.append("DB_POOL_RECYCLE_SECONDS and DB_POOL_PRE_PING are both off — connections dropped by the server or a failover will surface as request errors")
+    threads = int(os.getenv("GUNICORN_THREADS", "0") or 0) or 4
+    if threads > config.DB_POOL_SIZE + config.DB_MAX_OVERFLOW:
+        warnings.append(f"GUNICORN_THREADS ({threads}) exceeds DB_POOL_SIZE + DB_MAX_OVERFLOW ({config.DB_POOL_SIZE + config.DB_MAX_OVERFLOW}) — threads will wait for connections")
+    if config.AUDIT_STREAM_MAX_PER_WORKER >= threads:
+        warnings.append(f"AUDIT_STREAM_MAX_PER_WORKER ({config.AUDIT_STREAM_MAX_PER_WORKER}) is not below GUNICORN_THREADS ({threads}) — open audit streams can take every thread of a worker")
+
+    timeouts = config.DB_STATEMENT_TIMEOUT_MS
+    negative = [kind for kind, ms in timeouts.items() if ms < 0]
+    if negative:
+        errors.append(f"DB_STATEMENT_TIMEOUT_*_MS must be 0 (no limit) or positive — check {', '.join(negative)}")
+    elif timeouts["interactive"] == 0:
+        warnings.append("DB_STATEMENT_TIMEOUT_INTERACTIVE_MS is 0 — a runaway query can hold a worker thread indefinitely")
+    elif any(0 < timeouts[kind] < timeouts["interactive"] for kind in ("report", "export")):
+        warnings.append("report/export statement timeouts are shorter than the interactive one")
+
+    if config.JSON_PROVIDER.lower() not in ("auto", "orjson", "stdlib"):
+        errors.append(f"JSON_PROVIDER is '{config.JSON_PROVIDER}' — use auto, orjson or stdlib")
+    elif config.JSON_PROVIDER.lower() == "orjson" and not isinstance(app.json, OrjsonProvider):
+        warnings.append("JSON_PROVIDER is orjson but orjson is not installed — responses use the stdlib encoder")
+
     if is_production:
         if errors:
             print("\n[FATAL] Configuration validation failed:\n", file=sys.stderr)
@@ -0,0 +1,116 @@
+"""
+Engine options, per-endpoint statement timeouts and pool metrics.
+
+engine_options() turns the DB_POOL_* settings into SQLALCHEMY_ENGINE_OPTIONS.
+On Postgres the pool is a TimedQueuePool, which records how long each
+checkout waited for a connection (db_pool_checkout_wait_seconds) and
+counts checkouts that gave up (db_pool_checkout_timeouts_total).
+
+Every checkout also sets the connection's statement_timeout for the kind of
+work it serves: views tagged with @statement_timeout("report" | "export")
+get the longer limits from DB_STATEMENT_TIMEOUT_MS, other requests the
+"interactive" one, and code outside a request the "background" one. The
+value is remembered per connection, so the SET is only sent when it changes.
+"""
+
+import time
+import weakref
+
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+import config
+from services import metrics
+
+checkout_wait = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent obtaining a pooled database connection"
+)
+checkout_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS"
+)
+
+checked_out = metrics.gauge("db_pool_checked_out", "Connections currently checked out")
+overflow = metrics.gauge("db_pool_overflow", "Connections open beyond DB_POOL_SIZE")
+
+_pools = weakref.WeakSet()
+
+
+def _update_gauges() -> None:
+    # Set on every checkout and return rather than read at scrape time, since a scrape
+    # is answered by one worker but sums the gauges of all of them
+    pools = list(_pools)
+    checked_out.set(sum(p.checkedout() for p in pools))
+    overflow.set(sum(max(0, p.overflow()) for p in pools))
+
+
+class TimedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools.add(self)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            checkout_timeouts.inc()
+            raise
+        checkout_wait.observe(time.perf_counter() - started)
+        _update_gauges()
+        return conn
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        _update_gauges()
+
+
+def engine_options(database_url: str) -> dict:
+    if database_url.startswith("sqlite"):
+        # SQLite keeps SQLAlchemy's own pool choice (a single-thread pool for :memory:)
+        return {"pool_pre_ping": config.DB_POOL_PRE_PING}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": config.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+
+def statement_timeout(kind: str):
+    """
+    Tags a view with its statement timeout class ("interactive", "report", "export").
+    Works above or below @require_auth, which copies the tag onto its wrapper.
+    """
+    if kind not in config.DB_STATEMENT_TIMEOUT_MS:
+        raise ValueError(f"unknown statement timeout class '{kind}'")
+
+    def decorator(fn):
+        fn.statement_timeout_class = kind
+        return fn
+    return decorator
+
+
+def _timeout_ms() -> int:
+    kind = "background"
+    if has_request_context():
+        view = current_app.view_functions.get(request.endpoint)
+        kind = getattr(view, "statement_timeout_class", "interactive")
+    return config.DB_STATEMENT_TIMEOUT_MS[kind]
+
+
+@event.listens_for(TimedQueuePool, "checkout")
+def _apply_statement_timeout(dbapi_connection, connection_record, connection_proxy):
+    timeout = _timeout_ms()
+    if connection_record.info.get("statement_timeout") == timeout:
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SET statement_timeout = {int(timeout)}")
+    finally:
+        cursor.close()
+    # psycopg2 opened a transaction for the SET; commit it so a later rollback can't undo it
+    dbapi_connection.commit()
+    connection_record.info["statement_timeout"] = timeout
@@ -0,0 +1,91 @@
+"""
+App metrics, served in the Prometheus text format at GET /metrics.
+
+Backed by prometheus_client. Under gunicorn every worker is its own process,
+so gunicorn.conf.py points PROMETHEUS_MULTIPROC_DIR at a shared directory:
+each worker writes its values to memory-mapped files there, and a scrape,
+whichever worker answers it, reads and merges all of them. Counters and
+histograms are summed across workers; gauges are summed over live workers
+(multiprocess_mode="livesum"). Without PROMETHEUS_MULTIPROC_DIR (the dev
+server, scripts) the values are those of the current process.
+
+The wrappers keep labels as keyword arguments: checkout_wait.observe(0.2),
+wire_bytes.inc(512, endpoint="audit.get_logs", encoding="br").
+"""
+
+import os
+import threading
+
+from prometheus_client import CollectorRegistry, REGISTRY, generate_latest
+from prometheus_client import Counter as _PromCounter
+from prometheus_client import Gauge as _PromGauge
+from prometheus_client import Histogram as _PromHistogram
+from prometheus_client import disable_created_metrics, multiprocess
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; suits pool waits and request latencies alike
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry: dict = {}
+_lock = threading.Lock()
+
+# *_created timestamps add a series per label set and nothing the dashboards use
+disable_created_metrics()
+
+
+class _Metric:
+    def __init__(self, metric, labelnames):
+        self._metric, self.labelnames = metric, tuple(labelnames)
+
+    def _child(self, labels):
+        return self._metric.labels(**{k: str(labels.get(k, "")) for k in self.labelnames}) if self.labelnames else self._metric
+
+
+class Counter(_Metric):
+    def inc(self, amount: float = 1, **labels) -> None:
+        self._child(labels).inc(amount)
+
+
+class Histogram(_Metric):
+    def observe(self, value: float, **labels) -> None:
+        self._child(labels).observe(value)
+
+
+class Gauge(_Metric):
+    def set(self, value: float, **labels) -> None:
+        self._child(labels).set(value)
+
+
+def _register(name: str, build):
+    with _lock:
+        # Re-registering (e.g. a module reloaded in tests or scripts) keeps the first instance
+        if name not in _registry:
+            _registry[name] = build()
+        return _registry[name]
+
+
+def counter(name: str, help: str, labelnames=()) -> Counter:
+    return _register(name, lambda: Counter(_PromCounter(name, help, labelnames), labelnames))
+
+
+def histogram(name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(name, lambda: Histogram(_PromHistogram(name, help, labelnames, buckets=buckets), labelnames))
+
+
+def gauge(name: str, help: str, labelnames=()) -> Gauge:
+    return _register(name, lambda: Gauge(_PromGauge(name, help, labelnames, multiprocess_mode="livesum"), labelnames))
+
+
+def render() -> bytes:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drops a dead worker's live gauges; called from gunicorn's child_exit hook."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
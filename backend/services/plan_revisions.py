@@ -0,0 +1,159 @@
+"""
+Revision history for treatment plans.
+
+Every saved change to a plan adds a TreatmentPlanRevision. Most revisions are
+deltas: a short list of operations turning the previous plan document into
+the new one. Every TREATMENT_PLAN_SNAPSHOT_EVERY versions (and whenever a
+delta would be larger than the document itself) the whole document is stored
+instead, so rebuilding any version reads one snapshot plus at most a few
+deltas in a single query.
+
+A plan document is the API shape of the plan's editable fields:
+{"startDate", "reviewDate", "status", "goals"}.
+
+Delta operations, with paths as lists of keys / list indexes:
+    ["set", path, value]    set or append (index == len) a value
+    ["del", path]           remove a key
+    ["trim", path, length]  truncate a list
+"""
+
+import copy
+import json
+
+from sqlalchemy import func, select
+
+import config
+from extensions import db
+from models import TreatmentPlan, TreatmentPlanRevision
+
+
+def plan_document(tp: TreatmentPlan) -> dict:
+    return {
+        "startDate": tp.start_date.isoformat() if tp.start_date else None,
+        "reviewDate": tp.review_date.isoformat() if tp.review_date else None,
+        "status": tp.status,
+        "goals": copy.deepcopy(tp.goals) if tp.goals is not None else [],
+    }
+
+
+def diff(old, new, path=()) -> list:
+    """Operations that turn old into new (empty when equal)."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [["del", [*path, k]] for k in old if k not in new]
+        for k, v in new.items():
+            if k in old:
+                ops.extend(diff(old[k], v, (*path, k)))
+            else:
+                ops.append(["set", [*path, k], v])
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        for i in range(min(len(old), len(new))):
+            ops.extend(diff(old[i], new[i], (*path, i)))
+        if len(new) < len(old):
+            ops.append(["trim", list(path), len(new)])
+        for i in range(len(old), len(new)):
+            ops.append(["set", [*path, i], new[i]])
+        return ops
+
+    if type(old) is type(new) and old == new:
+        return []
+    return [["set", list(path), new]]
+
+
+def apply(doc, ops):
+    """Returns a copy of doc with ops applied."""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        kind, path = op[0], op[1]
+        if not path:
+            if kind == "set":
+                doc = copy.deepcopy(op[2])
+            elif kind == "trim":
+                del doc[op[2]:]
+            continue
+
+        parent = doc
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+        if kind == "set":
+            if isinstance(parent, list) and key == len(parent):
+                parent.append(copy.deepcopy(op[2]))
+            else:
+                parent[key] = copy.deepcopy(op[2])
+        elif kind == "del":
+            del parent[key]
+        elif kind == "trim":
+            del parent[key][op[2]:]
+    return doc
+
+
+def _size(value) -> int:
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False))
+
+
+def _add(tp: TreatmentPlan, version: int, kind: str, data, user_id, created_at=None) -> None:
+    rev = TreatmentPlanRevision(tenant_id=tp.tenant_id, plan_id=tp.id, version=version, kind=kind, data=data, user_id=user_id)
+    if created_at is not None:
+        rev.created_at = created_at
+    db.session.add(rev)
+    tp.revision = version
+
+
+def record_revision(tp: TreatmentPlan, previous: dict | None, user_id: int | None) -> bool:
+    """
+    Records the plan's current state as a new revision, given its document before
+    the change (None for a new plan). The caller holds the plan row lock and commits.
+    Returns False when nothing changed.
+    """
+    current = plan_document(tp)
+    if previous is None:
+        db.session.flush()  # assigns tp.id
+        _add(tp, 1, "snapshot", current, user_id)
+        return True
+
+    if tp.revision == 0:
+        # Plan predates history: keep its prior state as version 1
+        _add(tp, 1, "snapshot", previous, None, created_at=tp.updated_at)
+
+    ops = diff(previous, current)
+    if not ops:
+        return False
+
+    version = tp.revision + 1
+    if (version - 1) % config.TREATMENT_PLAN_SNAPSHOT_EVERY == 0 or _size(ops) >= _size(current):
+        _add(tp, version, "snapshot", current, user_id)
+    else:
+        _add(tp, version, "delta", ops, user_id)
+    return True
+
+
+def plan_at(plan_id: int, version: int) -> dict | None:
+    """Rebuilds the plan document as of a version; None if there is no such version."""
+    base = (
+        select(func.max(TreatmentPlanRevision.version))
+        .where(
+            TreatmentPlanRevision.plan_id == plan_id,
+            TreatmentPlanRevision.kind == "snapshot",
+            TreatmentPlanRevision.version <= version,
+        )
+        .scalar_subquery()
+    )
+    rows = db.session.execute(
+        select(TreatmentPlanRevision.version, TreatmentPlanRevision.kind, TreatmentPlanRevision.data)
+        .where(
+            TreatmentPlanRevision.plan_id == plan_id,
+            TreatmentPlanRevision.version >= base,
+            TreatmentPlanRevision.version <= version,
+        )
+        .order_by(TreatmentPlanRevision.version)
+    ).all()
+    if not rows or rows[-1].version != version:
+        return None
+
+    doc = None
+    for row in rows:
+        doc = copy.deepcopy(row.data) if row.kind == "snapshot" else apply(doc, row.data)
+    return doc
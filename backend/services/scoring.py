@@ -28,4 +28,164 @@ def calculate_risk_level(patient_id: int) -> str:
         return "high"
     if any(k in diagnosis for k in MODERATE_SEVERITY_DIAG):
         return "moderate"
-    return "low"
\ No newline at end of file
+    return "low"
+
+# ─── INSTRUMENT SCORING (PHQ-9, GAD-7, ...) ───
+
+SCORING_METHODS = {"sum", "mean"}
+
+
+def validate_scoring(scoring, fields) -> tuple[bool, str]:
+    """
+    Validates template scoring rules against the template's fields.
+    Returns (is_valid, error_message). None means the template is not scored.
+    """
+    if scoring is None:
+        return True, ""
+
+    if not isinstance(scoring, dict):
+        return False, "scoring must be an object"
+
+    if scoring.get("method") not in SCORING_METHODS:
+        return False, f"scoring.method must be one of {sorted(SCORING_METHODS)}"
+
+    labels = {f.get("label") for f in (fields or []) if isinstance(f, dict)}
+    scored = scoring.get("fields")
+    if scored is not None:
+        if not isinstance(scored, list) or not scored:
+            return False, "scoring.fields must be a non-empty list"
+        missing = [label for label in scored if label not in labels]
+        if missing:
+            return False, f"scoring.fields references unknown fields: {', '.join(map(str, missing))}"
+    elif not _scored_labels(scoring, fields):
+        return False, "scoring requires at least one scale field"
+
+    bands = scoring.get("bands", [])
+    if not isinstance(bands, list):
+        return False, "scoring.bands must be a list"
+    for band in bands:
+        if not isinstance(band, dict) or not (band.get("label") or "").strip():
+            return False, "each scoring band needs a label"
+        try:
+            if float(band["min"]) > float(band["max"]):
+                return False, f"scoring band '{band['label']}' has min greater than max"
+        except (KeyError, TypeError, ValueError):
+            return False, f"scoring band '{band['label']}' needs numeric min and max"
+
+    return True, ""
+
+
+def _scored_labels(scoring, fields) -> list[str]:
+    # Explicit field list wins; otherwise every scale field counts
+    if scoring.get("fields"):
+        return list(scoring["fields"])
+    return [f.get("label") for f in (fields or []) if isinstance(f, dict) and f.get("type") == "scale"]
+
+
+def compute_form_score(scoring, fields, form_data) -> tuple[float | None, str | None]:
+    """
+    Applies template scoring rules to a form's answers.
+    Returns (score, severity). Unanswered or non-numeric items are skipped;
+    score is None when nothing scoreable was answered.
+    """
+    if not scoring or not isinstance(form_data, dict):
+        return None, None
+
+    values = []
+    for label in _scored_labels(scoring, fields):
+        raw = form_data.get(label)
+        if raw in (None, "") or isinstance(raw, bool):
+            continue
+        try:
+            values.append(float(raw))
+        except (TypeError, ValueError):
+            continue
+
+    if not values:
+        return None, None
+
+    score = sum(values)
+    if scoring.get("method") == "mean":
+        score = score / len(values)
+    score = round(score, 2)
+
+    severity = None
+    for band in scoring.get("bands") or []:
+        if float(band["min"]) <= score <= float(band["max"]):
+            severity = band["label"]
+            break
+
+    return score, severity
+
+
+def apply_form_score(form, template) -> None:
+    """
+    Materializes score/severity onto a PatientForm.
+    Rules come from the template version the form was filled against,
+    falling back to the live template for unversioned forms.
+    Call before committing any change to form_data.
+    """
+    from services.template_versions import version_snapshot
+
+    snap = version_snapshot(form.template_version_id)
+    if snap:
+        scoring, fields = snap["scoring"], snap["fields"]
+    elif template:
+        scoring, fields = template.scoring, template.fields
+    else:
+        scoring, fields = None, None
+    form.score, form.severity = compute_form_score(scoring, fields, form.form_data)
+
+
+def backfill_form_scores(tenant_id: int, batch_size: int = 500) -> dict:
+    """
+    Recomputes stored scores for every form in a tenant filled against a scored
+    template version. Walks each version's forms in id order, loading only
+    (id, form_data), and writes each batch back with a single executemany UPDATE.
+    """
+    from sqlalchemy import select, update
+    from extensions import db
+    from models import FormTemplateVersion, PatientForm
+
+    versions = db.session.scalars(
+        select(FormTemplateVersion)
+        .where(
+            FormTemplateVersion.scoring.isnot(None),
+            FormTemplateVersion.id.in_(
+                select(PatientForm.template_version_id)
+                .where(PatientForm.tenant_id == tenant_id)
+                .distinct()
+            ),
+        )
+    ).all()
+
+    summary = {"versions": 0, "forms": 0}
+    for v in versions:
+        summary["versions"] += 1
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(PatientForm.id, PatientForm.form_data)
+                .where(
+                    PatientForm.tenant_id == tenant_id,
+                    PatientForm.template_version_id == v.id,
+                    PatientForm.id > last_id,
+                )
+                .order_by(PatientForm.id.asc())
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            updates = []
+            for form_id, form_data in rows:
+                score, severity = compute_form_score(v.scoring, v.fields, form_data)
+                updates.append({"id": form_id, "score": score, "severity": severity})
+
+            db.session.execute(update(PatientForm), updates)
+            db.session.commit()
+
+            summary["forms"] += len(rows)
+            last_id = rows[-1][0]
+
+    return summary
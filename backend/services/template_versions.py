@@ -0,0 +1,78 @@
+"""
+Immutable, content-addressed form template versions.
+A version is identified by the sha256 of its canonical fields + scoring JSON,
+so identical definitions are stored once no matter how many templates use them.
+"""
+
+import hashlib
+import json
+
+from sqlalchemy.exc import IntegrityError
+
+import config
+from extensions import db
+from models import FormTemplateVersion
+from services.ttl_cache import LRUCache
+
+# version id -> snapshot; never stale because versions never change, only evicted for size
+_snapshot_cache = LRUCache(max_entries=config.TEMPLATE_VERSION_CACHE_SIZE)
+
+
+def content_hash(fields, scoring) -> str:
+    """
+    Hashes the canonical JSON form of a template definition.
+    Key order and whitespace never change the hash.
+    """
+    canonical = json.dumps(
+        {"fields": fields or [], "scoring": scoring},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_or_create_version(fields, scoring) -> FormTemplateVersion:
+    """
+    Returns the version row for this definition, inserting it if it is new.
+    A concurrent insert of the same content is resolved by re-reading the winner.
+    """
+    digest = content_hash(fields, scoring)
+    version = FormTemplateVersion.query.filter_by(content_hash=digest).first()
+    if version:
+        return version
+
+    try:
+        with db.session.begin_nested():
+            version = FormTemplateVersion(content_hash=digest, fields=fields or [], scoring=scoring)
+            db.session.add(version)
+    except IntegrityError:
+        version = FormTemplateVersion.query.filter_by(content_hash=digest).first()
+    return version
+
+
+def ensure_current_version(template) -> int:
+    """
+    Returns the template's current version id, snapshotting it first if the
+    template predates versioning.
+    """
+    if not template.current_version_id:
+        template.current_version_id = get_or_create_version(template.fields, template.scoring).id
+    return template.current_version_id
+
+
+def version_snapshot(version_id: int | None) -> dict | None:
+    """
+    Returns {hash, fields, scoring} for a version id.
+    Versions are never modified, so the result is cached until evicted for size.
+    """
+    if not version_id:
+        return None
+    snap = _snapshot_cache.get(version_id)
+    if snap is None:
+        v = db.session.get(FormTemplateVersion, version_id)
+        if not v:
+            return None
+        snap = {"hash": v.content_hash, "fields": v.fields or [], "scoring": v.scoring}
+        _snapshot_cache.set(version_id, snap)
+    return snap
@@ -0,0 +1,34 @@
+"""
+Coalesced last_seen tracking.
+
+Every authenticated request is a heartbeat, but writing user.last_seen on each
+one would turn reads into writes. touch_last_seen() skips the write while the
+stored value is younger than USER_LAST_SEEN_INTERVAL_SECONDS, and the UPDATE
+itself is conditional, so concurrent requests across workers produce one write
+per interval rather than one each.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, update
+
+import config
+from extensions import db
+from models import User
+
+
+def touch_last_seen(user: User, now: datetime | None = None) -> bool:
+    """Records activity for user; returns True when a write was made."""
+    now = now or datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=config.USER_LAST_SEEN_INTERVAL_SECONDS)
+    if user.last_seen is not None and user.last_seen >= stale_before:
+        return False
+
+    written = db.session.execute(
+        update(User)
+        .where(User.id == user.id, or_(User.last_seen.is_(None), User.last_seen < stale_before))
+        .values(last_seen=now),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.session.commit()
+    return bool(written)
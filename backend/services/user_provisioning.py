@@ -0,0 +1,157 @@
+"""
+Bulk user provisioning from CSV.
+
+    username,password,role,full_name
+    jdoe,Correct-Horse-9,technician,Jane Doe
+
+Every row is validated before anything is written (the same rules as
+POST /api/users, plus duplicates within the file and against the tenant),
+so a file is either created whole or rejected with an error per bad row.
+Password hashing is deliberately slow, so valid rows are hashed across a
+process pool; the users and a single summarizing audit entry are then
+committed in one transaction.
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+
+import config
+from extensions import db
+from models import User
+from services.audit_logger import log_access
+from services.password_validator import validate_password
+
+COLUMNS = ("username", "password", "role", "full_name")
+ROLES = {"admin", "psychiatrist", "technician"}
+USERNAME_MAX = User.__table__.c.username.type.length
+FULL_NAME_MAX = User.__table__.c.full_name.type.length
+
+
+class ProvisioningError(ValueError):
+    """The file as a whole is unusable (missing columns, too many rows)."""
+
+
+class ProvisioningConflict(ProvisioningError):
+    """A username in the file was created by someone else after validation."""
+
+
+def parse_csv(text: str) -> list[dict]:
+    """Rows as dicts keyed by COLUMNS, each with its 1-based data line number as "row"."""
+    reader = csv.DictReader(io.StringIO(text.lstrip("﻿")))
+    header = [(h or "").strip().lower() for h in (reader.fieldnames or [])]
+    missing = [c for c in ("username", "password", "role") if c not in header]
+    if missing:
+        raise ProvisioningError(f"CSV header is missing {', '.join(missing)}")
+    reader.fieldnames = header
+
+    rows = []
+    for n, rec in enumerate(reader, start=1):
+        if not any((v or "").strip() for v in rec.values() if isinstance(v, str)):
+            continue
+        if len(rows) >= config.USER_PROVISION_MAX_ROWS:
+            raise ProvisioningError(f"CSV has more than {config.USER_PROVISION_MAX_ROWS} rows")
+        rows.append({
+            "row": n,
+            "username": (rec.get("username") or "").strip(),
+            # Passwords are taken verbatim; whitespace may be intentional
+            "password": rec.get("password") or "",
+            "role": (rec.get("role") or "").strip().lower(),
+            "full_name": (rec.get("full_name") or "").strip() or None,
+        })
+    if not rows:
+        raise ProvisioningError("CSV has no rows")
+    return rows
+
+
+def validate_rows(rows: list[dict], tenant_id: int) -> list[dict]:
+    """Every problem in the file as {"row", "username", "error"}; empty when all rows are valid."""
+    errors = []
+    seen = Counter(r["username"] for r in rows if r["username"])
+    usernames = list(seen)
+    existing = set()
+    for i in range(0, len(usernames), 500):
+        existing.update(db.session.scalars(
+            db.select(User.username).where(User.tenant_id == tenant_id, User.username.in_(usernames[i:i + 500]))
+        ))
+
+    for r in rows:
+        if len(r["username"]) < 3:
+            error = "username must be at least 3 characters"
+        elif len(r["username"]) > USERNAME_MAX:
+            error = f"username must be at most {USERNAME_MAX} characters"
+        elif r["full_name"] and len(r["full_name"]) > FULL_NAME_MAX:
+            error = f"full_name must be at most {FULL_NAME_MAX} characters"
+        elif seen[r["username"]] > 1:
+            error = "username appears more than once in the file"
+        elif r["username"] in existing:
+            error = "username already exists"
+        elif r["role"] not in ROLES:
+            error = "role must be admin, psychiatrist, or technician"
+        else:
+            ok, error = validate_password(r["password"])
+            if ok:
+                continue
+        errors.append({"row": r["row"], "username": r["username"], "error": error})
+    return errors
+
+
+def hash_passwords(passwords: list[str], workers: int | None = None) -> list[str]:
+    """
+    generate_password_hash over passwords, in order, spread across a process pool.
+    The pool spawns fresh interpreters: forking a threaded gunicorn worker could copy
+    locks another thread holds (metrics, logging, the audit hub) into the children.
+    """
+    workers = min(workers or config.USER_PROVISION_WORKERS or os.cpu_count() or 1, len(passwords))
+    if workers <= 1:
+        return [generate_password_hash(p) for p in passwords]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(generate_password_hash, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def provision_users(tenant_id: int, text: str, actor_id: int | None = None, ip: str | None = None,
+                    dry_run: bool = False, workers: int | None = None) -> dict:
+    """
+    Creates every user in the CSV text for tenant_id, or none of them.
+    Returns {"rows", "created": [User], "errors": [{"row", "username", "error"}]};
+    with dry_run the file is only validated. Raises ProvisioningError for an unusable file,
+    and ProvisioningConflict when a concurrent insert takes one of the usernames first.
+    """
+    rows = parse_csv(text)
+    errors = validate_rows(rows, tenant_id)
+    summary = {"rows": len(rows), "created": [], "errors": errors}
+
+    if errors:
+        log_access(actor_id, "USER_BULK_CREATE", "users", "FAILED", ip, tenant_id=tenant_id,
+                   message="users_bulk_create_failed", params={"rows": len(rows), "invalid": len(errors)})
+        return summary
+    if dry_run:
+        return summary
+
+    hashes = hash_passwords([r["password"] for r in rows], workers)
+    users = [
+        User(tenant_id=tenant_id, username=r["username"], password_hash=h, role=r["role"], full_name=r["full_name"])
+        for r, h in zip(rows, hashes)
+    ]
+    db.session.add_all(users)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # uq_tenant_username: validation saw the name free, but another request got there first
+        db.session.rollback()
+        raise ProvisioningConflict("a username in the file was created concurrently; no users were created")
+
+    # log_access commits, so the users and their audit entry land together
+    roles = Counter(u.role for u in users)
+    log_access(actor_id, "USER_BULK_CREATE", "users", "SUCCESS", ip, tenant_id=tenant_id,
+               message="users_bulk_created",
+               params={"count": len(users), "roles": ", ".join(f"{n} {role}" for role, n in sorted(roles.items())),
+                       "first_id": users[0].id, "last_id": users[-1].id})
+    summary["created"] = users
+    return summary
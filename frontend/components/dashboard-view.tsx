@@ -25,7 +25,7 @@ import {
   DialogHeader,
   DialogTitle,
 } from "@/components/ui/dialog"
-import { getPatients, getAuditStats, getUsers, getPatientForms } from "@/lib/api"
+import { getPatients, getAuditStats, getAllUsers, getPatientForms } from "@/lib/api"
 import type { Patient, AuditStats, SystemUser, PatientFormEntry } from "@/lib/api"
 import type { UserRole } from "@/components/login-page"
 import {
@@ -168,7 +168,7 @@ function AdminDashboard({
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
-    Promise.all([getAuditStats(), getUsers()])
+    Promise.all([getAuditStats(), getAllUsers()])
       .then(([s, u]) => {
         setStats(s)
         setUsers(u)
@@ -50,7 +50,7 @@ import {
   DialogHeader,
   DialogTitle,
 } from "@/components/ui/dialog"
-import { getUsers, lockUser, unlockUser, updateUser, createUser, resetUserPassword } from "@/lib/api"
+import { getAllUsers, lockUser, unlockUser, updateUser, createUser, resetUserPassword } from "@/lib/api"
 import type { SystemUser } from "@/lib/api"
 
 const roleColors: Record<string, string> = {
@@ -93,7 +93,7 @@ export function ManageUsersView() {
   const fetchUsers = () => {
     setLoading(true)
     setError("")
-    getUsers()
+    getAllUsers()
       .then(setUsers)
       .catch((err) => setError(err.message))
       .finally(() => setLoading(false))
@@ -346,6 +346,7 @@ export function ManageUsersView() {
                   <TableHead className="text-xs font-semibold text-muted-foreground hidden md:table-cell">Role</TableHead>
                   <TableHead className="text-xs font-semibold text-muted-foreground">Status</TableHead>
                   <TableHead className="text-xs font-semibold text-muted-foreground hidden md:table-cell">Failed Attempts</TableHead>
+                  <TableHead className="text-xs font-semibold text-muted-foreground hidden lg:table-cell">Last Login</TableHead>
                   <TableHead className="text-xs font-semibold text-muted-foreground hidden lg:table-cell">Locked Until</TableHead>
                   <TableHead className="text-xs font-semibold text-muted-foreground w-10" />
                 </TableRow>
@@ -395,6 +396,11 @@ export function ManageUsersView() {
                         {user.failed_attempts}
                       </span>
                     </TableCell>
+                    <TableCell className="hidden lg:table-cell">
+                      <span className="text-xs text-muted-foreground">
+                        {user.last_login ? new Date(user.last_login).toLocaleString() : "Never"}
+                      </span>
+                    </TableCell>
                     <TableCell className="hidden lg:table-cell">
                       <span className="text-xs text-muted-foreground">
                         {user.locked_until ? new Date(user.locked_until).toLocaleString() : "—"}
@@ -454,7 +460,7 @@ export function ManageUsersView() {
                 ))}
                 {filteredUsers.length === 0 && (
                   <TableRow>
-                    <TableCell colSpan={6} className="text-center py-8 text-sm text-muted-foreground">
+                    <TableCell colSpan={7} className="text-center py-8 text-sm text-muted-foreground">
                       No users found.
                     </TableCell>
                   </TableRow>
@@ -28,7 +28,7 @@ import {
   SelectValue,
 } from "@/components/ui/select"
 import { Separator } from "@/components/ui/separator"
-import { getAuditLogs, getAuditStats, exportAuditLogs, getUsers } from "@/lib/api"
+import { getAuditLogs, getAuditStats, exportAuditLogs, getAllUsers, streamAuditLogs } from "@/lib/api"
 import type { AuditLogEntry, AuditStats, SystemUser } from "@/lib/api"
 
 // Map action/status to visual styles
@@ -175,6 +175,7 @@ export function SystemLogsView() {
   const [logs, setLogs] = useState<AuditLogEntry[]>([])
   const [stats, setStats] = useState<AuditStats | null>(null)
   const [total, setTotal] = useState(0)
+  const [totalCapped, setTotalCapped] = useState(false)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState("")
   const [searchQuery, setSearchQuery] = useState("")
@@ -206,8 +207,10 @@ export function SystemLogsView() {
     setLoading(true)
     setError("")
 
-    const params: { status?: string; limit?: number; before_id?: number; date_from?: string; date_to?: string; user_id?: number } = { limit: PAGE_SIZE }
+    const params: Parameters<typeof getAuditLogs>[0] = { limit: PAGE_SIZE }
     if (statusFilter) params.status = statusFilter
+    // Only the first page pays for a (capped) total; later pages reuse it
+    params.count = cursorBeforeId ? "none" : "capped"
     if (cursorBeforeId) params.before_id = cursorBeforeId
     if (dateFrom) params.date_from = dateFrom
     if (dateTo) params.date_to = dateTo
@@ -216,7 +219,10 @@ export function SystemLogsView() {
     getAuditLogs(params)
       .then((logsRes) => {
         setLogs(logsRes.items)
-        setTotal(logsRes.total)
+        if (logsRes.total !== null) {
+          setTotal(logsRes.total)
+          setTotalCapped(logsRes.totalCapped)
+        }
       })
       .catch((err: unknown) => setError(err instanceof Error ? err.message : "Failed to load logs"))
       .finally(() => setLoading(false))
@@ -229,7 +235,7 @@ export function SystemLogsView() {
   }
 
   useEffect(() => {
-    getUsers().then(setUsersList).catch(() => {})
+    getAllUsers().then(setUsersList).catch(() => {})
   }, [])
 
   useEffect(() => {
@@ -239,6 +245,28 @@ export function SystemLogsView() {
     fetchStats()
   }, [statusFilter, dateFrom, dateTo, userFilter])
 
+  // Live tail while viewing the newest page; older pages and date ranges stay static
+  useEffect(() => {
+    if (beforeId !== undefined || dateFrom || dateTo) return
+    const controller = new AbortController()
+    const params: Parameters<typeof streamAuditLogs>[0] = {}
+    if (statusFilter) params.status = statusFilter
+    if (userFilter) params.user_id = parseInt(userFilter)
+
+    streamAuditLogs(
+      params,
+      {
+        onEntry: (entry) => {
+          setLogs((prev) => (prev.some((l) => l.id === entry.id) ? prev : [entry, ...prev].slice(0, PAGE_SIZE)))
+          setTotal((prev) => prev + 1)
+        },
+        onGap: () => fetchLogs(),
+      },
+      controller.signal,
+    ).catch(() => {})
+    return () => controller.abort()
+  }, [statusFilter, dateFrom, dateTo, userFilter, beforeId])
+
   const handleNextPage = () => {
     if (logs.length === 0) return
     const lastId = logs[logs.length - 1].id
@@ -445,7 +473,7 @@ export function SystemLogsView() {
               {(hasPrevPage || hasNextPage) && (
                 <div className="flex items-center gap-3">
                   <p className="text-xs text-muted-foreground">
-                    Page {currentPage} of {totalPages} ({total} total)
+                    Page {currentPage} of {totalCapped ? `${totalPages}+` : totalPages} ({total.toLocaleString()}{totalCapped ? "+" : ""} total)
                   </p>
                   <div className="flex items-center gap-1">
                     <Button
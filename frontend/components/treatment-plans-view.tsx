@@ -36,8 +36,8 @@ import {
   SelectTrigger,
   SelectValue,
 } from "@/components/ui/select"
-import { getPatients, getTreatmentPlan, getTreatmentPlans, upsertTreatmentPlan } from "@/lib/api"
-import type { Patient, TreatmentPlanListItem, TreatmentPlanGoal } from "@/lib/api"
+import { getPatients, getTreatmentGoalStats, getTreatmentPlan, getTreatmentPlans, upsertTreatmentPlan } from "@/lib/api"
+import type { Patient, TreatmentGoalStats, TreatmentPlanListItem, TreatmentPlanGoal } from "@/lib/api"
 
 interface GoalStatusEntry {
   label: string
@@ -359,6 +359,8 @@ function PlanDetailPage({
   )
 }
 
+const PLANS_PAGE_SIZE = 100
+
 // ------- Main Treatment Plans View -------
 export function TreatmentPlansView({
   initialPatientId,
@@ -366,7 +368,12 @@ export function TreatmentPlansView({
   initialPatientId?: string
 }) {
   const [plans, setPlans] = useState<TreatmentPlanListItem[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [overdueCount, setOverdueCount] = useState(0)
+  const [overdueOnly, setOverdueOnly] = useState(false)
+  const [goalStats, setGoalStats] = useState<TreatmentGoalStats | null>(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState("")
   const [searchQuery, setSearchQuery] = useState("")
   const [selectedPlan, setSelectedPlan] = useState<TreatmentPlanListItem | null>(null)
@@ -374,22 +381,45 @@ export function TreatmentPlansView({
   const fetchPlans = () => {
     setLoading(true)
     setError("")
-    getTreatmentPlans()
+    getTreatmentPlans({ overdue: overdueOnly, limit: PLANS_PAGE_SIZE })
       .then((data) => {
-        setPlans(data)
-        // Auto-select if navigated from dashboard with patient ID
-        if (initialPatientId && !selectedPlan) {
-          const match = data.find((p) => p.patientCode === initialPatientId)
-          if (match) setSelectedPlan(match)
-        }
+        setPlans(data.items)
+        setNextCursor(data.nextCursor)
+        setOverdueCount(data.overdueCount)
       })
       .catch((err: unknown) => setError(err instanceof Error ? err.message : "Failed to load"))
       .finally(() => setLoading(false))
+    getTreatmentGoalStats()
+      .then(setGoalStats)
+      .catch(() => {})
+  }
+
+  const loadMore = () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    getTreatmentPlans({ overdue: overdueOnly, limit: PLANS_PAGE_SIZE, cursor: nextCursor })
+      .then((data) => {
+        setPlans((prev) => [...prev, ...data.items])
+        setNextCursor(data.nextCursor)
+        setOverdueCount(data.overdueCount)
+      })
+      .catch((err: unknown) => setError(err instanceof Error ? err.message : "Failed to load"))
+      .finally(() => setLoadingMore(false))
   }
 
   useEffect(() => {
     fetchPlans()
-  }, [])
+  }, [overdueOnly])
+
+  // Auto-select if navigated from dashboard with patient ID (may be beyond the first page)
+  useEffect(() => {
+    if (!initialPatientId) return
+    getTreatmentPlans({ patient: initialPatientId })
+      .then((data) => {
+        if (data.items.length > 0) setSelectedPlan(data.items[0])
+      })
+      .catch(() => {})
+  }, [initialPatientId])
 
   const filteredPlans = plans.filter((plan) => {
     if (!searchQuery) return true
@@ -400,12 +430,10 @@ export function TreatmentPlansView({
     )
   })
 
-  const activePlans = plans.filter((p) => p.status === "active").length
-  const totalGoals = plans.reduce((acc, p) => acc + (p.goals?.length || 0), 0)
-  const metGoals = plans.reduce(
-    (acc, p) => acc + (p.goals?.filter((g) => g.status === "met").length || 0),
-    0
-  )
+  // Tenant-wide figures from the server; the plan list itself is paged
+  const activePlans = goalStats?.activePlans ?? 0
+  const totalGoals = goalStats?.goals ?? 0
+  const metGoals = goalStats?.goalsByStatus["met"] ?? 0
 
   if (selectedPlan) {
     return <PlanDetailPage plan={selectedPlan} onBack={() => setSelectedPlan(null)} />
@@ -467,16 +495,16 @@ export function TreatmentPlansView({
         </Card>
         <Card className="border-border/60">
           <CardContent className="p-4">
-            <p className="text-xs text-muted-foreground font-medium">Total Plans</p>
-            <p className="text-xl font-bold font-heading text-foreground">{plans.length}</p>
+            <p className="text-xs text-muted-foreground font-medium">Overdue Reviews</p>
+            <p className="text-xl font-bold font-heading text-destructive">{overdueCount}</p>
           </CardContent>
         </Card>
       </div>
 
       {/* Search */}
       <Card className="border-border/60">
-        <CardContent className="p-4">
-          <div className="relative">
+        <CardContent className="p-4 flex flex-col sm:flex-row gap-3">
+          <div className="relative flex-1">
             <Search className="absolute left-3 top-1/2 -translate-y-1/2 size-4 text-muted-foreground" />
             <Input
               placeholder="Search by patient name or ID..."
@@ -485,6 +513,13 @@ export function TreatmentPlansView({
               onChange={(e) => setSearchQuery(e.target.value)}
             />
           </div>
+          <Button
+            variant={overdueOnly ? "default" : "outline"}
+            className={overdueOnly ? "" : "bg-transparent text-foreground"}
+            onClick={() => setOverdueOnly((v) => !v)}
+          >
+            Overdue only
+          </Button>
         </CardContent>
       </Card>
 
@@ -538,9 +573,9 @@ export function TreatmentPlansView({
                     </div>
                   )}
                   {plan.reviewDate && (
-                    <div className="flex items-center gap-1">
+                    <div className={`flex items-center gap-1 ${plan.overdue ? "text-destructive" : ""}`}>
                       <Calendar className="size-3" />
-                      <span>Review {plan.reviewDate}</span>
+                      <span>Review {plan.reviewDate}{plan.overdue ? " (overdue)" : ""}</span>
                     </div>
                   )}
                 </div>
@@ -556,6 +591,15 @@ export function TreatmentPlansView({
           </Card>
         )}
       </div>
+
+      {nextCursor && (
+        <div className="flex justify-center">
+          <Button variant="outline" className="bg-transparent text-foreground" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore && <Loader2 className="size-4 mr-2 animate-spin" />}
+            Load more
+          </Button>
+        </div>
+      )}
     </div>
   )
 }
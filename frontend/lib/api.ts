@@ -163,6 +163,7 @@ export interface AuditLogEntry {
   timestamp: string
   userId: number | null
   username: string | null
+  userRole: string | null
   action: string
   resource: string
   ipAddress: string | null
@@ -171,7 +172,9 @@ export interface AuditLogEntry {
 }
 
 export interface AuditLogsResponse {
-  total: number
+  total: number | null
+  totalMode: "exact" | "estimated" | "capped" | "none"
+  totalCapped: boolean
   nextBeforeId: number | null
   items: AuditLogEntry[]
 }
@@ -193,11 +196,13 @@ export function getAuditLogs(params?: {
   date_from?: string
   date_to?: string
   user_id?: number
+  count?: "exact" | "estimated" | "capped" | "none"
 }) {
   const query = new URLSearchParams()
   if (params?.action) query.set("action", params.action)
   if (params?.status) query.set("status", params.status)
   if (params?.user_id) query.set("user_id", String(params.user_id))
+  if (params?.count) query.set("count", params.count)
   if (params?.limit) query.set("limit", String(params.limit))
   if (params?.before_id) query.set("before_id", String(params.before_id))
   if (params?.date_from) query.set("date_from", params.date_from)
@@ -206,8 +211,26 @@ export function getAuditLogs(params?: {
   return apiGet<AuditLogsResponse>(`/api/audit/logs${qs ? `?${qs}` : ""}`)
 }
 
-export function getAuditStats() {
-  return apiGet<AuditStats>("/api/audit/stats")
+export function getAuditStats(params?: { date_from?: string; date_to?: string }) {
+  const query = new URLSearchParams()
+  if (params?.date_from) query.set("date_from", params.date_from)
+  if (params?.date_to) query.set("date_to", params.date_to)
+  const qs = query.toString()
+  return apiGet<AuditStats>(`/api/audit/stats${qs ? `?${qs}` : ""}`)
+}
+
+export interface AuditTrend {
+  action: string
+  status: string | null
+  points: { hour: string; count: number }[]
+}
+
+export function getAuditTrend(params: { action: string; status?: string; date_from?: string; date_to?: string }) {
+  const query = new URLSearchParams({ action: params.action })
+  if (params.status) query.set("status", params.status)
+  if (params.date_from) query.set("date_from", params.date_from)
+  if (params.date_to) query.set("date_to", params.date_to)
+  return apiGet<AuditTrend>(`/api/audit/stats/trend?${query.toString()}`)
 }
 
 
@@ -222,10 +245,34 @@ export interface SystemUser {
   permanently_locked: boolean
   locked_until: string | null
   last_login: string | null
+  last_seen: string | null
+}
+
+export interface UsersResponse {
+  items: SystemUser[]
+  nextAfterId: number | null
 }
 
-export function getUsers() {
-  return apiGet<SystemUser[]>("/api/users")
+export function getUsers(params?: { role?: string; locked?: boolean; limit?: number; after_id?: number }) {
+  const query = new URLSearchParams()
+  if (params?.role) query.set("role", params.role)
+  if (params?.locked !== undefined) query.set("locked", params.locked ? "1" : "0")
+  if (params?.limit) query.set("limit", String(params.limit))
+  if (params?.after_id) query.set("after_id", String(params.after_id))
+  const qs = query.toString()
+  return apiGet<UsersResponse>(`/api/users${qs ? `?${qs}` : ""}`)
+}
+
+// Follows nextAfterId until the directory is exhausted, for views that need every user
+export async function getAllUsers(params?: { role?: string; locked?: boolean }) {
+  const users: SystemUser[] = []
+  let after_id: number | undefined
+  do {
+    const page = await getUsers({ ...params, limit: 200, after_id })
+    users.push(...page.items)
+    after_id = page.nextAfterId ?? undefined
+  } while (after_id)
+  return users
 }
 
 export function lockUser(userId: number) {
@@ -256,13 +303,21 @@ export function getDashboardPatients() {
 
 // Audit export — returns a file download
 export async function exportAuditLogs(params?: {
+  action?: string
   status?: string
   date_from?: string
   date_to?: string
   user_id?: number
+  resource_contains?: string
+  format?: "csv" | "ndjson"
+  gzip?: boolean
 }) {
   const query = new URLSearchParams()
+  if (params?.action) query.set("action", params.action)
   if (params?.status) query.set("status", params.status)
+  if (params?.resource_contains) query.set("resource_contains", params.resource_contains)
+  if (params?.format) query.set("format", params.format)
+  if (params?.gzip) query.set("gzip", "1")
   if (params?.date_from) query.set("date_from", params.date_from)
   if (params?.date_to) query.set("date_to", params.date_to)
   if (params?.user_id) query.set("user_id", String(params.user_id))
@@ -291,6 +346,59 @@ export async function exportAuditLogs(params?: {
   })
 }
 
+// Live audit tail over Server-Sent Events. EventSource can't send the bearer header,
+// so the stream is read with fetch; it reconnects with Last-Event-ID until aborted.
+export async function streamAuditLogs(
+  params: { action?: string; status?: string; user_id?: number; resource_contains?: string },
+  handlers: { onEntry: (entry: AuditLogEntry) => void; onGap?: () => void },
+  signal: AbortSignal,
+) {
+  const query = new URLSearchParams()
+  if (params.action) query.set("action", params.action)
+  if (params.status) query.set("status", params.status)
+  if (params.user_id) query.set("user_id", String(params.user_id))
+  if (params.resource_contains) query.set("resource_contains", params.resource_contains)
+  const qs = query.toString()
+  const url = `${API_BASE_URL}/api/audit/stream${qs ? `?${qs}` : ""}`
+
+  let lastId: string | null = null
+  let retryMs = 3000
+  while (!signal.aborted) {
+    try {
+      const headers = authHeaders()
+      if (lastId) headers["Last-Event-ID"] = lastId
+      const res = await fetch(url, { method: "GET", headers, signal })
+      if (!res.ok || !res.body) throw new Error(`Stream failed: ${res.status}`)
+
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ""
+      for (;;) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += value
+        let sep: number
+        while ((sep = buffer.indexOf("\n\n")) >= 0) {
+          const block = buffer.slice(0, sep)
+          buffer = buffer.slice(sep + 2)
+          let event = "message"
+          let data = ""
+          for (const line of block.split("\n")) {
+            if (line.startsWith("id: ")) lastId = line.slice(4)
+            else if (line.startsWith("event: ")) event = line.slice(7)
+            else if (line.startsWith("data: ")) data += line.slice(6)
+            else if (line.startsWith("retry: ")) retryMs = parseInt(line.slice(7)) || retryMs
+          }
+          if (event === "audit" && data) handlers.onEntry(JSON.parse(data) as AuditLogEntry)
+          else if (event === "gap") handlers.onGap?.()
+        }
+      }
+    } catch {
+      if (signal.aborted) return
+    }
+    await new Promise((resolve) => setTimeout(resolve, retryMs))
+  }
+}
+
 // Treatment Plans
 export interface TreatmentPlanGoal {
   id: string
@@ -310,10 +418,53 @@ export interface TreatmentPlanListItem {
   goals: TreatmentPlanGoal[]
   status: string
   updatedAt: string | null
+  overdue?: boolean
+  revision?: number
 }
 
-export function getTreatmentPlans() {
-  return apiGet<TreatmentPlanListItem[]>("/api/patients/treatment-plans")
+export interface TreatmentPlansResponse {
+  items: TreatmentPlanListItem[]
+  nextCursor: string | null
+  overdueCount: number
+}
+
+export function getTreatmentPlans(params?: {
+  status?: string
+  review_from?: string
+  review_to?: string
+  overdue?: boolean
+  provider_id?: number
+  patient?: string
+  limit?: number
+  cursor?: string
+}) {
+  const query = new URLSearchParams()
+  if (params?.status) query.set("status", params.status)
+  if (params?.review_from) query.set("review_from", params.review_from)
+  if (params?.review_to) query.set("review_to", params.review_to)
+  if (params?.overdue) query.set("overdue", "1")
+  if (params?.provider_id) query.set("provider_id", String(params.provider_id))
+  if (params?.patient) query.set("patient", params.patient)
+  if (params?.limit) query.set("limit", String(params.limit))
+  if (params?.cursor) query.set("cursor", params.cursor)
+  const qs = query.toString()
+  return apiGet<TreatmentPlansResponse>(`/api/patients/treatment-plans${qs ? `?${qs}` : ""}`)
+}
+
+export interface TreatmentGoalStats {
+  plans: number
+  activePlans: number
+  goals: number
+  goalsByStatus: Record<string, number>
+  overdueGoals: number
+  plansWithoutMeasurableGoals: number
+}
+
+export function getTreatmentGoalStats(params?: { provider_id?: number }) {
+  const query = new URLSearchParams()
+  if (params?.provider_id) query.set("provider_id", String(params.provider_id))
+  const qs = query.toString()
+  return apiGet<TreatmentGoalStats>(`/api/patients/treatment-plans/goal-stats${qs ? `?${qs}` : ""}`)
 }
 
 export function upsertTreatmentPlan(
@@ -342,12 +493,20 @@ export interface TemplateField {
   max?: number
 }
 
+export interface TemplateScoring {
+  method: "sum" | "mean"
+  fields?: string[]
+  bands?: { min: number; max: number; label: string }[]
+}
+
 export interface FormTemplate {
   id: number
   name: string
   category: string
   description: string | null
   fields: TemplateField[]
+  scoring: TemplateScoring | null
+  version: string | null
   allowedRoles: string[]
   status: string
   createdBy: number | null
@@ -362,8 +521,11 @@ export interface PatientFormEntry {
   templateId: number
   templateName: string | null
   templateCategory: string | null
+  templateVersion: string | null
   formData: Record<string, unknown>
   status: string
+  score: number | null
+  severity: string | null
   filledBy: number | null
   filledByName: string | null
   templateFields?: TemplateField[]
@@ -379,11 +541,23 @@ export function getTemplate(templateId: number) {
   return apiGet<FormTemplate>(`/api/templates/${templateId}`)
 }
 
+export interface TemplateVersion {
+  version: string
+  fields: TemplateField[]
+  scoring: TemplateScoring | null
+}
+
+// Versions are immutable and served with a long-lived cache header
+export function getTemplateVersion(versionHash: string) {
+  return apiGet<TemplateVersion>(`/api/templates/versions/${versionHash}`)
+}
+
 export function createTemplate(data: {
   name: string
   category: string
   description?: string
   fields: TemplateField[]
+  scoring?: TemplateScoring | null
   allowedRoles: string[]
 }) {
   return apiPost<FormTemplate>("/api/templates", data)
@@ -394,12 +568,26 @@ export function updateTemplate(templateId: number, data: {
   category?: string
   description?: string
   fields?: TemplateField[]
+  scoring?: TemplateScoring | null
   allowedRoles?: string[]
   status?: string
 }) {
   return apiPut<FormTemplate>(`/api/templates/${templateId}`, data)
 }
 
+export interface BulkAssignResponse {
+  templateId: number
+  created: number
+  skipped: { patientId: string; reason: string }[]
+}
+
+export function bulkAssignTemplate(templateId: number, data: {
+  patientIds?: (string | number)[]
+  filter?: { status?: string; riskLevel?: string; assignedProviderId?: number }
+}) {
+  return apiPost<BulkAssignResponse>(`/api/templates/${templateId}/assign`, data)
+}
+
 export function getPatientForms(patientCode: string) {
   return apiGet<PatientFormEntry[]>(`/api/patients/${patientCode}/forms`)
 }